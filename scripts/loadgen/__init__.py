@@ -0,0 +1,5 @@
+"""Shared building blocks for the Event Hubs load-generation scripts
+
+The publisher scripts in scripts/ add this directory to sys.path simply by
+being run from it, so they import these modules as `loadgen.<module>`.
+"""
@@ -0,0 +1,6 @@
+"""python3 -m loadgen COMMAND; see loadgen.cli"""
+
+from loadgen.cli import main
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+"""Resumable historical backfill of the orders topic
+
+Walks an event-time range in order, --orders-per-day orders spread evenly
+over it, and publishes them as fast as the hub accepts: chunks of --chunk
+orders go out in batches filled to capacity with up to --max-in-flight
+chunks sending at once. Throttled sends back off through RateController.
+
+Progress is checkpointed to a local JSON file after every chunk: the first
+chunk not yet acknowledged plus any later chunks already acknowledged. Orders
+are regenerated identically from the seed and their number (order_ids
+included), so a crashed or interrupted run resumes with only the chunks the
+hub never acknowledged; at most the chunks that were acknowledged but not yet
+checkpointed when the process died are sent twice. The range and seed are
+kept in the checkpoint, so a resumed run needs no options besides the file.
+
+With --hydration the orders view is polled afterwards until it holds every
+backfilled order, and the time that took is reported. Backfilled orders are
+counted by their distinct order_ids, which carry their own prefix, so live
+orders in the same time range and duplicates of resent chunks do not count. --hydrate-only does
+just that, e.g. after recreating the sources over an already backfilled hub.
+
+    cd scripts && python3 -m loadgen backfill --start 2025-01-01 --end 2025-04-01 --orders-per-day 200000 --hydration
+"""
+
+import asyncio
+import json
+import math
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from loadgen.orders import HISTORICAL_PREFIX, BulkOrderGenerator
+from loadgen.pipeline import PublishStats, send_batch
+from loadgen.producers import get_backend
+from loadgen.ratecontrol import RateController
+from loadgen.serialization import require_unpacked
+
+ORDERS_TOPIC = "orders"
+
+# Options stored in the checkpoint; a resumed run must not change them
+PLAN_OPTIONS = ("start", "end", "orders_per_day", "chunk", "seed")
+
+DEFAULTS = {"orders_per_day": 100_000, "chunk": 2000, "seed": 0}
+
+def parse_time(text):
+    """Naive UTC datetime of an ISO 8601 date or time"""
+    value = datetime.fromisoformat(text)
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+class BackfillPlan:
+    """orders_per_day orders evenly spaced from start to end, cut into chunks"""
+
+    def __init__(self, start, end, orders_per_day, chunk, seed):
+        self.start = parse_time(start)
+        self.end = parse_time(end)
+        if self.end <= self.start:
+            raise ValueError(f"End {end} is not after start {start}")
+        self.options = {"start": start, "end": end, "orders_per_day": orders_per_day, "chunk": chunk, "seed": seed}
+        self.total = int((self.end - self.start) / timedelta(days=1) * orders_per_day)
+        self.chunk = chunk
+        self.chunks = math.ceil(self.total / chunk)
+        self.seed = seed
+        self.spacing = (self.end - self.start) / max(self.total, 1)
+
+    def created_at(self, first, count):
+        return [self.start + self.spacing * n for n in range(first, first + count)]
+
+    def orders(self, index):
+        """(number of the first order, creation times) of chunk index"""
+        first = index * self.chunk
+        return first, self.created_at(first, min(self.chunk, self.total - first))
+
+    def payloads(self, generator, index):
+        # Reseeding per chunk makes every chunk reproducible on its own
+        generator.random.seed(f"{self.seed}:{index}")
+        return generator.generate_historical(*self.orders(index))
+
+class Checkpoint:
+    """Acknowledged chunks of a plan, saved to path after every change
+
+    next is the first chunk not acknowledged yet and done holds the
+    acknowledged chunks after it, which complete out of order.
+    """
+
+    def __init__(self, path, options):
+        self.path = path
+        self.options = options
+        self.next = 0
+        self.done = set()
+
+    @staticmethod
+    def read(path):
+        """Saved checkpoint dict, or None if there is none"""
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def load(cls, path, options, saved):
+        checkpoint = cls(path, options)
+        if saved:
+            checkpoint.next = saved["next"]
+            checkpoint.done = set(saved["done"])
+        return checkpoint
+
+    def complete(self, index):
+        self.done.add(index)
+        while self.next in self.done:
+            self.done.remove(self.next)
+            self.next += 1
+        self.save()
+
+    def acknowledged(self, plan):
+        """Orders in acknowledged chunks"""
+        return min(self.next * plan.chunk, plan.total) + sum(len(plan.orders(index)[1]) for index in self.done)
+
+    def save(self):
+        # Written aside and renamed over, so a crash never leaves half a file
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump({"plan": self.options, "next": self.next, "done": sorted(self.done)}, f)
+        os.replace(temporary, self.path)
+
+def resolve_plan(args, saved):
+    """BackfillPlan from the arguments, filled in from (and checked against) a saved checkpoint"""
+    given = {name: getattr(args, name) for name in PLAN_OPTIONS if getattr(args, name) is not None}
+    if saved:
+        options = saved["plan"]
+        changed = [name for name, value in given.items() if value != options[name]]
+        if changed:
+            raise ValueError(f"{args.checkpoint} was written with a different "
+                             f"{', '.join('--' + name.replace('_', '-') for name in changed)}; "
+                             f"rerun without it to resume, or pass --restart")
+        return BackfillPlan(**options)
+    if "start" not in given:
+        raise ValueError("--start is required unless resuming from a checkpoint")
+    options = dict(DEFAULTS, end=datetime.now(timezone.utc).replace(tzinfo=None).isoformat(timespec="seconds"))
+    options.update(given)
+    return BackfillPlan(**options)
+
+async def send_chunk(producer, make_event, payloads, controller, stats):
+    """Send the payloads of one chunk in batches filled to capacity"""
+    batch = await producer.create_batch()
+    for payload in payloads:
+        event = make_event(payload)
+        try:
+            batch.add(event)
+        except ValueError:
+            if len(batch) == 0:
+                raise ValueError("Payload exceeds the maximum batch size")
+            await send_batch(producer, batch, controller, stats)
+            batch = await producer.create_batch()
+            batch.add(event)
+    if len(batch) > 0:
+        await send_batch(producer, batch, controller, stats)
+
+async def print_progress(plan, checkpoint, stats, interval):
+    while True:
+        await asyncio.sleep(interval)
+        reached = plan.orders(min(checkpoint.next, plan.chunks - 1))[1][0] if plan.total else plan.end
+        print(f"⏱️  {checkpoint.acknowledged(plan) / max(plan.total, 1):.1%} done, event time up to "
+              f"{reached.isoformat()}Z; {stats.summary('orders')}")
+
+async def publish(plan, checkpoint, max_in_flight, report_interval):
+    """Send every chunk the checkpoint does not hold; returns (stats, controller)"""
+    backend = get_backend()
+    generator = BulkOrderGenerator()
+    stats = PublishStats()
+    # Unlimited, but backs off (and retries) when the hub throttles
+    controller = RateController(None)
+    slots = asyncio.Semaphore(max_in_flight)
+    tasks = set()
+    failures = []
+
+    async def run_chunk(producer, index, payloads):
+        try:
+            await send_chunk(producer, backend.EventData, payloads, controller, stats)
+        except Exception as e:
+            failures.append(e)
+        else:
+            checkpoint.complete(index)
+        finally:
+            slots.release()
+
+    print(f"Target: {backend.describe(ORDERS_TOPIC)}")
+    reporter = asyncio.create_task(print_progress(plan, checkpoint, stats, report_interval))
+    try:
+        async with backend.create_producer(ORDERS_TOPIC) as producer:
+            for index in range(checkpoint.next, plan.chunks):
+                if index in checkpoint.done:
+                    continue
+                await slots.acquire()
+                if failures:
+                    slots.release()
+                    break
+                payloads = plan.payloads(generator, index)
+                stats.record_generated(len(payloads))
+                # Paced only after a throttle signal
+                await controller.acquire(len(payloads))
+                task = asyncio.create_task(run_chunk(producer, index, payloads))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            while tasks:
+                await asyncio.gather(*list(tasks))
+    finally:
+        reporter.cancel()
+    if failures:
+        raise failures[0]
+    return stats, controller
+
+async def wait_for_hydration(dsn, plan, timeout, interval=1.0):
+    """Seconds until the orders view holds every backfilled order, None on timeout"""
+    from loadgen.pgwire import Pool, quote_literal
+
+    # Only the backfill's own orders, each once however often its chunk was sent
+    prefix = quote_literal(HISTORICAL_PREFIX.replace("_", "\\_") + "%")
+    query = (f"SELECT count(DISTINCT order_id) FROM orders WHERE order_id LIKE {prefix} "
+             f"AND created_at >= {quote_literal(plan.start.isoformat())} "
+             f"AND created_at < {quote_literal(plan.end.isoformat())}")
+    pool = Pool(dsn, size=1)
+    started = time.monotonic()
+    count = 0
+    try:
+        while time.monotonic() - started < timeout:
+            count = int(await pool.fetchval(query))
+            if count >= plan.total:
+                return time.monotonic() - started
+            print(f"🕒 orders view holds {count:,} of {plan.total:,} backfilled orders")
+            await asyncio.sleep(interval)
+    finally:
+        await pool.close()
+    print(f"⚠️  orders view holds {count:,} of {plan.total:,} backfilled orders after {timeout:.0f}s")
+    return None
+
+async def run(args):
+    saved = None if args.restart else Checkpoint.read(args.checkpoint)
+    plan = resolve_plan(args, saved)
+    checkpoint = Checkpoint.load(args.checkpoint, plan.options, saved)
+
+    print("📦 Orders backfill")
+    print("=" * 40)
+    print(f"Event time: {plan.start.isoformat()}Z to {plan.end.isoformat()}Z, "
+          f"{plan.options['orders_per_day']:,} orders/day")
+    print(f"Orders: {plan.total:,} in {plan.chunks:,} chunks of {plan.chunk:,}, "
+          f"up to {args.max_in_flight} chunks in flight")
+    if not args.hydrate_only:
+        acknowledged = checkpoint.acknowledged(plan)
+        if saved:
+            print(f"Resuming from {args.checkpoint}: {acknowledged:,} orders already acknowledged")
+        print()
+        if acknowledged < plan.total:
+            checkpoint.save()
+            try:
+                stats, controller = await publish(plan, checkpoint, args.max_in_flight, args.report_interval)
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                print(f"Progress is saved in {args.checkpoint}; rerun to resume")
+                sys.exit(1)
+            print(f"\n📊 {stats.summary('orders')}; {controller.summary()}")
+        print(f"✅ All {plan.total:,} orders acknowledged (checkpoint: {args.checkpoint})")
+
+    if args.hydration is not None:
+        from loadgen.pgwire import PgError
+
+        print(f"\n🔎 Waiting up to {args.hydration:.0f}s for the orders view to hydrate...")
+        try:
+            seconds = await wait_for_hydration(args.dsn, plan, args.hydration)
+        except (OSError, PgError, asyncio.TimeoutError) as e:
+            print(f"❌ Error querying the orders view: {e}")
+            sys.exit(1)
+        if seconds is None:
+            sys.exit(1)
+        since = "the check started" if args.hydrate_only else "publishing ended"
+        print(f"✅ orders view hydrated {seconds:.2f}s after {since} "
+              f"({plan.total / max(seconds, 1e-9):,.0f} orders/s)")
+
+def backfill(args):
+    if args.dsn is None:
+        from loadgen.pgwire import default_dsn
+        args.dsn = default_dsn()
+    try:
+        require_unpacked("backfill")
+        asyncio.run(run(args))
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,180 @@
+"""Offline benchmark of the publisher workloads against the fake producer
+
+Runs each workload for a fixed number of events with seeded generators and
+reports events/s, MiB/s of payload and CPU time per event, so generator and
+serialization changes (including --format protobuf against JSON) can be
+compared without an Event Hubs namespace. --backend eventhubs or kafka runs
+the same workloads against a real namespace or broker instead, to compare
+AMQP with the Kafka protocol:
+
+  orders     BulkOrderGenerator payloads in batches filled to capacity
+  customers  ColumnarCustomerGenerator upserts through KeyedSendPipeline
+  targeted   the send-more-updates.py records, one keyed send per event
+
+--packing runs the orders and customers workloads once per packing mode,
+e.g. none,array,ndjson, to compare records/s and bytes per record (payload
+plus per-event framing) of packed payloads with one record per event.
+
+    cd scripts && python3 -m loadgen.bench --events 200000
+    cd scripts && python3 -m loadgen.bench orders customers --packing none,array,ndjson
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import sys
+import time
+
+from loadgen.keys import distribution_spec
+from loadgen.producers import get_backend
+from loadgen.serialization import PACKINGS, PAYLOAD_FORMATS
+
+async def bench_orders(backend, args, packing):
+    from loadgen.orders import BulkOrderGenerator
+    from loadgen.pipeline import PublishStats, publish_filled_batches
+    from loadgen.serialization import make_packer
+
+    stats = PublishStats()
+    generator = BulkOrderGenerator(seed=args.seed, payload_format=args.format)
+    payloads = itertools.islice(generator.payloads(), args.events)
+    packer = make_packer(packing, args.format, args.pack_bytes)
+    if packer:
+        payloads = packer.pack(payloads)
+    async with backend.create_producer("orders") as producer:
+        await publish_filled_batches(producer, payloads, backend.EventData, stats)
+    return stats
+
+async def bench_customers(backend, args, packing):
+    from loadgen.customers import ColumnarCustomerGenerator
+    from loadgen.pipeline import KeyedSendPipeline, publish_keyed
+    from loadgen.schema import CUSTOMER_FIELDS
+    from loadgen.serialization import make_encoder, make_packer
+
+    generator = ColumnarCustomerGenerator(args.customers, seed=args.seed,
+                                          key_distribution_spec=args.key_distribution)
+    encoder = make_encoder(CUSTOMER_FIELDS, args.format, args.json_backend)
+
+    def updates():
+        for _ in range(args.events):
+            customer_id, customer = generator.generate_customer_update()
+            yield customer_id, encoder.encode(customer)
+
+    async with backend.create_producer("customers") as producer:
+        pipeline = KeyedSendPipeline(producer, args.max_in_flight,
+                                     packer=make_packer(packing, args.format, args.pack_bytes),
+                                     make_event=backend.EventData)
+        await publish_keyed(pipeline, updates(), backend.EventData)
+    return pipeline.stats
+
+async def bench_targeted(backend, args, packing):
+    from loadgen.customers import targeted_updates
+    from loadgen.pipeline import PublishStats
+    from loadgen.schema import CUSTOMER_FIELDS
+    from loadgen.serialization import make_encoder
+
+    encoder = make_encoder(CUSTOMER_FIELDS, args.format, args.json_backend)
+    records = itertools.islice(itertools.cycle(targeted_updates()), args.events)
+    stats = PublishStats()
+    async with backend.create_producer("customers") as producer:
+        for update in records:
+            batch = await producer.create_batch(partition_key=update["customer_id"])
+            batch.add(backend.EventData(encoder.encode(update)))
+            await producer.send_batch(batch)
+            stats.record_batch(batch)
+    return stats
+
+WORKLOADS = {"orders": bench_orders, "customers": bench_customers, "targeted": bench_targeted}
+
+# Workloads whose events can carry packed records
+PACKED_WORKLOADS = ("orders", "customers")
+
+def packing_list(spec):
+    """argparse type for a comma-separated list of packing modes"""
+    modes = [mode.strip() for mode in spec.split(",")]
+    unknown = [mode for mode in modes if mode not in PACKINGS]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"unknown packing {', '.join(unknown)}; choose from {', '.join(PACKINGS)}")
+    return modes
+
+def run_workload(name, args, packing="none"):
+    if args.backend == "fake":
+        backend = get_backend("fake", partitions=args.partitions, send_latency=args.latency)
+    else:
+        backend = get_backend(args.backend)
+    cpu_start = time.process_time()
+    stats = asyncio.run(WORKLOADS[name](backend, args, packing))
+    cpu = time.process_time() - cpu_start
+    elapsed = max(stats.elapsed(), 1e-9)
+    return {
+        "workload": name,
+        "packing": packing,
+        "records": stats.records,
+        "events": stats.events,
+        "batches": stats.batches,
+        "bytes": stats.bytes,
+        "seconds": round(elapsed, 3),
+        "events_per_sec": round(stats.events / elapsed),
+        "bytes_per_sec": round(stats.bytes / elapsed),
+        "records_per_sec": round(stats.records / elapsed),
+        "bytes_per_record": round(stats.bytes / max(stats.records, 1), 1),
+        "cpu_us_per_event": round(cpu / max(stats.events, 1) * 1e6, 2),
+        "cpu_us_per_record": round(cpu / max(stats.records, 1) * 1e6, 2),
+    }
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark publisher workloads offline")
+    parser.add_argument("workloads", nargs="*", metavar="workload",
+                        help=f"workloads to run: {', '.join(sorted(WORKLOADS))} (default: all)")
+    parser.add_argument("--events", type=int, default=100_000,
+                        help="records per workload, one per event unless packed (default: 100000)")
+    parser.add_argument("--customers", type=int, default=100_000,
+                        help="customer key space for the customers workload (default: 100000)")
+    parser.add_argument("--key-distribution", type=distribution_spec, default="uniform",
+                        help="customer key distribution for the customers workload: uniform, zipf:S or hot:F:P")
+    parser.add_argument("--backend", default="fake",
+                        help="producer backend: fake, or eventhubs/kafka to compare the protocols against a "
+                             "real namespace or broker (default: fake)")
+    parser.add_argument("--latency", type=float, default=0.0,
+                        help="simulated seconds per send (default: 0, measures CPU cost only)")
+    parser.add_argument("--partitions", type=int, default=4)
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--format", choices=PAYLOAD_FORMATS, default=None,
+                        help="payload format (default: LOADGEN_PAYLOAD_FORMAT or json)")
+    parser.add_argument("--packing", type=packing_list, default=["none"],
+                        help="packing modes to compare on the orders and customers workloads, "
+                             "e.g. none,array,ndjson (default: none)")
+    parser.add_argument("--pack-bytes", type=int, default=None,
+                        help="maximum bytes per packed event (default: LOADGEN_PACK_BYTES or 65536)")
+    parser.add_argument("--json-backend", default=None,
+                        help="serialization backend: template, orjson or json (default: LOADGEN_JSON_BACKEND)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH as JSON")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.workloads if name not in WORKLOADS]
+    if unknown:
+        parser.error(f"unknown workload: {', '.join(unknown)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.format == "protobuf" and args.packing != ["none"]:
+        print("❌ Error: packed payloads need --format json")
+        sys.exit(1)
+    results = [run_workload(name, args, packing)
+               for name in (args.workloads or sorted(WORKLOADS))
+               for packing in (args.packing if name in PACKED_WORKLOADS else ["none"])]
+
+    print(f"{'workload':<10} {'packing':<8} {'records':>9} {'events':>9} {'batches':>8} {'records/s':>10} "
+          f"{'bytes/rec':>9} {'MiB/s':>8} {'CPU µs/rec':>11}")
+    for r in results:
+        print(f"{r['workload']:<10} {r['packing']:<8} {r['records']:>9} {r['events']:>9} {r['batches']:>8} "
+              f"{r['records_per_sec']:>10} {r['bytes_per_record']:>9.1f} {r['bytes_per_sec'] / 2**20:>8.1f} "
+              f"{r['cpu_us_per_record']:>11.2f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+if __name__ == "__main__":
+    main()
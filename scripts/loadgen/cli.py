@@ -0,0 +1,198 @@
+"""One entry point for the publishers: python3 -m loadgen COMMAND
+
+  orders     random orders: batches of 10 at a steady pace, or --sustained
+             batches filled to capacity
+  customers  initial customer records, then upserts, optionally --continuous
+  fanout     both topics from one process, orders referencing live customers
+  backfill   historical orders over an event-time range, as fast as the hub
+             accepts them, checkpointed so a crashed run resumes
+  targeted   the CUST001/CUST004/CUST007 updates that show upsert behavior
+  sample     the five sample orders
+  smoke      a single test order, to check the connection
+
+The load jobs are short-lived, so start-up time matters. This module imports
+nothing but argparse: --help and argument errors return before any loadgen
+module is loaded, and a command imports only what it runs (loadgen.commands,
+which imports azure-eventhub on the first producer). publish-orders.py,
+publish-customer-upserts.py, send-more-updates.py, send-sample-data.py and
+test-publish.py run the same commands. python3 -m loadgen.startup measures
+the start-up time of each command.
+
+    cd scripts && python3 -m loadgen customers --customers 100000 --no-delay
+"""
+
+import argparse
+
+def _distribution_spec(spec):
+    # loadgen.keys is imported only when the option is given
+    from loadgen.keys import distribution_spec
+    return distribution_spec(spec)
+
+def _metrics_port_argument(parser):
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics on this port (default: LOADGEN_METRICS_PORT, off if unset)")
+
+def _route_argument(parser):
+    parser.add_argument("--route", action="store_true",
+                        help="send batches to explicit partitions, one send in flight per partition, "
+                             "and report each partition's throughput; customers need the kafka or fake "
+                             "backend and must not be mixed with unrouted runs on the same hub")
+
+def orders_arguments(parser):
+    parser.add_argument("--sustained", action="store_true",
+                        help="reuse one producer and send batches filled to capacity")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="target events/s (default: unlimited in sustained mode, "
+                             "otherwise 2, i.e. a batch of 10 every 5 seconds)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="stop sustained mode after this many seconds")
+    _route_argument(parser)
+    parser.add_argument("--report-interval", type=float, default=5.0,
+                        help="seconds between summary lines (default: 5)")
+    _metrics_port_argument(parser)
+    parser.add_argument("--verbose", action="store_true",
+                        help="print every order in continuous mode")
+
+def customers_arguments(parser):
+    parser.add_argument("--customers", type=int, default=None,
+                        help="synthesize this many customer keys with columnar state "
+                             "(default: the 10 demo customers)")
+    parser.add_argument("--updates", type=int, default=15,
+                        help="number of updates sent after the initial records (default: 15)")
+    parser.add_argument("--max-in-flight", type=int, default=8,
+                        help="maximum concurrent sends across partition keys (default: 8)")
+    parser.add_argument("--no-delay", action="store_true",
+                        help="skip the demo pacing sleeps between events")
+    parser.add_argument("--continuous", action="store_true",
+                        help="keep sending updates until interrupted")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="target updates/s in continuous mode, lowered while throttled "
+                             "(default: the demo pace, or unlimited with --no-delay)")
+    parser.add_argument("--key-distribution", type=_distribution_spec, default=None,
+                        help="customers picked for updates: uniform, zipf:S (e.g. zipf:1.1) or hot:F:P, "
+                             "the first fraction F of keys taking fraction P of updates (default: uniform)")
+    parser.add_argument("--partitions", type=int, default=None,
+                        help="partitions assumed by the load estimate (default: ask the hub)")
+    _route_argument(parser)
+    parser.add_argument("--report-interval", type=float, default=5.0,
+                        help="seconds between summary lines (default: 5)")
+    _metrics_port_argument(parser)
+    parser.add_argument("--verbose", action="store_true",
+                        help="print every record sent instead of only summary lines")
+    parser.add_argument("--verify", type=float, nargs="?", const=60.0, default=None, metavar="TIMEOUT",
+                        help="after the updates, check that the customers view converges to the last write "
+                             "per key within TIMEOUT seconds (default: 60)")
+    parser.add_argument("--dsn", default=None,
+                        help="Materialize URL for --verify (default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+
+def fanout_arguments(parser):
+    parser.add_argument("--customers", type=int, default=100_000,
+                        help="customer keys, published as a snapshot before their orders (default: 100000)")
+    parser.add_argument("--order-rate", type=float, default=1000.0,
+                        help="target orders/s, 0 for unlimited (default: 1000)")
+    parser.add_argument("--customer-rate", type=float, default=200.0,
+                        help="target customer upserts/s after the snapshot, 0 for unlimited (default: 200)")
+    parser.add_argument("--no-snapshot", dest="snapshot", action="store_false",
+                        help="the customers were published by an earlier run; reference all of them from the start")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="stop after this many seconds (default: run until interrupted)")
+    parser.add_argument("--key-distribution", type=_distribution_spec, default=None,
+                        help="customers picked for upserts and orders alike: uniform, zipf:S or hot:F:P "
+                             "(default: uniform)")
+    parser.add_argument("--max-in-flight", type=int, default=8,
+                        help="maximum concurrent customer sends across partition keys (default: 8)")
+    parser.add_argument("--seed", type=int, default=None, help="seed the generators for a repeatable run")
+    parser.add_argument("--report-interval", type=float, default=5.0,
+                        help="seconds between summary lines (default: 5)")
+    _metrics_port_argument(parser)
+
+def backfill_arguments(parser):
+    # Plan options default to None so a resumed run takes them from the checkpoint
+    parser.add_argument("--start", default=None,
+                        help="first event time, ISO 8601 (e.g. 2025-01-01); required for a new backfill")
+    parser.add_argument("--end", default=None, help="end of the event-time range, exclusive (default: now)")
+    parser.add_argument("--orders-per-day", type=int, default=None,
+                        help="orders per day of event time (default: 100000)")
+    parser.add_argument("--chunk", type=int, default=None,
+                        help="orders per checkpointed chunk (default: 2000)")
+    parser.add_argument("--seed", type=int, default=None, help="seed of the generated orders (default: 0)")
+    parser.add_argument("--checkpoint", default="orders-backfill.json",
+                        help="progress file, resumed from when it exists (default: orders-backfill.json)")
+    parser.add_argument("--restart", action="store_true", help="ignore and overwrite an existing checkpoint")
+    parser.add_argument("--max-in-flight", type=int, default=16,
+                        help="maximum chunks sending at once (default: 16)")
+    parser.add_argument("--report-interval", type=float, default=5.0,
+                        help="seconds between progress lines (default: 5)")
+    parser.add_argument("--hydration", type=float, nargs="?", const=600.0, default=None, metavar="TIMEOUT",
+                        help="afterwards, wait up to TIMEOUT seconds for the orders view to hold every "
+                             "backfilled order and report how long it took (default: 600)")
+    parser.add_argument("--hydrate-only", action="store_true",
+                        help="skip publishing and only time the hydration of an earlier backfill")
+    parser.add_argument("--dsn", default=None,
+                        help="Materialize URL for --hydration (default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+
+def no_arguments(parser):
+    pass
+
+# name -> (help, argument definitions, "module:function" run with the parsed arguments)
+COMMANDS = {
+    "orders": ("publish random orders to the orders Event Hub", orders_arguments, "loadgen.commands:orders"),
+    "customers": ("publish customer upserts to the customers Event Hub", customers_arguments,
+                  "loadgen.commands:customers"),
+    "fanout": ("publish orders and customer upserts together, orders referencing live customers",
+               fanout_arguments, "loadgen.fanout:fanout"),
+    "backfill": ("backfill historical orders over an event-time range, resumably", backfill_arguments,
+                 "loadgen.backfill:backfill"),
+    "targeted": ("send targeted updates to three demo customers", no_arguments, "loadgen.commands:targeted"),
+    "sample": ("send the five sample orders", no_arguments, "loadgen.commands:sample"),
+    "smoke": ("send one test order and exit non-zero if it fails", no_arguments, "loadgen.commands:smoke"),
+}
+
+def _description(name):
+    help_text = COMMANDS[name][0]
+    return help_text[0].upper() + help_text[1:]
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python3 -m loadgen",
+                                     description="Publish load to the orders and customers Event Hubs")
+    subparsers = parser.add_subparsers(dest="command", metavar="COMMAND", required=True)
+    for name, (help_text, add_arguments, _) in COMMANDS.items():
+        add_arguments(subparsers.add_parser(name, help=help_text, description=_description(name)))
+    return parser
+
+def parse_args(argv=None, command=None):
+    """Arguments of python3 -m loadgen, or of a single command as run by its script"""
+    if command:
+        parser = argparse.ArgumentParser(description=_description(command))
+        COMMANDS[command][1](parser)
+        args = parser.parse_args(argv)
+        args.command = command
+    else:
+        parser = build_parser()
+        args = parser.parse_args(argv)
+    if args.command == "customers" and args.verify is not None and args.continuous:
+        parser.error("--verify checks a finished run and cannot be combined with --continuous")
+    if args.command == "orders" and args.route and not args.sustained:
+        parser.error("--route applies to --sustained mode")
+    if args.command == "customers" and args.route and args.partitions:
+        parser.error("--route routes over the hub's own partitions and cannot be combined with --partitions")
+    if args.command == "backfill" and args.hydrate_only and args.hydration is None:
+        args.hydration = 600.0
+    return args
+
+def run_command(args):
+    """Import the command's module and run it"""
+    from importlib import import_module
+
+    module, function = COMMANDS[args.command][2].split(":")
+    getattr(import_module(module), function)(args)
+
+def main(argv=None, command=None):
+    args = parse_args(argv, command)
+    try:
+        run_command(args)
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,495 @@
+"""The publisher commands run by python3 -m loadgen and the publish/send scripts
+
+Every command takes its producers from the one backend below, so the
+connection string, LOADGEN_PRODUCER_BACKEND and the lazily imported
+azure-eventhub SDK are handled in a single place (loadgen.producers).
+Modules only one command needs are imported inside it.
+"""
+
+import asyncio
+import random
+import sys
+import time
+from itertools import islice
+
+from loadgen.orders import SAMPLE_ORDERS, TEST_ORDER, BulkOrderGenerator, generate_order
+from loadgen.pipeline import KeyedSendPipeline, PublishStats, print_summaries, publish_filled_batches, send_batch
+from loadgen.producers import get_backend
+from loadgen.ratecontrol import RateController
+from loadgen.schema import CUSTOMER_FIELDS, ORDER_FIELDS
+from loadgen.serialization import make_encoder, make_packer, require_unpacked
+
+# Event Hubs unless LOADGEN_PRODUCER_BACKEND selects another backend (e.g. fake)
+BACKEND = get_backend()
+
+ORDERS_TOPIC = "orders"
+CUSTOMERS_TOPIC = "customers"
+
+ORDER_ENCODER = make_encoder(ORDER_FIELDS)
+CUSTOMER_ENCODER = make_encoder(CUSTOMER_FIELDS)
+
+def _metrics(port, topic):
+    """PublisherMetrics served on port, or None when metrics are off"""
+    from loadgen.metrics import DEFAULT_PORT, PublisherMetrics, serve_metrics
+
+    port = DEFAULT_PORT if port is None else port
+    if not port:
+        return None
+    serve_metrics(port)
+    print(f"Metrics: http://localhost:{port}/metrics")
+    return PublisherMetrics(topic)
+
+def _require_unpacked(command):
+    """Exit if LOADGEN_PACKING is set, for commands that send one record per event"""
+    try:
+        require_unpacked(command)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+def _print_lines(lines):
+    for line in lines:
+        print(line)
+
+def _packer():
+    """Packer selected by LOADGEN_PACKING (None for one record per event), exiting if it is unusable"""
+    try:
+        return make_packer()
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+# orders
+
+async def send_batch_to_eventhub(producer, controller, stats, verbose=False):
+    """Send a batch of orders to Event Hub"""
+    # Pace by the controller instead of a fixed sleep; it slows down when throttled
+    await controller.acquire(10)
+    try:
+        # Create a batch of events
+        event_data_batch = await producer.create_batch()
+
+        # Generate 10 orders for this batch
+        for _ in range(10):
+            order = generate_order()
+            event_data = BACKEND.EventData(ORDER_ENCODER.encode(order))
+            stats.record_generated(1)
+
+            try:
+                event_data_batch.add(event_data)
+            except ValueError:
+                # Batch is full, send it and create a new one
+                await send_batch(producer, event_data_batch, controller, stats)
+                event_data_batch = await producer.create_batch()
+                event_data_batch.add(event_data)
+            if verbose:
+                print(f"Added order: {order['order_id']} - {order['customer_name']} - ${order['total_amount']}")
+
+        # Send remaining events in the batch
+        if len(event_data_batch) > 0:
+            await send_batch(producer, event_data_batch, controller, stats)
+
+    except Exception as e:
+        # Retries are exhausted or the error is not retryable; drop this batch and carry on
+        print(f"Error sending to Event Hub: {e}")
+
+async def continuous_publishing(target_rate=2.0, metrics=None, report_interval=5.0, verbose=False):
+    """Continuously publish batches of 10 orders, paced to target_rate events/s"""
+    print("Starting continuous order publishing to Event Hub...")
+    print("Press Ctrl+C to stop")
+
+    producer = BACKEND.create_producer(ORDERS_TOPIC)
+    controller = RateController(target_rate)
+    stats = PublishStats(metrics)
+    if metrics:
+        metrics.track_controller(controller)
+    reporter = asyncio.create_task(print_summaries(stats, report_interval, "orders", controller))
+    try:
+        async with producer:
+            while True:
+                await send_batch_to_eventhub(producer, controller, stats, verbose)
+
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        reporter.cancel()
+        print(f"\nStopped: {stats.summary('orders')}")
+        print(f"Rate control: {controller.summary()}")
+
+async def sustained_publishing(target_rate=None, duration=None, report_interval=5.0, metrics=None, route=False):
+    """Publish orders over one long-lived producer, filling each batch to its size limit
+
+    target_rate is in events/s; None publishes as fast as the hub accepts batches.
+    Throttled sends are retried and lower the rate until the hub keeps up.
+    With LOADGEN_PACKING set, each event carries a pack of orders. With route,
+    batches go to explicit partitions, one sender per partition (loadgen.routing).
+    """
+    producer = BACKEND.create_producer(ORDERS_TOPIC)
+    packer = _packer()
+    payloads = BulkOrderGenerator().payloads()
+    if packer:
+        payloads = packer.pack(payloads)
+
+    print("Starting sustained order publishing to Event Hub...")
+    print(f"Target rate: {f'{target_rate:.0f} events/s' if target_rate else 'unlimited'}")
+    if packer:
+        print(f"Packing: {packer.mode}, up to {packer.max_bytes:,} bytes per event")
+    print("Press Ctrl+C to stop")
+
+    stats = PublishStats(metrics)
+    controller = RateController(target_rate)
+    if metrics:
+        metrics.track_controller(controller)
+    publish = publish_filled_batches
+    if route:
+        from loadgen.routing import publish_partitioned as publish
+    partitions = None
+    try:
+        async with producer:
+            partitions = await publish(
+                producer, payloads, BACKEND.EventData, stats, controller, duration,
+                on_report=lambda stats: print(f"{stats.summary('orders')}; {controller.summary()}"),
+                report_interval=report_interval,
+            )
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    except Exception as e:
+        print(f"Error sending to Event Hub: {e}")
+
+    print(f"\nStopped after {stats.records} orders in {stats.batches} batches "
+          f"({stats.records / max(stats.elapsed(), 1e-9):.0f} orders/s achieved)")
+    print(f"Rate control: {controller.summary()}")
+    if partitions:
+        from loadgen.routing import partition_report
+        _print_lines(partition_report(partitions, "orders"))
+
+def orders(args):
+    print("Event Hub Order Publisher")
+    print("========================")
+    print(f"Target: {BACKEND.describe(ORDERS_TOPIC)}")
+    metrics = _metrics(args.metrics_port, ORDERS_TOPIC)
+    print()
+
+    if not args.sustained:
+        _require_unpacked("orders without --sustained")
+    if args.sustained:
+        asyncio.run(sustained_publishing(args.rate, args.duration, args.report_interval, metrics, args.route))
+    else:
+        asyncio.run(continuous_publishing(args.rate or 2.0, metrics, args.report_interval, args.verbose))
+
+# customers
+
+def _customer_pipeline(producer, max_in_flight, stats, controller=None, router=None, packer=None):
+    """KeyedSendPipeline, or a PartitionedSendPipeline over router's partitions"""
+    if router:
+        from loadgen.routing import PartitionedSendPipeline
+        return PartitionedSendPipeline(producer, router, BACKEND.set_partition_key,
+                                       stats=stats, controller=controller)
+    return KeyedSendPipeline(producer, max_in_flight, stats=stats, controller=controller,
+                             packer=packer, make_event=BACKEND.EventData)
+
+async def send_initial_customers(generator, stats, max_in_flight=8, delay=True, verbose=False, router=None,
+                                 packer=None):
+    """Send initial customer records, packed when given a packer"""
+    producer = BACKEND.create_producer(CUSTOMERS_TOPIC)
+
+    try:
+        async with producer:
+            print("📊 Sending initial customer records...")
+            pipeline = _customer_pipeline(producer, max_in_flight, stats, router=router, packer=packer)
+
+            for customer_id in generator.customer_data:
+                customer = generator.customer_data[customer_id]
+
+                # Create event with key for upsert behavior
+                payload = CUSTOMER_ENCODER.encode(customer)
+
+                # Queue with partition key; sends for different keys overlap
+                await pipeline.submit(customer_id, payload if packer else BACKEND.EventData(payload))
+                if verbose:
+                    print(f"✅ Initial: {customer_id} - {customer['first_name']} {customer['last_name']} ({customer['tier']}, {customer['status']})")
+
+                if delay:
+                    await asyncio.sleep(0.2)  # Small delay between messages
+
+            await pipeline.flush()
+            print(f"📦 {stats.summary()}")
+            if router:
+                _print_lines(pipeline.report("initial records"))
+
+    except Exception as e:
+        print(f"❌ Error sending initial data: {e}")
+
+async def send_customer_updates(generator, stats, num_updates=20, max_in_flight=8, delay=True, verbose=False,
+                                router=None, packer=None):
+    """Send customer updates to simulate real-time changes, packed when given a packer"""
+    producer = BACKEND.create_producer(CUSTOMERS_TOPIC)
+
+    try:
+        async with producer:
+            print(f"\n🔄 Sending {num_updates} customer updates...")
+            pipeline = _customer_pipeline(producer, max_in_flight, stats, router=router, packer=packer)
+
+            for i in range(num_updates):
+                customer_id, updated_customer = generator.generate_customer_update()
+
+                # Create event with key for upsert behavior
+                payload = CUSTOMER_ENCODER.encode(updated_customer)
+
+                await pipeline.submit(customer_id, payload if packer else BACKEND.EventData(payload))
+                if verbose:
+                    print(f"🔄 Update {i+1}: {customer_id} - {updated_customer['first_name']} {updated_customer['last_name']} "
+                          f"(Tier: {updated_customer['tier']}, Orders: {updated_customer['total_orders']}, "
+                          f"LTV: ${updated_customer['lifetime_value']})")
+
+                if delay:
+                    await asyncio.sleep(random.uniform(1, 3))  # Random delay between updates
+
+            await pipeline.flush()
+            print(f"📦 {stats.summary()}")
+            if router:
+                _print_lines(pipeline.report("updates"))
+
+    except Exception as e:
+        print(f"❌ Error sending updates: {e}")
+
+async def continuous_updates(generator, stats, max_in_flight=8, target_rate=None, verbose=False, router=None,
+                             packer=None):
+    """Continuously send customer updates, paced to target_rate updates/s (None: unlimited)
+
+    With a packer, updates are packed per group of customers; with a router
+    (loadgen.routing), they are sent to its partitions explicitly.
+    """
+    producer = BACKEND.create_producer(CUSTOMERS_TOPIC)
+    controller = RateController(target_rate)
+    if stats.metrics:
+        stats.metrics.track_controller(controller)
+    update_count = 0
+    pipeline = None
+
+    try:
+        async with producer:
+            print("\n🚀 Starting continuous customer updates (Press Ctrl+C to stop)...")
+            pipeline = _customer_pipeline(producer, max_in_flight, stats, controller, router, packer)
+
+            try:
+                while True:
+                    # Waits out the token bucket, which backs off while the hub is throttling
+                    await controller.acquire(1)
+                    customer_id, updated_customer = generator.generate_customer_update()
+
+                    payload = CUSTOMER_ENCODER.encode(updated_customer)
+
+                    await pipeline.submit(customer_id, payload if packer else BACKEND.EventData(payload))
+                    update_count += 1
+                    if verbose:
+                        print(f"🔄 Update #{update_count}: {customer_id} - "
+                              f"{updated_customer['first_name']} {updated_customer['last_name']} "
+                              f"(Tier: {updated_customer['tier']}, Orders: {updated_customer['total_orders']}, "
+                              f"Status: {updated_customer['status']})")
+
+                    await asyncio.sleep(0)  # Let in-flight sends make progress
+            finally:
+                await pipeline.flush()
+
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print(f"\n✋ Stopped after {update_count} updates")
+    except Exception as e:
+        print(f"❌ Error in continuous updates: {e}")
+    print(f"📊 Rate control: {controller.summary()}")
+    if router and pipeline:
+        _print_lines(pipeline.report("updates"))
+
+async def partition_count():
+    """Number of partitions of the customers hub"""
+    async with BACKEND.create_producer(CUSTOMERS_TOPIC) as producer:
+        return len(await producer.get_partition_ids())
+
+async def partition_router(key_of, num_keys, index_of=None):
+    """PartitionRouter over the customers hub's partitions, exiting if they cannot be read"""
+    from loadgen.routing import PartitionRouter
+
+    try:
+        async with BACKEND.create_producer(CUSTOMERS_TOPIC) as producer:
+            return await PartitionRouter.create(producer, key_of, num_keys, index_of)
+    except Exception as e:
+        print(f"❌ Error: cannot read the partitions of {CUSTOMERS_TOPIC} for --route: {e}")
+        sys.exit(1)
+
+async def publish_customers(args):
+    from loadgen.customers import CUSTOMERS, ColumnarCustomerGenerator, CustomerDataGenerator
+    from loadgen.keys import load_report
+
+    if args.customers:
+        generator = ColumnarCustomerGenerator(args.customers, key_distribution_spec=args.key_distribution)
+        key_of = generator.customer_id
+    else:
+        generator = CustomerDataGenerator(args.key_distribution)
+        key_of = CUSTOMERS.__getitem__
+    delay = not args.no_delay
+    # Every phase packs or none does: the packed view orders a key's updates by
+    # offset, which only holds while they all share the pack's partition key
+    packer = _packer()
+    router = None
+    if args.route:
+        if packer:
+            print("❌ Error: --route sends each key's events on their own; unset LOADGEN_PACKING")
+            sys.exit(1)
+        if BACKEND.set_partition_key is None:
+            print(f"❌ Error: the {BACKEND.name} backend cannot key events sent to an explicit partition, "
+                  "which the customers UPSERT source needs; use --route with LOADGEN_PRODUCER_BACKEND=kafka")
+            sys.exit(1)
+        router = await partition_router(key_of, generator.key_distribution.num_keys,
+                                        getattr(generator, "index_of", None))
+
+    print("🏗️  Customer Upsert Data Generator")
+    print("=" * 40)
+    print(f"Target Event Hub: {CUSTOMERS_TOPIC}")
+    print(f"Customer IDs: {', '.join(list(islice(generator.customer_data, 5)))}...")
+    if args.customers:
+        print(f"Customer state: {args.customers:,} keys in {generator.memory_bytes() / 2**20:.1f} MiB of columns")
+    if router:
+        print(router.describe())
+        print("⚠️  Routed keys land on other partitions than keyed sends: don't mix routed and unrouted "
+              "runs against one hub")
+        print("Max sends in flight: one per partition")
+    else:
+        print(f"Max sends in flight: {args.max_in_flight}")
+    try:
+        partitions = len(router.partition_ids) if router else args.partitions or await partition_count()
+        for line in load_report(generator.key_distribution, key_of, partitions):
+            print(line)
+    except Exception as e:
+        print(f"⚠️  Skipping the partition load estimate: {e}")
+    metrics = _metrics(args.metrics_port, CUSTOMERS_TOPIC)
+    print()
+
+    # One summary line per interval instead of a line per event
+    stats = PublishStats(metrics)
+    reporter = asyncio.create_task(print_summaries(stats, args.report_interval))
+    try:
+        # Send initial customer data
+        await send_initial_customers(generator, stats, args.max_in_flight, delay, args.verbose, router, packer)
+
+        print("\n⏳ Waiting 3 seconds...")
+        await asyncio.sleep(3)
+
+        # Send some updates
+        await send_customer_updates(generator, stats, args.updates, args.max_in_flight, delay, args.verbose,
+                                    router, packer)
+
+        print("\n✅ Initial data and updates sent!")
+
+        print("💡 You can run this script again to send more updates")
+
+        if args.verify is not None:
+            from loadgen.pgwire import PgError, default_dsn
+            from loadgen.upsertcheck import ExpectedState, verify
+
+            # The generator's customer_data holds the last write of every key
+            published_at = time.monotonic()
+            expected = ExpectedState.from_customers(generator)
+            try:
+                await verify(args.dsn or default_dsn(), expected, generator, published_at, args.verify)
+            except (OSError, PgError) as e:
+                print(f"❌ Error verifying the customers view: {e}")
+
+        if args.continuous:
+            # The demo pace averages one update every 3.5 seconds
+            rate = args.rate or (None if args.no_delay else 1 / 3.5)
+            await continuous_updates(generator, stats, args.max_in_flight, rate, args.verbose, router, packer)
+    finally:
+        reporter.cancel()
+
+def customers(args):
+    asyncio.run(publish_customers(args))
+
+# targeted
+
+async def send_specific_updates():
+    """Send specific updates to demonstrate upsert behavior"""
+    from loadgen.customers import targeted_updates
+
+    producer = BACKEND.create_producer(CUSTOMERS_TOPIC)
+
+    updates = targeted_updates()
+
+    try:
+        async with producer:
+            print("🔄 Sending specific customer updates to demonstrate upsert...")
+
+            for i, update in enumerate(updates, 1):
+                customer_id = update["customer_id"]
+                event_data = BACKEND.EventData(CUSTOMER_ENCODER.encode(update))
+
+                await producer.send_batch([event_data], partition_key=customer_id)
+                print(f"✅ Update {i}: {customer_id} - {update['first_name']} {update['last_name']} "
+                      f"(Tier: {update['tier']}, Orders: {update['total_orders']}, "
+                      f"LTV: ${update['lifetime_value']}, Status: {update['status']})")
+
+                await asyncio.sleep(1)
+
+            print(f"\n🎉 Sent {len(updates)} targeted updates!")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+def targeted(args):
+    _require_unpacked("targeted")
+    print("📊 Customer Upsert Test - Targeted Updates")
+    print("=" * 45)
+    asyncio.run(send_specific_updates())
+
+# sample
+
+async def send_sample_orders():
+    producer = BACKEND.create_producer(ORDERS_TOPIC)
+
+    try:
+        async with producer:
+            for order in SAMPLE_ORDERS:
+                event_data_batch = await producer.create_batch()
+                event_data = BACKEND.EventData(ORDER_ENCODER.encode(order))
+                event_data_batch.add(event_data)
+
+                await producer.send_batch(event_data_batch)
+                print(f"✅ Sent: {order['order_id']} - {order['customer_name']} - ${order['total_amount']}")
+
+                # Small delay between messages
+                await asyncio.sleep(0.5)
+
+            print(f"\n🎉 Successfully sent {len(SAMPLE_ORDERS)} sample orders!")
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+
+def sample(args):
+    _require_unpacked("sample")
+    print("Sending sample orders to Event Hub...")
+    asyncio.run(send_sample_orders())
+
+# smoke
+
+async def send_test_message():
+    producer = BACKEND.create_producer(ORDERS_TOPIC)
+
+    try:
+        async with producer:
+            event_data_batch = await producer.create_batch()
+
+            event_data = BACKEND.EventData(ORDER_ENCODER.encode(TEST_ORDER))
+            event_data_batch.add(event_data)
+
+            await producer.send_batch(event_data_batch)
+            print("✅ Test message sent successfully!")
+            print(f"Order ID: {TEST_ORDER['order_id']}")
+            return True
+
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        return False
+
+def smoke(args):
+    _require_unpacked("smoke")
+    print("Sending test message to Event Hub...")
+    # A failed smoke test fails the Job
+    if not asyncio.run(send_test_message()):
+        sys.exit(1)
@@ -0,0 +1,338 @@
+"""Customer record generators for the customers (UPSERT) Event Hub"""
+
+import random
+import time
+from array import array
+from collections.abc import Mapping
+from datetime import datetime, timedelta
+
+from loadgen.keys import key_distribution, key_indexes
+
+# Customer base data
+CUSTOMERS = [
+    "CUST001", "CUST002", "CUST003", "CUST004", "CUST005",
+    "CUST006", "CUST007", "CUST008", "CUST009", "CUST010"
+]
+
+FIRST_NAMES = ["Alice", "Bob", "Charlie", "Diana", "Eve", "Frank", "Grace", "Henry", "Ivy", "Jack"]
+LAST_NAMES = ["Johnson", "Smith", "Brown", "Davis", "Wilson", "Miller", "Moore", "Taylor", "Anderson", "Thomas"]
+CITIES = ["New York", "Los Angeles", "Chicago", "Houston", "Phoenix", "Philadelphia", "San Antonio", "San Diego", "Dallas", "San Jose"]
+STATES = ["NY", "CA", "IL", "TX", "AZ", "PA", "TX", "CA", "TX", "CA"]
+TIERS = ["bronze", "silver", "gold", "platinum"]
+STATUSES = ["active", "inactive", "suspended", "pending"]
+STREETS = ["Main St", "Oak Ave", "Elm Dr", "Park Rd", "Broadway", "First Ave"]
+EMAIL_DOMAINS = ["example.com", "gmail.com", "yahoo.com", "hotmail.com", "outlook.com"]
+UPDATE_TYPES = [
+    "phone_update", "address_update", "tier_upgrade", "status_change",
+    "order_activity", "email_update", "profile_update"
+]
+
+class CustomerDataGenerator:
+    def __init__(self, key_distribution_spec=None):
+        # Track customer state to simulate realistic updates
+        self.customer_data = {}
+        self.key_distribution = key_distribution(key_distribution_spec, len(CUSTOMERS))
+        self.next_index = key_indexes(self.key_distribution).__next__
+        self.initialize_customers()
+    
+    def initialize_customers(self):
+        """Initialize customers with base data"""
+        for i, customer_id in enumerate(CUSTOMERS):
+            self.customer_data[customer_id] = {
+                "customer_id": customer_id,
+                "first_name": FIRST_NAMES[i],
+                "last_name": LAST_NAMES[i],
+                "email": f"{FIRST_NAMES[i].lower()}.{LAST_NAMES[i].lower()}@example.com",
+                "phone": f"555-{random.randint(1000, 9999)}",
+                "address": f"{random.randint(100, 9999)} {random.choice(['Main St', 'Oak Ave', 'Elm Dr', 'Park Rd'])}",
+                "city": CITIES[i],
+                "state": STATES[i],
+                "zip_code": f"{random.randint(10000, 99999)}",
+                "tier": random.choice(TIERS),
+                "status": "active",
+                "total_orders": 0,
+                "lifetime_value": 0.0,
+                "last_order_date": None,
+                "created_at": (datetime.now() - timedelta(days=random.randint(30, 365))).isoformat() + "Z",
+                "updated_at": datetime.now().isoformat() + "Z"
+            }
+    
+    def generate_customer_update(self):
+        """Generate an update for a customer drawn from the key distribution"""
+        customer_id = CUSTOMERS[self.next_index()]
+        customer = self.customer_data[customer_id].copy()
+        
+        # Random update type
+        update_type = random.choice([
+            "phone_update", "address_update", "tier_upgrade", "status_change", 
+            "order_activity", "email_update", "profile_update"
+        ])
+        
+        current_time = datetime.now().isoformat() + "Z"
+        customer["updated_at"] = current_time
+        
+        if update_type == "phone_update":
+            customer["phone"] = f"555-{random.randint(1000, 9999)}"
+            
+        elif update_type == "address_update":
+            customer["address"] = f"{random.randint(100, 9999)} {random.choice(['Main St', 'Oak Ave', 'Elm Dr', 'Park Rd', 'Broadway', 'First Ave'])}"
+            customer["city"] = random.choice(CITIES)
+            customer["state"] = random.choice(STATES)
+            customer["zip_code"] = f"{random.randint(10000, 99999)}"
+            
+        elif update_type == "tier_upgrade":
+            current_tier_idx = TIERS.index(customer["tier"])
+            if current_tier_idx < len(TIERS) - 1:
+                customer["tier"] = TIERS[current_tier_idx + 1]
+            
+        elif update_type == "status_change":
+            customer["status"] = random.choice(STATUSES)
+            
+        elif update_type == "order_activity":
+            # Simulate new order activity
+            customer["total_orders"] += random.randint(1, 3)
+            order_value = round(random.uniform(25.0, 500.0), 2)
+            customer["lifetime_value"] = round(customer["lifetime_value"] + order_value, 2)
+            customer["last_order_date"] = current_time
+            
+        elif update_type == "email_update":
+            # Sometimes customers update their email
+            first = customer["first_name"].lower()
+            last = customer["last_name"].lower()
+            domain = random.choice(['gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com'])
+            customer["email"] = f"{first}.{last}@{domain}"
+            
+        elif update_type == "profile_update":
+            # Update multiple fields at once
+            customer["phone"] = f"555-{random.randint(1000, 9999)}"
+            customer["total_orders"] += 1
+            customer["lifetime_value"] = round(customer["lifetime_value"] + random.uniform(10.0, 100.0), 2)
+        
+        # Update our tracking
+        self.customer_data[customer_id] = customer
+        
+        return customer_id, customer
+
+class CustomerColumns(Mapping):
+    """Read-only customer_id -> record view over ColumnarCustomerGenerator state
+
+    Records are rendered on access, so iterating yields keys without building
+    any per-customer objects.
+    """
+
+    def __init__(self, generator):
+        self.generator = generator
+
+    def __getitem__(self, customer_id):
+        return self.generator.render(self.generator.index_of(customer_id))
+
+    def __iter__(self):
+        generator = self.generator
+        return (generator.customer_id(index) for index in range(generator.num_customers))
+
+    def __len__(self):
+        return self.generator.num_customers
+
+class ColumnarCustomerGenerator:
+    """Customer generator for millions of keys with array-backed state
+
+    Every attribute lives in a typed array column indexed by customer number
+    (small ints index into the lookup lists above), about 48 bytes per
+    customer. Keys are synthesized as CUST0000001, CUST0000002, ... and updates
+    mutate single column slots instead of copying a record.
+
+    first_key offsets the key range so several generators can own disjoint
+    slices of one key space; pass the same key_width to all of them.
+    key_distribution_spec picks the updated customers (see loadgen.keys),
+    with the hottest keys at the start of the range.
+    """
+
+    CHUNK = 1_000_000
+
+    def __init__(self, num_customers, seed=None, first_key=0, key_width=None, key_distribution_spec=None):
+        self.num_customers = num_customers
+        self.first_key = first_key
+        self.key_width = key_width or max(7, len(str(first_key + num_customers)))
+        self.random = random.Random(seed)
+        self.key_distribution = key_distribution(key_distribution_spec, num_customers)
+        self.next_index = key_indexes(self.key_distribution, self.random).__next__
+        self.first_lower = [name.lower() for name in FIRST_NAMES]
+        self.last_lower = [name.lower() for name in LAST_NAMES]
+        self.customer_data = CustomerColumns(self)
+        self.initialize_customers()
+
+    def _column(self, typecode, population):
+        """Build a column of num_customers draws from population, chunk by chunk"""
+        column = array(typecode)
+        choices = self.random.choices
+        for start in range(0, self.num_customers, self.CHUNK):
+            size = min(self.CHUNK, self.num_customers - start)
+            column.extend(choices(population, k=size))
+        return column
+
+    def initialize_customers(self):
+        """Initialize every customer column with base data"""
+        n = self.num_customers
+        now = time.time()
+        self.first_name = self._column("B", range(len(FIRST_NAMES)))
+        self.last_name = self._column("B", range(len(LAST_NAMES)))
+        self.email_domain = array("B", bytes(n))
+        self.phone = self._column("H", range(1000, 10000))
+        self.street_number = self._column("H", range(100, 10000))
+        self.street = self._column("B", range(4))
+        self.city = self._column("B", range(len(CITIES)))
+        self.state = array("B", self.city)  # STATES is aligned with CITIES
+        self.zip_code = self._column("I", range(10000, 100000))
+        self.tier = self._column("B", range(len(TIERS)))
+        self.status = array("B", bytes(n))  # STATUSES[0] == "active"
+        self.total_orders = array("I", bytes(4 * n))
+        self.lifetime_value = array("d", bytes(8 * n))
+        self.last_order_date = array("d", bytes(8 * n))  # 0.0 means no order yet
+        self.created_at = array("I", (int(now) - days * 86400 for days in self._column("H", range(30, 366))))
+        self.updated_at = array("d", [now]) * n
+
+    def memory_bytes(self):
+        """Total bytes held by the state columns"""
+        return sum(column.itemsize * len(column) for column in vars(self).values()
+                   if isinstance(column, array))
+
+    def customer_id(self, index):
+        return f"CUST{self.first_key + index + 1:0{self.key_width}d}"
+
+    def full_name(self, index):
+        return f"{FIRST_NAMES[self.first_name[index]]} {LAST_NAMES[self.last_name[index]]}"
+
+    def index_of(self, customer_id):
+        digits = customer_id[4:]
+        if not (customer_id.startswith("CUST") and digits.isdigit()
+                and 0 <= int(digits) - self.first_key - 1 < self.num_customers):
+            raise KeyError(customer_id)
+        return int(digits) - self.first_key - 1
+
+    @staticmethod
+    def _timestamp(ts):
+        return datetime.fromtimestamp(ts).isoformat() + "Z"
+
+    def render(self, index):
+        """Build the JSON record for one customer from its column slots"""
+        first = self.first_name[index]
+        last = self.last_name[index]
+        last_order = self.last_order_date[index]
+        return {
+            "customer_id": self.customer_id(index),
+            "first_name": FIRST_NAMES[first],
+            "last_name": LAST_NAMES[last],
+            "email": f"{self.first_lower[first]}.{self.last_lower[last]}@{EMAIL_DOMAINS[self.email_domain[index]]}",
+            "phone": f"555-{self.phone[index]}",
+            "address": f"{self.street_number[index]} {STREETS[self.street[index]]}",
+            "city": CITIES[self.city[index]],
+            "state": STATES[self.state[index]],
+            "zip_code": str(self.zip_code[index]),
+            "tier": TIERS[self.tier[index]],
+            "status": STATUSES[self.status[index]],
+            "total_orders": self.total_orders[index],
+            "lifetime_value": self.lifetime_value[index],
+            "last_order_date": self._timestamp(last_order) if last_order else None,
+            "created_at": self._timestamp(self.created_at[index]),
+            "updated_at": self._timestamp(self.updated_at[index]),
+        }
+
+    def generate_customer_update(self):
+        """Apply a random update to a customer drawn from the key distribution, in place"""
+        rng = self.random
+        index = self.next_index()
+        update_type = rng.choice(UPDATE_TYPES)
+        now = time.time()
+        self.updated_at[index] = now
+
+        if update_type == "phone_update":
+            self.phone[index] = rng.randint(1000, 9999)
+
+        elif update_type == "address_update":
+            self.street_number[index] = rng.randint(100, 9999)
+            self.street[index] = rng.randrange(len(STREETS))
+            self.city[index] = rng.randrange(len(CITIES))
+            self.state[index] = rng.randrange(len(STATES))
+            self.zip_code[index] = rng.randint(10000, 99999)
+
+        elif update_type == "tier_upgrade":
+            if self.tier[index] < len(TIERS) - 1:
+                self.tier[index] += 1
+
+        elif update_type == "status_change":
+            self.status[index] = rng.randrange(len(STATUSES))
+
+        elif update_type == "order_activity":
+            self.total_orders[index] += rng.randint(1, 3)
+            order_value = round(rng.uniform(25.0, 500.0), 2)
+            self.lifetime_value[index] = round(self.lifetime_value[index] + order_value, 2)
+            self.last_order_date[index] = now
+
+        elif update_type == "email_update":
+            self.email_domain[index] = rng.randrange(1, len(EMAIL_DOMAINS))
+
+        elif update_type == "profile_update":
+            self.phone[index] = rng.randint(1000, 9999)
+            self.total_orders[index] += 1
+            self.lifetime_value[index] = round(self.lifetime_value[index] + rng.uniform(10.0, 100.0), 2)
+
+        return self.customer_id(index), self.render(index)
+
+def targeted_updates():
+    """Specific updates to CUST001, CUST004 and CUST007 that show upsert behavior clearly"""
+    return [
+        {
+            "customer_id": "CUST001",
+            "first_name": "Alice",
+            "last_name": "Johnson",
+            "email": "alice.johnson.new@gmail.com",  # Email change
+            "phone": "555-1111",
+            "address": "123 New Street",
+            "city": "San Francisco",
+            "state": "CA",
+            "zip_code": "94105",
+            "tier": "platinum",
+            "status": "active",
+            "total_orders": 5,  # New orders
+            "lifetime_value": 899.99,  # Updated LTV
+            "last_order_date": datetime.now().isoformat() + "Z",
+            "created_at": "2024-12-15T10:00:00Z",
+            "updated_at": datetime.now().isoformat() + "Z"
+        },
+        {
+            "customer_id": "CUST004",
+            "first_name": "Diana",
+            "last_name": "Davis", 
+            "email": "diana.davis@gmail.com",
+            "phone": "555-4444",
+            "address": "456 Oak Avenue",
+            "city": "Seattle", 
+            "state": "WA",
+            "zip_code": "98101",
+            "tier": "gold",  # Upgraded from bronze
+            "status": "active",
+            "total_orders": 8,  # Added orders
+            "lifetime_value": 1299.99,  # High LTV
+            "last_order_date": datetime.now().isoformat() + "Z",
+            "created_at": "2024-11-20T15:30:00Z",
+            "updated_at": datetime.now().isoformat() + "Z"
+        },
+        {
+            "customer_id": "CUST007",
+            "first_name": "Grace",
+            "last_name": "Moore",
+            "email": "grace.moore@outlook.com",  # Different domain
+            "phone": "555-7777",
+            "address": "789 Pine Street",
+            "city": "Portland",
+            "state": "OR", 
+            "zip_code": "97201",
+            "tier": "platinum",  # Major upgrade from silver
+            "status": "active",  # Reactivated from suspended
+            "total_orders": 12,  # Lots of orders
+            "lifetime_value": 2199.50,  # Highest LTV
+            "last_order_date": datetime.now().isoformat() + "Z",
+            "created_at": "2024-10-05T12:00:00Z",
+            "updated_at": datetime.now().isoformat() + "Z"
+        }
+    ]
@@ -0,0 +1,314 @@
+"""Materialize source and view DDL generated from loadgen.schema
+
+The typed views over the orders and customers sources are derived from the
+record schemas the generators emit, so the JSON projections and casts (or
+the protobuf columns) cannot drift from the payloads or between files.
+setup-multi-topic-connection.sql and its variants are generated with:
+
+    cd scripts && python3 -m loadgen.ddl > setup-multi-topic-connection.sql
+    cd scripts && python3 -m loadgen.ddl --format protobuf > setup-multi-topic-connection-protobuf.sql
+    cd scripts && python3 -m loadgen.ddl --packing array > setup-multi-topic-connection-array.sql
+    cd scripts && python3 -m loadgen.ddl --packing ndjson > setup-multi-topic-connection-ndjson.sql
+
+--packing makes the views unnest packed payloads (LOADGEN_PACKING): the
+orders rows of every pack, and for customers the last update per key,
+ordered by Kafka offset and position in the pack.
+
+Two variants keep the parsed rows in memory differently, for comparing
+memory use against query latency on a cluster:
+
+  materialized  CREATE MATERIALIZED VIEW: results are persisted in storage and
+                served from an index only where --index asks for one
+  indexed       CREATE VIEW plus indexes: results live only in the indexes'
+                arrangements (a default index when none is requested)
+
+--hot-indexes indexes the lookup and grouping columns of the verification
+queries: customer_id on both views and region, status on orders
+(show-streaming-updates.sql). The output runs with loadgen.sqlrun:
+
+    cd scripts && python3 -m loadgen.ddl --variant indexed --hot-indexes --output /tmp/setup.sql
+
+--views-only keeps the connection and sources and replaces only the views.
+Materialize refuses DROP VIEW on a materialized view (and the reverse), IF
+EXISTS or not, so the views' current types are looked up in mz_objects over
+--dsn and only the matching DROP is emitted.
+"""
+
+import argparse
+import asyncio
+import sys
+
+from loadgen.schema import CUSTOMER_FIELDS, LINKED_ORDER_FIELDS
+from loadgen.serialization import DEFAULT_FORMAT, PACKINGS, PAYLOAD_FORMATS
+
+CONNECTION = "eventhubs_multi_kafka"
+SECRET = "eventhubs_namespace_connection"
+
+# Objects of earlier setups, dropped before the shared connection is created
+LEGACY_CONNECTIONS = ["customers_eventhub_kafka", "eventhub_kafka"]
+LEGACY_SECRETS = ["customers_eventhub_connection_string", "eventhub_connection_string"]
+
+# view -> (source, topic, fields, protobuf message, upsert envelope, text fields that may be null)
+VIEWS = {
+    "orders": ("orders_raw", "orders", LINKED_ORDER_FIELDS, "loadgen.Order", False, {"customer_id"}),
+    "customers": ("customers_raw", "customers", CUSTOMER_FIELDS, "loadgen.Customer", True, {"last_order_date"}),
+}
+
+# Lookup and grouping columns of verify-multi-topic-data.sql and show-streaming-updates.sql
+HOT_INDEXES = [("orders", ("customer_id",)), ("orders", ("region", "status")), ("customers", ("customer_id",))]
+
+VARIANTS = ("materialized", "indexed")
+
+# mz_objects type -> the DROP that removes it
+DROPS = {"materialized-view": "MATERIALIZED VIEW", "view": "VIEW"}
+
+def index_spec(spec):
+    """argparse type for VIEW:COLUMN[,COLUMN...]"""
+    view, _, columns = spec.partition(":")
+    if view not in VIEWS or not columns:
+        raise argparse.ArgumentTypeError(f"expected VIEW:COLUMN[,COLUMN...] with VIEW one of {', '.join(VIEWS)}")
+    columns = tuple(column.strip() for column in columns.split(","))
+    known = [name for name, _ in VIEWS[view][2]]
+    unknown = [column for column in columns if column not in known]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"{view} has no column {', '.join(unknown)}")
+    return view, columns
+
+def projection(name, sql_type, payload_format, nullable=False, document="data"):
+    """Select-list entry producing column name of type sql_type"""
+    if payload_format == "protobuf":
+        # proto3 has no null strings: an absent field arrives as ''
+        if sql_type == "text" and nullable:
+            return f"NULLIF({name}, '') as {name}"
+        return name
+    return f"({document}->>'{name}')::{sql_type} as {name}"
+
+def source_ddl(view, payload_format, packing="none"):
+    source, topic, _, message, upsert, _ = VIEWS[view]
+    lines = [f"CREATE SOURCE {source}", f"FROM KAFKA CONNECTION {CONNECTION} (TOPIC '{topic}')"]
+    if packing != "none":
+        # A pack holds many keys, so there is no UPSERT envelope; the offset
+        # orders a key's updates for the view instead
+        lines.append("FORMAT JSON" if packing == "array" else "FORMAT TEXT")
+        if upsert:
+            lines.append("INCLUDE OFFSET")
+        return "\n".join(lines) + ";"
+    if upsert:
+        lines.append("KEY FORMAT TEXT")
+    value_format = "VALUE FORMAT" if upsert else "FORMAT"
+    if payload_format == "protobuf":
+        from loadgen.protobuf import schema_literal
+
+        lines.append(f"{value_format} PROTOBUF MESSAGE '{message}' USING SCHEMA")
+        lines.append(f"    {schema_literal()}")
+    else:
+        lines.append(f"{value_format} JSON")
+    if upsert:
+        lines.append("ENVELOPE UPSERT")
+    return "\n".join(lines) + ";"
+
+def unpacked_records(source, packing, ordered, indent=""):
+    """FROM clause with one row per packed record, as the jsonb column record
+
+    ordered adds the Kafka offset and the position within the pack.
+    """
+    position = " WITH ORDINALITY" if ordered else ""
+    if packing == "array":
+        alias = "records(record, position)" if ordered else "records(record)"
+        return f"{source}, jsonb_array_elements(data){position} AS {alias}"
+    alias = "lines(line, position)" if ordered else "lines(line)"
+    extra = ', "offset", position' if ordered else ""
+    return (f"(SELECT line::jsonb AS record{extra}\n"
+            f"{indent}      FROM {source}, unnest(string_to_array(text, chr(10))){position} AS {alias}) AS records")
+
+def packed_view_query(view, packing):
+    """SELECT unnesting the packs of view's source into the view's rows"""
+    source, _, fields, _, upsert, _ = VIEWS[view]
+    if not upsert:
+        columns = ",\n".join(f"    {projection(name, sql_type, 'json', document='record')}" for name, sql_type in fields)
+        return f"SELECT\n{columns}\nFROM {unpacked_records(source, packing, False)}"
+    # Last write per key: updates of one key share a partition key, so offset
+    # and position within the pack order them
+    names = [name for name, _ in fields]
+    columns = ",\n".join(f"        {projection(name, sql_type, 'json', document='record')}"
+                         for name, sql_type in fields)
+    return (f"SELECT DISTINCT ON ({names[0]})\n    {', '.join(names[:8])},\n    {', '.join(names[8:])}\n"
+            f"FROM (\n    SELECT\n{columns},\n        \"offset\", position\n"
+            f"    FROM {unpacked_records(source, packing, True, '    ')}\n) AS updates\n"
+            f"ORDER BY {names[0]}, \"offset\" DESC, position DESC")
+
+def view_ddl(view, payload_format, variant="materialized", cluster=None, packing="none"):
+    source, _, fields, _, upsert, nullable = VIEWS[view]
+    kind = "MATERIALIZED VIEW" if variant == "materialized" else "VIEW"
+    in_cluster = f" IN CLUSTER {cluster}" if cluster and variant == "materialized" else ""
+    if packing != "none":
+        return f"CREATE {kind} {view}{in_cluster} AS\n{packed_view_query(view, packing)};"
+    columns = ",\n".join(f"    {projection(name, sql_type, payload_format, name in nullable)}"
+                        for name, sql_type in fields)
+    where = "\nWHERE data IS NOT NULL" if upsert and payload_format == "json" else ""
+    return f"CREATE {kind} {view}{in_cluster} AS\nSELECT\n{columns}\nFROM {source}{where};"
+
+def index_ddl(view, columns, cluster=None):
+    in_cluster = f" IN CLUSTER {cluster}" if cluster else ""
+    if not columns:
+        return f"CREATE DEFAULT INDEX{in_cluster} ON {view};"
+    name = f"{view}_{'_'.join(columns)}_idx"
+    return f"CREATE INDEX {name}{in_cluster} ON {view} ({', '.join(columns)});"
+
+async def existing_views(dsn, wait=30.0):
+    """view name -> mz_objects type of the views that exist, for --views-only"""
+    from loadgen.pgwire import Connection, quote_literal
+    from loadgen.sqlrun import wait_for_server
+
+    await wait_for_server(dsn, wait)
+    conn = await Connection.connect(dsn)
+    try:
+        rows = await conn.fetch("SELECT name, type FROM mz_catalog.mz_objects WHERE id LIKE 'u%' "
+                                f"AND name IN ({', '.join(quote_literal(view) for view in VIEWS)})")
+    finally:
+        await conn.close()
+    return dict(rows)
+
+def generate(payload_format="json", variant="materialized", indexes=(), cluster=None, views_only=False,
+             packing="none", existing=None):
+    """The setup script as text
+
+    With views_only, existing maps the views that exist to their mz_objects
+    type (see existing_views); each gets the DROP of its own kind.
+    """
+    if packing != "none" and payload_format != "json":
+        raise ValueError("Packed payloads need the json payload format")
+    indexes = list(dict.fromkeys(indexes))
+    options = []
+    if payload_format != "json":
+        options.append(f"--format {payload_format}")
+    if packing != "none":
+        options.append(f"--packing {packing}")
+    if variant != "materialized":
+        options.append(f"--variant {variant}")
+    options.extend(f"--index {view}:{','.join(columns)}" for view, columns in indexes)
+    if cluster:
+        options.append(f"--cluster {cluster}")
+    if views_only:
+        options.append("--views-only")
+    command = " ".join(["python3 -m loadgen.ddl"] + options)
+    header = [f"-- Generated by: cd scripts && {command}",
+              "-- Setup single connection for multiple Event Hub topics"
+              + (", protobuf payload variant" if payload_format == "protobuf" else "")]
+    if payload_format == "protobuf":
+        header += ["-- For publishers run with LOADGEN_PAYLOAD_FORMAT=protobuf (see scripts/loadgen/protobuf.py).",
+                   "-- The messages are defined in scripts/loadgen/records.proto; USING SCHEMA takes its compiled",
+                   "-- FileDescriptorSet, printed by: cd scripts && python3 -m loadgen.protobuf descriptor",
+                   "-- Fields arrive as typed columns, so the views need no JSON extraction or casts."]
+    if packing != "none":
+        header[1] += f", packed {packing} payload variant"
+        header += [f"-- For publishers run with LOADGEN_PACKING={packing}: every event holds many records"
+                   + (" as a JSON array." if packing == "array" else ", one JSON object per line."),
+                   "-- The views unnest the packs into the same rows as the one-record-per-event setup;",
+                   "-- customers keeps the last update per customer_id by Kafka offset and position in the pack."]
+    if variant == "indexed":
+        header.append("-- Plain views kept in indexes: results live only in the index arrangements.")
+    sections = ["\n".join(header)]
+
+    kind = "materialized view" if variant == "materialized" else "view"
+    if views_only:
+        existing = existing or {}
+        unknown = {view: kind for view, kind in existing.items() if kind not in DROPS}
+        if unknown:
+            raise ValueError(", ".join(f"{view} is a {kind}, not a view" for view, kind in unknown.items()))
+        drops = [f"DROP {DROPS[existing[view]]} IF EXISTS {view} CASCADE;"
+                 for view in reversed(list(VIEWS)) if view in existing]
+        sections.append("-- Drop the existing views, each by its current kind; the sources and connection are kept\n"
+                        + ("\n".join(drops) or "-- (none exist)"))
+    else:
+        # CASCADE takes the views and indexes of either variant with the sources, and
+        # dropping the shared connection and secret too makes the script rerunnable
+        drops = [f"DROP SOURCE IF EXISTS {VIEWS[view][0]} CASCADE;" for view in reversed(list(VIEWS))]
+        drops += [f"DROP CONNECTION IF EXISTS {name} CASCADE;" for name in [CONNECTION] + LEGACY_CONNECTIONS]
+        drops += [f"DROP SECRET IF EXISTS {name};" for name in [SECRET] + LEGACY_SECRETS]
+        sections.append("-- First, clean up existing connections and sources\n" + "\n".join(drops))
+        sections.append("-- Create a single secret for the namespace-level connection (no EntityPath)\n"
+                        f"CREATE SECRET {SECRET} AS '${{EVENTHUBS_CONNECTION_STRING}}';")
+        sections.append("-- Create a single Kafka connection that can access all topics\n"
+                        f"CREATE CONNECTION {CONNECTION} TO KAFKA (\n"
+                        "    BROKER '${EVENTHUBS_NAMESPACE}.servicebus.windows.net:9093',\n"
+                        "    SASL MECHANISMS = 'PLAIN',\n"
+                        "    SASL USERNAME = '$ConnectionString',\n"
+                        f"    SASL PASSWORD = SECRET {SECRET},\n"
+                        "    SECURITY PROTOCOL = 'SASL_SSL'\n"
+                        ");")
+        sections.append("-- Create orders source using the shared connection\n"
+                        + source_ddl("orders", payload_format, packing))
+        sections.append(f"-- Create customers {'upsert' if packing == 'none' else 'packed'} source "
+                        "using the same shared connection\n" + source_ddl("customers", payload_format, packing))
+
+    for view in VIEWS:
+        statements = [view_ddl(view, payload_format, variant, cluster, packing)]
+        view_indexes = [columns for name, columns in indexes if name == view]
+        if variant == "indexed" and not view_indexes:
+            view_indexes = [()]
+        statements.extend(index_ddl(view, columns, cluster) for columns in view_indexes)
+        comments = [f"-- Recreate the {view} {kind}"]
+        if packing != "none" and VIEWS[view][4]:
+            # Before the Recreate line, which sqlrun takes as the statement's label
+            comments[:0] = [f"-- The offset ordering only holds when every {view} event is packed: a one-record",
+                            "-- event has another partition key, so it can land on another partition, where its",
+                            "-- offset says nothing about the pack's. Unpacked publishers refuse to run with",
+                            "-- LOADGEN_PACKING set."]
+        if payload_format == "protobuf":
+            comments += [f"-- proto3 has no null strings: a missing {name} arrives as ''" for name in sorted(VIEWS[view][5])]
+        sections.append("\n".join(comments) + "\n" + "\n\n".join(statements))
+    return "\n\n".join(sections) + "\n"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate Materialize source and view DDL from the record schemas")
+    parser.add_argument("--format", choices=PAYLOAD_FORMATS, default=DEFAULT_FORMAT,
+                        help="payload format of the sources (default: LOADGEN_PAYLOAD_FORMAT or json)")
+    parser.add_argument("--packing", choices=PACKINGS, default="none",
+                        help="packed payloads the views unnest: array or ndjson (default: none)")
+    parser.add_argument("--variant", choices=VARIANTS, default="materialized",
+                        help="materialized views, or plain views kept in indexes (default: materialized)")
+    parser.add_argument("--index", type=index_spec, action="append", default=[], metavar="VIEW:COLUMNS",
+                        help="create an index, e.g. orders:region,status (repeatable)")
+    parser.add_argument("--hot-indexes", action="store_true",
+                        help="index " + ", ".join(f"{view}({', '.join(columns)})" for view, columns in HOT_INDEXES))
+    parser.add_argument("--cluster", help="create the views and indexes in this cluster")
+    parser.add_argument("--views-only", action="store_true",
+                        help="only (re)create the views and indexes, keeping the connection and sources")
+    parser.add_argument("--dsn", default=None,
+                        help="Materialize URL --views-only reads the current views from "
+                             "(default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+    parser.add_argument("--wait", type=float, default=30.0,
+                        help="seconds to keep retrying that connection (default: 30)")
+    parser.add_argument("--output", metavar="PATH", help="write to PATH instead of stdout")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    indexes = args.index + (HOT_INDEXES if args.hot_indexes else [])
+    if args.packing != "none" and args.format != "json":
+        print("❌ Error: packed payloads need --format json")
+        sys.exit(1)
+    existing = None
+    if args.views_only:
+        from loadgen.pgwire import PgError, default_dsn
+
+        try:
+            existing = asyncio.run(existing_views(args.dsn or default_dsn(), args.wait))
+        except (OSError, asyncio.TimeoutError, PgError) as e:
+            print(f"❌ Error: cannot look up the existing views: {e}")
+            sys.exit(1)
+    try:
+        sql = generate(args.format, args.variant, indexes, args.cluster, args.views_only, args.packing, existing)
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(sql)
+        print(f"📄 Wrote {args.output}")
+    else:
+        sys.stdout.write(sql)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+"""Multi-process load driver for the orders and customers Event Hubs
+
+Starts N worker processes, each with its own producer and a disjoint slice of
+the key space: order_id shards for orders, a contiguous customer_id range for
+customers. Workers report their running totals to the parent, which prints one
+aggregate line per interval and a per-worker breakdown at the end. With
+--metrics-port, worker N serves its own /metrics on that port + N.
+
+    cd scripts && python3 -m loadgen.driver orders --workers 4 --rate 20000
+    cd scripts && python3 -m loadgen.driver customers --workers 4 --customers 4000000
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import queue
+import sys
+import time
+
+from loadgen.keys import distribution_spec
+from loadgen.metrics import DEFAULT_PORT
+from loadgen.producers import get_backend
+from loadgen.serialization import require_unpacked
+
+TOPICS = {"orders": "orders", "customers": "customers"}
+
+def customer_slice(worker, workers, num_customers):
+    """(first_key, count) of the customer range owned by worker"""
+    first = worker * num_customers // workers
+    last = (worker + 1) * num_customers // workers
+    return first, last - first
+
+def worker_controller(args, stats):
+    """RateController for one worker's share of the aggregate rate"""
+    from loadgen.ratecontrol import RateController
+
+    controller = RateController(args.rate / args.workers if args.rate else None)
+    if stats.metrics:
+        stats.metrics.track_controller(controller)
+    return controller
+
+async def run_orders(producer, event_type, args, worker, stats, report):
+    from loadgen.orders import BulkOrderGenerator
+    from loadgen.pipeline import publish_filled_batches
+
+    generator = BulkOrderGenerator(shard=worker, num_shards=args.workers)
+    await publish_filled_batches(
+        producer, generator.payloads(), event_type, stats, worker_controller(args, stats), args.duration,
+        on_report=report, report_interval=args.report_interval,
+    )
+
+async def run_customers(producer, event_type, args, worker, stats, report):
+    from loadgen.customers import ColumnarCustomerGenerator
+    from loadgen.pipeline import KeyedSendPipeline, publish_keyed
+    from loadgen.schema import CUSTOMER_FIELDS
+    from loadgen.serialization import make_encoder
+
+    first_key, count = customer_slice(worker, args.workers, args.customers)
+    generator = ColumnarCustomerGenerator(
+        count, first_key=first_key, key_width=max(7, len(str(args.customers))),
+        key_distribution_spec=args.key_distribution)
+    encoder = make_encoder(CUSTOMER_FIELDS)
+    pipeline = KeyedSendPipeline(producer, args.max_in_flight, stats=stats, controller=worker_controller(args, stats))
+
+    if args.initial:
+        for customer_id in generator.customer_data:
+            await pipeline.submit(customer_id, event_type(encoder.encode(generator.customer_data[customer_id])))
+        await pipeline.flush()
+
+    def updates():
+        while True:
+            customer_id, customer = generator.generate_customer_update()
+            yield customer_id, encoder.encode(customer)
+
+    await publish_keyed(
+        pipeline, updates(), event_type, args.duration,
+        on_report=report, report_interval=args.report_interval,
+    )
+
+WORKLOADS = {"orders": run_orders, "customers": run_customers}
+
+def worker_main(worker, args, results):
+    """Entry point of one worker process"""
+    from loadgen.pipeline import PublishStats
+
+    backend = get_backend(args.backend)
+    metrics = None
+    if args.metrics_port:
+        from loadgen.metrics import PublisherMetrics, serve_metrics
+
+        serve_metrics(args.metrics_port + worker)
+        metrics = PublisherMetrics(TOPICS[args.workload], worker)
+    stats = PublishStats(metrics)
+
+    def report(stats):
+        results.put((worker, False, stats.as_dict()))
+
+    async def run():
+        producer = backend.create_producer(TOPICS[args.workload])
+        async with producer:
+            await WORKLOADS[args.workload](producer, backend.EventData, args, worker, stats, report)
+
+    error = None
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        error = str(e)
+    totals = stats.as_dict()
+    totals["error"] = error
+    results.put((worker, True, totals))
+
+def aggregate(totals):
+    """Sum per-worker totals; elapsed is the longest worker's"""
+    return {
+        "events": sum(t["events"] for t in totals.values()),
+        "batches": sum(t["batches"] for t in totals.values()),
+        "bytes": sum(t["bytes"] for t in totals.values()),
+        "fill_ratio_sum": sum(t["fill_ratio_sum"] for t in totals.values()),
+        "elapsed": max((t["elapsed"] for t in totals.values()), default=0.0),
+    }
+
+def format_totals(label, totals):
+    elapsed = max(totals["elapsed"], 1e-9)
+    fill = totals["fill_ratio_sum"] / totals["batches"] if totals["batches"] else 0.0
+    return (f"{label}: {totals['events']} events in {totals['batches']} batches, "
+            f"{totals['events'] / elapsed:.0f} events/s, {totals['bytes'] / elapsed / 1024:.0f} KiB/s, "
+            f"avg batch fill {fill:.0%}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Drive Event Hubs load from several worker processes")
+    parser.add_argument("workload", choices=sorted(WORKLOADS))
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes, one producer each (default: CPU count)")
+    parser.add_argument("--rate", type=float, default=None,
+                        help="aggregate target events/s, split evenly across workers (default: unlimited)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="stop after this many seconds (default: run until interrupted)")
+    parser.add_argument("--customers", type=int, default=1_000_000,
+                        help="customer key space split across workers (default: 1000000)")
+    parser.add_argument("--key-distribution", type=distribution_spec, default="uniform",
+                        help="customer key distribution within each worker's range: uniform, zipf:S or hot:F:P")
+    parser.add_argument("--initial", action="store_true",
+                        help="send every customer's initial record before updates")
+    parser.add_argument("--max-in-flight", type=int, default=8,
+                        help="concurrent keyed sends per worker (default: 8)")
+    parser.add_argument("--backend", default=None,
+                        help="producer backend: eventhubs, kafka or fake (default: LOADGEN_PRODUCER_BACKEND or eventhubs)")
+    parser.add_argument("--report-interval", type=float, default=5.0)
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_PORT,
+                        help="serve Prometheus metrics from worker N on this port + N "
+                             "(default: LOADGEN_METRICS_PORT, off if unset)")
+    args = parser.parse_args(argv)
+    if not 1 <= args.workers <= 1000:
+        parser.error("--workers must be between 1 and 1000")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        require_unpacked("the driver")
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    # Fails fast on a missing connection string before any worker starts
+    target = get_backend(args.backend).describe(TOPICS[args.workload])
+
+    print(f"🚀 Starting {args.workers} {args.workload} workers against {target}")
+    results = multiprocessing.Queue()
+    processes = [
+        multiprocessing.Process(target=worker_main, args=(worker, args, results))
+        for worker in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+
+    totals = {}
+    finished = set()
+    last_report = time.monotonic()
+    try:
+        while len(finished) < len(processes):
+            try:
+                worker, done, worker_totals = results.get(timeout=1.0)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    break
+                continue
+            totals[worker] = worker_totals
+            if done:
+                finished.add(worker)
+            if time.monotonic() - last_report >= args.report_interval:
+                print(format_totals(f"📈 {len(totals)} workers", aggregate(totals)))
+                last_report = time.monotonic()
+    except KeyboardInterrupt:
+        # Workers got the same SIGINT; collect their final totals
+        while len(finished) < len(processes):
+            try:
+                worker, done, worker_totals = results.get(timeout=10.0)
+            except queue.Empty:
+                break
+            totals[worker] = worker_totals
+            if done:
+                finished.add(worker)
+
+    for process in processes:
+        process.join()
+
+    print()
+    for worker in sorted(totals):
+        line = format_totals(f"  worker {worker}", totals[worker])
+        if totals[worker].get("error"):
+            line += f" ❌ {totals[worker]['error']}"
+        print(line)
+    print(format_totals("✅ Aggregate", aggregate(totals)))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""Orders and customer upserts from one process, with orders that reference live customers
+
+Both streams run concurrently on one event loop and draw their producers from
+one ProducerPool, i.e. a single long-lived producer per hub built from the
+namespace connection string:
+
+  customers  a snapshot record for every key (unpaced; --no-snapshot when the
+             keys already exist), then upserts at --customer-rate through
+             KeyedSendPipeline
+  orders     BulkOrderGenerator batches filled to capacity at --order-rate,
+             each order carrying the customer_id and name of a customer whose
+             snapshot record the hub has already acknowledged
+
+The snapshot goes out in chunks of SNAPSHOT_CHUNK keys; a chunk's customers
+become available to orders once all of its records are acknowledged.
+
+Orders pick customers with the same key distribution as the upserts, so a hot
+customer changes often and orders often, which is what makes the join of the
+orders and customers views expensive. The orders view exposes customer_id
+(NULL for orders from the other publishers); verify-multi-topic-data.sql
+joins the two.
+
+    cd scripts && python3 -m loadgen fanout --customers 100000 --order-rate 2000 --customer-rate 500 --duration 60
+"""
+
+import asyncio
+import random
+import sys
+from itertools import islice
+
+from loadgen.customers import ColumnarCustomerGenerator
+from loadgen.keys import key_indexes
+from loadgen.metrics import DEFAULT_PORT, PublisherMetrics, serve_metrics
+from loadgen.orders import BulkOrderGenerator
+from loadgen.pipeline import KeyedSendPipeline, PublishStats, print_summaries, publish_filled_batches, publish_keyed
+from loadgen.producers import ProducerPool, get_backend
+from loadgen.ratecontrol import RateController
+from loadgen.schema import CUSTOMER_FIELDS
+from loadgen.serialization import make_encoder, make_packer
+
+ORDERS_TOPIC = "orders"
+CUSTOMERS_TOPIC = "customers"
+
+# Snapshot records acknowledged before orders may reference their customers
+SNAPSHOT_CHUNK = 10_000
+
+class LiveCustomers:
+    """Number of customers, from index 0 up, whose record the hub has acknowledged"""
+
+    def __init__(self, count=0):
+        self.count = count
+        self.ready = asyncio.Event()
+        if count:
+            self.ready.set()
+
+    def advance(self, count):
+        self.count = count
+        self.ready.set()
+
+def snapshot_records(generator, encoder, start, stop):
+    """(customer_id, payload) of the customers from index start up to stop"""
+    for index in range(start, stop):
+        yield generator.customer_id(index), encoder.encode(generator.render(index))
+
+async def send_snapshot(pipeline, generator, encoder, live, make_event, duration=None, chunk=SNAPSHOT_CHUNK):
+    """Send a record for every customer in key order, advancing live only over acknowledged records
+
+    publish_keyed flushes before it returns, so once a chunk is through every
+    record submitted so far has been sent; a failed send raises before live moves.
+    """
+    stats = pipeline.stats
+    submitted = stats.generated
+    for start in range(0, generator.num_customers, chunk):
+        stop = min(start + chunk, generator.num_customers)
+        await publish_keyed(pipeline, snapshot_records(generator, encoder, start, stop), make_event, duration)
+        acknowledged = stats.generated - submitted
+        if acknowledged:
+            live.advance(acknowledged)
+        if acknowledged < stop:
+            # duration ran out part-way through
+            break
+
+def upsert_records(generator, encoder):
+    while True:
+        customer_id, customer = generator.generate_customer_update()
+        yield customer_id, encoder.encode(customer)
+
+def linked_orders(orders, generator, live, rng, chunk=1000):
+    """Endless order payloads, each referencing a live customer drawn from the key distribution"""
+    indexes = key_indexes(generator.key_distribution, rng)
+    while True:
+        count = live.count
+        customers = []
+        for index in islice(indexes, chunk):
+            # Keys whose record is not out yet fold onto the live prefix, where the hottest keys are
+            if index >= count:
+                index %= count
+            customers.append((generator.customer_id(index), generator.full_name(index)))
+        yield from orders.generate(chunk, customers)
+
+async def customer_stream(pool, backend, generator, live, stats, controller, packer, args):
+    producer = pool.get(CUSTOMERS_TOPIC)
+    encoder = make_encoder(CUSTOMER_FIELDS)
+    if args.snapshot:
+        pipeline = KeyedSendPipeline(producer, args.max_in_flight, stats=stats, packer=packer,
+                                     make_event=backend.EventData)
+        await send_snapshot(pipeline, generator, encoder, live, backend.EventData, args.duration)
+        print(f"📦 Snapshot of {live.count:,} customers sent")
+    pipeline = KeyedSendPipeline(producer, args.max_in_flight, stats=stats, controller=controller,
+                                 packer=packer, make_event=backend.EventData)
+    await publish_keyed(pipeline, upsert_records(generator, encoder), backend.EventData, args.duration)
+
+async def order_stream(pool, backend, generator, live, stats, controller, packer, args):
+    # Orders only reference customers that exist
+    await live.ready.wait()
+    orders = BulkOrderGenerator(seed=args.seed)
+    payloads = linked_orders(orders, generator, live, random.Random(args.seed))
+    if packer:
+        payloads = packer.pack(payloads)
+    await publish_filled_batches(pool.get(ORDERS_TOPIC), payloads, backend.EventData, stats, controller,
+                                 args.duration)
+
+async def run(args):
+    backend = get_backend()
+    generator = ColumnarCustomerGenerator(args.customers, seed=args.seed,
+                                          key_distribution_spec=args.key_distribution)
+    live = LiveCustomers(0 if args.snapshot else args.customers)
+
+    print("🔀 Fan-out publisher: orders linked to live customers")
+    print("=" * 40)
+    for topic in (CUSTOMERS_TOPIC, ORDERS_TOPIC):
+        print(f"Target: {backend.describe(topic)}")
+    print(f"Customers: {args.customers:,} keys ({generator.key_distribution}), "
+          f"{'snapshot first' if args.snapshot else 'already published'}")
+    order_rate = f"{args.order_rate:.0f}/s" if args.order_rate else "unlimited"
+    customer_rate = f"{args.customer_rate:.0f}/s" if args.customer_rate else "unlimited"
+    print(f"Rates: orders {order_rate}, customer upserts {customer_rate}")
+    try:
+        packer = make_packer()
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if packer:
+        print(f"Packing: {packer.mode}, up to {packer.max_bytes:,} bytes per event")
+
+    order_metrics = customer_metrics = None
+    metrics_port = DEFAULT_PORT if args.metrics_port is None else args.metrics_port
+    if metrics_port:
+        serve_metrics(metrics_port)
+        order_metrics = PublisherMetrics(ORDERS_TOPIC)
+        customer_metrics = PublisherMetrics(CUSTOMERS_TOPIC)
+        print(f"Metrics: http://localhost:{metrics_port}/metrics")
+    print()
+
+    order_stats, customer_stats = PublishStats(order_metrics), PublishStats(customer_metrics)
+    order_controller = RateController(args.order_rate or None)
+    customer_controller = RateController(args.customer_rate or None)
+    for metrics, controller in ((order_metrics, order_controller), (customer_metrics, customer_controller)):
+        if metrics:
+            metrics.track_controller(controller)
+
+    reporters = [
+        asyncio.create_task(print_summaries(order_stats, args.report_interval, "orders", order_controller)),
+        asyncio.create_task(print_summaries(customer_stats, args.report_interval, "customer records",
+                                            customer_controller)),
+    ]
+    async with ProducerPool(backend) as pool:
+        streams = [
+            asyncio.create_task(customer_stream(pool, backend, generator, live, customer_stats,
+                                                customer_controller, packer, args)),
+            asyncio.create_task(order_stream(pool, backend, generator, live, order_stats,
+                                             order_controller, packer, args)),
+        ]
+        try:
+            await asyncio.gather(*streams)
+        except asyncio.CancelledError:
+            pass
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        finally:
+            for task in streams + reporters:
+                task.cancel()
+
+    print(f"\n📊 {order_stats.summary('orders')}; {order_controller.summary()}")
+    print(f"📊 {customer_stats.summary('customer records')}; {customer_controller.summary()}")
+    print(f"🔗 Orders could reference {live.count:,} of {args.customers:,} customers")
+
+def fanout(args):
+    asyncio.run(run(args))
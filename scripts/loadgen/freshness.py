@@ -0,0 +1,283 @@
+"""Freshness and lag monitor for the Event Hubs sources and their views
+
+Polls Materialize's introspection relations on one pooled connection:
+
+  mz_internal.mz_frontiers             write frontier per object; freshness lag
+                                       is the wall clock minus the frontier
+  mz_internal.mz_wallclock_global_lag  Materialize's own lag measurement
+  mz_internal.mz_source_statistics     messages/bytes received and committed,
+                                       turned into rates between polls, and the
+                                       offset backlog (known - committed)
+
+Object ids come from mz_catalog.mz_objects, looked up once and cached rather
+than joined on every poll as show-connection-usage.sql does; the cache is
+refreshed every --catalog-ttl seconds, or as soon as an id stops reporting
+(setup-eventhubs-sources.sh recreates the objects). Relations a Materialize
+version lacks are skipped after the first error.
+
+Every poll is printed, appended to --output (JSON lines, or CSV for a .csv
+path) and exported as Prometheus gauges with --metrics-port. loadgen.pgstub
+serves canned introspection rows for trying it without a cluster:
+
+    cd scripts && python3 -m loadgen.freshness --interval 5 --output freshness.csv
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import re
+import sys
+import time
+from datetime import datetime
+
+from loadgen.metrics import DEFAULT_PORT, Gauge, serve_metrics
+from loadgen.pgwire import PgError, Pool, default_dsn, quote_literal
+
+DEFAULT_OBJECTS = ["orders_raw", "customers_raw", "orders", "customers"]
+
+FRESHNESS_LAG = Gauge("loadgen_mz_freshness_lag_seconds", "Wall clock minus the write frontier of the object",
+                      ("object",))
+WALLCLOCK_LAG = Gauge("loadgen_mz_wallclock_lag_seconds", "mz_wallclock_global_lag of the object", ("object",))
+MESSAGES_RATE = Gauge("loadgen_mz_source_messages_per_second", "Messages received by the source per second",
+                      ("object",))
+BYTES_RATE = Gauge("loadgen_mz_source_bytes_per_second", "Bytes received by the source per second", ("object",))
+COMMITTED_RATE = Gauge("loadgen_mz_source_updates_committed_per_second",
+                       "Updates committed by the source per second", ("object",))
+OFFSET_LAG = Gauge("loadgen_mz_source_offset_lag", "Upstream offsets known but not yet committed", ("object",))
+
+FIELDS = ["time", "object", "type", "freshness_lag", "wallclock_lag", "messages_per_sec",
+          "bytes_per_sec", "updates_committed_per_sec", "offset_lag"]
+
+_INTERVAL = re.compile(r"(?:(-?\d+) days?\s*)?(-)?(\d+):(\d+):(\d+(?:\.\d+)?)")
+
+def parse_interval(text):
+    """Seconds in an interval rendered as '[N day[s]] [-]HH:MM:SS[.ffffff]'"""
+    if text is None:
+        return None
+    match = _INTERVAL.search(text)
+    if not match:
+        return None
+    days, negative, hours, minutes, seconds = match.groups()
+    value = int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+    return (int(days or 0) * 86400) + (-value if negative else value)
+
+def _id_list(ids):
+    return ", ".join(quote_literal(object_id) for object_id in ids)
+
+class Catalog:
+    """name -> (id, type) of the monitored objects, cached for ttl seconds"""
+
+    def __init__(self, names, ttl=300.0):
+        self.names = list(names)
+        self.ttl = ttl
+        self.objects = {}
+        self.loaded_at = None
+        self.lookups = 0
+
+    def stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at >= self.ttl
+
+    def invalidate(self):
+        self.loaded_at = None
+
+    async def resolve(self, pool):
+        if self.stale():
+            rows = await pool.fetch(
+                "SELECT id, name, type FROM mz_catalog.mz_objects "
+                f"WHERE id LIKE 'u%' AND name IN ({_id_list(self.names)})")
+            self.objects = {name: (object_id, kind) for object_id, name, kind in rows}
+            self.loaded_at = time.monotonic()
+            self.lookups += 1
+        return self.objects
+
+class FreshnessMonitor:
+    """Turns introspection snapshots into one sample per object per poll"""
+
+    QUERIES = {
+        "frontiers": "SELECT object_id, read_frontier, write_frontier FROM mz_internal.mz_frontiers "
+                     "WHERE object_id IN ({ids})",
+        "wallclock": "SELECT object_id, lag FROM mz_internal.mz_wallclock_global_lag WHERE object_id IN ({ids})",
+        "statistics": "SELECT id, messages_received, bytes_received, updates_committed, offset_known, "
+                      "offset_committed FROM mz_internal.mz_source_statistics WHERE id IN ({ids})",
+    }
+
+    def __init__(self, pool, names, catalog_ttl=300.0):
+        self.pool = pool
+        self.catalog = Catalog(names, catalog_ttl)
+        self.disabled = set()
+        self.previous = {}  # source id -> (monotonic time, statistics row)
+
+    async def _query(self, name, ids):
+        """Rows of one introspection query keyed by object id; {} if the relation is unavailable"""
+        if name in self.disabled or not ids:
+            return {}
+        try:
+            rows = await self.pool.fetch(self.QUERIES[name].format(ids=_id_list(ids)))
+        except PgError as e:
+            self.disabled.add(name)
+            print(f"⚠️  Skipping {name}: {e}")
+            return {}
+        return {row[0]: row[1:] for row in rows}
+
+    async def poll(self):
+        objects = await self.catalog.resolve(self.pool)
+        ids = [object_id for object_id, kind in objects.values() if kind != "connection"]
+        sources = [object_id for object_id, kind in objects.values() if kind == "source"]
+        frontiers = await self._query("frontiers", ids)
+        wallclock = await self._query("wallclock", ids)
+        statistics = await self._query("statistics", sources)
+        now = time.time()
+        polled_at = time.monotonic()
+
+        if "frontiers" not in self.disabled and any(object_id not in frontiers for object_id in ids):
+            # An object was dropped or recreated; look the names up again next time
+            self.catalog.invalidate()
+
+        samples = []
+        for name in self.catalog.names:
+            if name not in objects:
+                continue
+            object_id, kind = objects[name]
+            sample = dict.fromkeys(FIELDS)
+            sample.update(time=round(now, 3), object=name, type=kind)
+            if object_id in frontiers and frontiers[object_id][1] is not None:
+                sample["freshness_lag"] = round(now - int(frontiers[object_id][1]) / 1000, 3)
+            if object_id in wallclock:
+                sample["wallclock_lag"] = parse_interval(wallclock[object_id][0])
+            if object_id in statistics:
+                self._source_rates(sample, object_id, polled_at, statistics[object_id])
+            samples.append(sample)
+        return samples
+
+    def _source_rates(self, sample, object_id, polled_at, row):
+        counters = [int(value or 0) for value in row]
+        messages, size, committed, offset_known, offset_committed = counters
+        sample["offset_lag"] = offset_known - offset_committed
+        previous = self.previous.get(object_id)
+        self.previous[object_id] = (polled_at, counters)
+        if previous and polled_at > previous[0] and messages >= previous[1][0]:
+            elapsed = polled_at - previous[0]
+            sample["messages_per_sec"] = round((messages - previous[1][0]) / elapsed, 1)
+            sample["bytes_per_sec"] = round((size - previous[1][1]) / elapsed, 1)
+            sample["updates_committed_per_sec"] = round((committed - previous[1][2]) / elapsed, 1)
+
+def export_metrics(samples):
+    for sample in samples:
+        for gauge, field in ((FRESHNESS_LAG, "freshness_lag"), (WALLCLOCK_LAG, "wallclock_lag"),
+                             (MESSAGES_RATE, "messages_per_sec"), (BYTES_RATE, "bytes_per_sec"),
+                             (COMMITTED_RATE, "updates_committed_per_sec"), (OFFSET_LAG, "offset_lag")):
+            if sample[field] is not None:
+                gauge.labels(sample["object"]).set(sample[field])
+
+class SeriesWriter:
+    """Append samples to a JSON lines file, or CSV when the path ends in .csv"""
+
+    def __init__(self, path):
+        self.file = open(path, "a", newline="")
+        self.csv = None
+        if path.endswith(".csv"):
+            self.csv = csv.DictWriter(self.file, FIELDS)
+            if self.file.tell() == 0:
+                self.csv.writeheader()
+
+    def write(self, samples):
+        for sample in samples:
+            if self.csv:
+                self.csv.writerow(sample)
+            else:
+                self.file.write(json.dumps(sample) + "\n")
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+def format_sample(sample):
+    line = (f"  {sample['object']:<15} freshness {_seconds(sample['freshness_lag']):>8}  "
+            f"wallclock {_seconds(sample['wallclock_lag']):>8}")
+    if sample["type"] == "source":
+        if sample["messages_per_sec"] is not None:
+            line += (f"  {sample['messages_per_sec']:>9.0f} msg/s {sample['bytes_per_sec'] / 1024:>8.0f} KiB/s "
+                     f"{sample['updates_committed_per_sec']:>9.0f} committed/s")
+        if sample["offset_lag"] is not None:
+            line += f"  backlog {sample['offset_lag']}"
+    return line
+
+def summarize(history):
+    """Per object: polls, mean and max freshness lag"""
+    lines = []
+    for name, lags in history.items():
+        lags = [lag for lag in lags if lag is not None]
+        if lags:
+            lines.append(f"  {name:<15} {len(lags)} polls, freshness lag mean {sum(lags) / len(lags):.2f}s "
+                         f"max {max(lags):.2f}s")
+    return lines
+
+async def run(args):
+    pool = Pool(args.dsn, size=1)
+    monitor = FreshnessMonitor(pool, args.objects, args.catalog_ttl)
+    writer = SeriesWriter(args.output) if args.output else None
+    history = {name: [] for name in args.objects}
+    deadline = time.monotonic() + args.duration if args.duration else None
+    try:
+        while deadline is None or time.monotonic() < deadline:
+            started = time.monotonic()
+            try:
+                samples = await monitor.poll()
+            except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+                # The pool reopens its connection on the next poll
+                print(f"⚠️  Poll failed: {e}")
+                samples = []
+            if samples:
+                print(f"🕒 {datetime.now().strftime('%H:%M:%S')}")
+                for sample in samples:
+                    print(format_sample(sample))
+                    history[sample["object"]].append(sample["freshness_lag"])
+                export_metrics(samples)
+                if writer:
+                    writer.write(samples)
+            elif not monitor.catalog.objects:
+                print(f"⚠️  None of {', '.join(args.objects)} exist yet")
+            await asyncio.sleep(max(0.0, args.interval - (time.monotonic() - started)))
+    finally:
+        if writer:
+            writer.close()
+        await pool.close()
+        print(f"\n📊 {monitor.catalog.lookups} catalog lookups")
+        for line in summarize(history):
+            print(line)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Monitor freshness and ingestion of Materialize sources and views")
+    parser.add_argument("--dsn", default=default_dsn(),
+                        help="connection URL (default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+    parser.add_argument("--objects", nargs="+", default=DEFAULT_OBJECTS,
+                        help=f"sources and views to watch (default: {' '.join(DEFAULT_OBJECTS)})")
+    parser.add_argument("--interval", type=float, default=5.0, help="seconds between polls (default: 5)")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="stop after this many seconds (default: run until interrupted)")
+    parser.add_argument("--catalog-ttl", type=float, default=300.0,
+                        help="seconds before object ids are looked up again (default: 300)")
+    parser.add_argument("--output", metavar="PATH", help="append samples to PATH (JSON lines, or CSV for .csv)")
+    parser.add_argument("--metrics-port", type=int, default=DEFAULT_PORT,
+                        help="serve Prometheus metrics on this port (default: LOADGEN_METRICS_PORT, off if unset)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.metrics_port:
+        serve_metrics(args.metrics_port)
+        print(f"Metrics: http://localhost:{args.metrics_port}/metrics")
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    except PgError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""Key distributions for the customer upsert workload
+
+A distribution picks which customer an update goes to, by index into the
+generator's key range (index 0 is the first key, CUST0000001):
+
+  uniform   every key equally likely (the default)
+  zipf:S    the key at rank r (r = index + 1) with probability proportional to 1 / r**S
+  hot:F:P   the first fraction F of the keys receives fraction P of the updates
+
+Zipf sampling is a binary search over a cumulative weight table built once;
+uniform and hot-set sampling are a scaled random draw. Indexes are drawn in
+chunks, so a draw costs about a microsecond even over millions of keys.
+
+Hot keys are what stress both the UPSERT state and partition balance, so the
+report estimates each partition's share of the updates from a sample, hashing
+keys as the fake hub does. Event Hubs hashes keys differently, but the spread
+of a skewed key set is the same in kind:
+
+    cd scripts && python3 -m loadgen.keys zipf:1.1 --customers 1000000 --partitions 32
+"""
+
+import argparse
+import random
+from array import array
+from collections import Counter
+from itertools import accumulate
+
+from loadgen.producers import partition_index
+
+# Indexes drawn per random.choices call
+CHUNK = 4096
+
+class UniformKeys:
+    """Every key equally likely"""
+
+    def __init__(self, num_keys):
+        self.num_keys = num_keys
+        self.keys = range(num_keys)
+
+    def __str__(self):
+        return "uniform"
+
+    def sample(self, rng, k):
+        return rng.choices(self.keys, k=k)
+
+    def top_share(self, count):
+        """Share of updates going to the count hottest keys"""
+        return min(count, self.num_keys) / self.num_keys
+
+class ZipfKeys:
+    """Key at rank r drawn with probability proportional to 1 / r**exponent"""
+
+    def __init__(self, num_keys, exponent=1.0):
+        if exponent <= 0:
+            raise ValueError("zipf exponent must be positive")
+        self.num_keys = num_keys
+        self.exponent = exponent
+        self.keys = range(num_keys)
+        self.cum_weights = array("d", accumulate(rank ** -exponent for rank in range(1, num_keys + 1)))
+
+    def __str__(self):
+        return f"zipf:{self.exponent:g}"
+
+    def sample(self, rng, k):
+        return rng.choices(self.keys, cum_weights=self.cum_weights, k=k)
+
+    def top_share(self, count):
+        """Share of updates going to the count hottest keys"""
+        return self.cum_weights[min(count, self.num_keys) - 1] / self.cum_weights[-1]
+
+class HotSetKeys:
+    """The first hot_fraction of the keys receive hot_share of the updates, uniformly within each set"""
+
+    def __init__(self, num_keys, hot_fraction=0.01, hot_share=0.9):
+        if not 0 < hot_fraction <= 1 or not 0 <= hot_share <= 1:
+            raise ValueError("hot set fraction must be in (0, 1] and its share in [0, 1]")
+        self.num_keys = num_keys
+        self.hot_fraction = hot_fraction
+        self.hot_share = hot_share
+        self.hot_keys = min(num_keys, max(1, round(num_keys * hot_fraction)))
+        if self.hot_keys == num_keys:
+            self.hot_share = 1.0
+
+    def __str__(self):
+        return f"hot:{self.hot_fraction:g}:{self.hot_share:g}"
+
+    def sample(self, rng, k):
+        draw = rng.random
+        share = self.hot_share
+        hot = self.hot_keys
+        # One draw per key: below share it scales into the hot set, above into the rest
+        hot_scale = hot / share if share else 0.0
+        cold_scale = (self.num_keys - hot) / (1 - share) if share < 1 else 0.0
+        indexes = []
+        for _ in range(k):
+            r = draw()
+            indexes.append(int(r * hot_scale) if r < share else hot + int((r - share) * cold_scale))
+        return indexes
+
+    def top_share(self, count):
+        """Share of updates going to the count hottest keys"""
+        count = min(count, self.num_keys)
+        if count <= self.hot_keys:
+            return self.hot_share * count / self.hot_keys
+        return self.hot_share + (1 - self.hot_share) * (count - self.hot_keys) / (self.num_keys - self.hot_keys)
+
+DISTRIBUTIONS = {"uniform": UniformKeys, "zipf": ZipfKeys, "hot": HotSetKeys}
+
+def key_distribution(spec, num_keys):
+    """Build a distribution over num_keys keys from a spec such as "zipf:1.1" or "hot:0.01:0.9" """
+    name, *params = (spec or "uniform").split(":")
+    if name not in DISTRIBUTIONS:
+        raise ValueError(f"unknown key distribution {name!r} (expected one of {', '.join(DISTRIBUTIONS)})")
+    try:
+        values = [float(p) for p in params]
+    except ValueError:
+        raise ValueError(f"invalid key distribution parameters in {spec!r}")
+    try:
+        return DISTRIBUTIONS[name](num_keys, *values)
+    except TypeError:
+        raise ValueError(f"too many parameters for key distribution {name!r}")
+
+def distribution_spec(spec):
+    """argparse type that validates a key distribution spec"""
+    try:
+        key_distribution(spec, 1)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return spec
+
+def key_indexes(distribution, rng=None):
+    """Endless stream of key indexes drawn from distribution, CHUNK at a time"""
+    rng = rng or random
+    while True:
+        yield from distribution.sample(rng, CHUNK)
+
+def partition_load(distribution, key_of, partitions, samples=200_000, rng=None):
+    """Estimated share of updates per partition, from samples drawn keys"""
+    drawn = Counter(distribution.sample(rng or random.Random(0), samples))
+    counts = [0] * partitions
+    for index, count in drawn.items():
+        counts[partition_index(key_of(index), partitions)] += count
+    return [count / samples for count in counts]
+
+def load_report(distribution, key_of, partitions, samples=200_000):
+    """Lines describing the skew of distribution and the partition load it implies"""
+    num_keys = distribution.num_keys
+    top = max(1, num_keys // 100)
+    lines = [f"🔑 Key distribution: {distribution} over {num_keys:,} keys; hottest key {key_of(0)} takes "
+             f"{distribution.top_share(1):.2%} of updates, the hottest 1% of keys {distribution.top_share(top):.1%}"]
+    shares = partition_load(distribution, key_of, partitions, samples)
+    imbalance = max(shares) * partitions
+    busiest = shares.index(max(shares))
+    lines.append(f"📊 Estimated partition load ({partitions} partitions): "
+                 + " ".join(f"p{p} {share:.1%}" for p, share in enumerate(shares)))
+    lines.append(f"{'⚠️ ' if imbalance >= 1.25 else '✅'} Busiest partition p{busiest} gets "
+                 f"{imbalance:.2f}x its fair share")
+    return lines
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Estimate the partition load of a customer key distribution")
+    parser.add_argument("distribution", type=distribution_spec, nargs="?", default="uniform",
+                        help="uniform, zipf:S or hot:F:P (default: uniform)")
+    parser.add_argument("--customers", type=int, default=1_000_000, help="customer keys (default: 1000000)")
+    parser.add_argument("--partitions", type=int, default=4, help="partitions of the customers hub (default: 4)")
+    parser.add_argument("--samples", type=int, default=200_000, help="updates sampled for the estimate")
+    args = parser.parse_args(argv)
+
+    width = max(7, len(str(args.customers)))
+
+    def key_of(index):
+        return f"CUST{index + 1:0{width}d}"
+
+    distribution = key_distribution(args.distribution, args.customers)
+    for line in load_report(distribution, key_of, args.partitions, args.samples):
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""End-to-end ingestion latency probe
+
+Publishes probe records to the orders or customers Event Hub and watches the
+corresponding Materialize view until each one shows up, reporting the lag
+between the send and the moment the row became visible.
+
+Each probe payload carries its sequence number and send timestamp
+(probe_seq, probe_sent_at) next to the regular fields. The view side has to
+identify probes by columns it projects: probe orders use order_ids
+probe_<run>_<seq>, probe customers use keys PROBE<run>-<seq> whose updated_at
+is the send time. Every probe has a key of its own, so a lagging view cannot
+overwrite one probe with the next before it is seen. Visibility is observed
+through COPY (SUBSCRIBE ...) TO STDOUT, or by polling with --watch poll for
+Postgres-wire stand-ins that don't support SUBSCRIBE.
+
+Probe customers are deleted with tombstones at the end of the run, so they
+don't stay in the customers view. The eventhubs backend cannot send
+tombstones; its PROBE rows stay until the view is recreated.
+
+    cd scripts && python3 -m loadgen.latency orders --count 200 --rate 10
+"""
+
+import argparse
+import asyncio
+import math
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+
+from loadgen.orders import generate_order
+from loadgen.pgwire import Connection, default_dsn, quote_literal
+from loadgen.producers import get_backend
+from loadgen.schema import CUSTOMER_FIELDS, ORDER_FIELDS
+from loadgen.serialization import make_encoder, require_unpacked
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = math.ceil(fraction * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+class OrderProbe:
+    """Probe orders, identified in the orders view by order_id"""
+
+    topic = "orders"
+    fields = ORDER_FIELDS
+
+    def __init__(self, run_id):
+        self.prefix = f"probe_{run_id}_"
+
+    def record(self, seq, sent_at):
+        order = generate_order()
+        order["order_id"] = f"{self.prefix}{seq}"
+        order["probe_seq"] = seq
+        order["probe_sent_at"] = sent_at
+        return None, order, order["order_id"]
+
+    def watch_query(self):
+        return f"SELECT order_id FROM orders WHERE order_id LIKE {quote_literal(self.prefix + '%')}"
+
+    def marker(self, row):
+        return row[0]
+
+class CustomerProbe:
+    """Probe customer upserts, identified in the customers view by (customer_id, updated_at)"""
+
+    topic = "customers"
+    fields = CUSTOMER_FIELDS
+
+    def __init__(self, run_id):
+        self.prefix = f"PROBE{run_id}-"
+
+    def key(self, seq):
+        return f"{self.prefix}{seq}"
+
+    def record(self, seq, sent_at):
+        customer_id = self.key(seq)
+        updated_at = datetime.fromtimestamp(sent_at, timezone.utc).isoformat(timespec="microseconds")
+        updated_at = updated_at.replace("+00:00", "Z")
+        customer = {
+            "customer_id": customer_id,
+            "first_name": "Probe",
+            "last_name": str(seq),
+            "email": "probe@example.com",
+            "phone": "555-0000",
+            "address": "0 Probe Rd",
+            "city": "Nowhere",
+            "state": "NA",
+            "zip_code": "00000",
+            "tier": "bronze",
+            "status": "pending",
+            "total_orders": 0,
+            "lifetime_value": 0.0,
+            "last_order_date": None,
+            "created_at": updated_at,
+            "updated_at": updated_at,
+            "probe_seq": seq,
+            "probe_sent_at": sent_at,
+        }
+        return customer_id, customer, f"{customer_id}|{updated_at}"
+
+    def watch_query(self):
+        return (f"SELECT customer_id, updated_at FROM customers "
+                f"WHERE customer_id LIKE {quote_literal(self.prefix + '%')}")
+
+    def marker(self, row):
+        return f"{row[0]}|{row[1]}"
+
+    async def delete(self, producer, tombstone, count, chunk=100):
+        """Send a tombstone for every probe key, chunk sends at a time"""
+        async def send(seq):
+            batch = await producer.create_batch(partition_key=self.key(seq))
+            batch.add(tombstone())
+            await producer.send_batch(batch)
+
+        for start in range(0, count, chunk):
+            await asyncio.gather(*(send(seq) for seq in range(start, min(start + chunk, count))))
+
+PROBES = {"orders": OrderProbe, "customers": CustomerProbe}
+
+class LatencyTracker:
+    """Matches visible markers to send times"""
+
+    def __init__(self):
+        self.sent = {}  # marker -> send time, until seen
+        self.latencies = []
+        self.all_seen = asyncio.Event()
+        self.sending_done = False
+
+    def record_sent(self, marker, sent_at):
+        self.sent[marker] = sent_at
+        self.all_seen.clear()
+
+    def record_seen(self, marker, seen_at):
+        sent_at = self.sent.pop(marker, None)
+        if sent_at is not None:
+            self.latencies.append(seen_at - sent_at)
+        if self.sending_done and not self.sent:
+            self.all_seen.set()
+
+    def finish_sending(self):
+        self.sending_done = True
+        if not self.sent:
+            self.all_seen.set()
+
+async def watch_subscribe(dsn, probe, tracker):
+    """Stream view changes through SUBSCRIBE and mark probes as they appear"""
+    conn = await Connection.connect(dsn)
+    try:
+        sql = f"COPY (SUBSCRIBE ({probe.watch_query()}) WITH (SNAPSHOT = false)) TO STDOUT"
+        async for row in conn.copy_out(sql):
+            # Rows are (mz_timestamp, mz_diff, *columns); only insertions matter
+            if row[1] is not None and int(row[1]) > 0:
+                tracker.record_seen(probe.marker(row[2:]), time.time())
+    finally:
+        await conn.close()
+
+async def watch_poll(dsn, probe, tracker, interval):
+    """Poll the view and mark probes the first time they are returned"""
+    conn = await Connection.connect(dsn)
+    try:
+        while True:
+            rows = await conn.fetch(probe.watch_query())
+            now = time.time()
+            for row in rows:
+                tracker.record_seen(probe.marker(row), now)
+            await asyncio.sleep(interval)
+    finally:
+        await conn.close()
+
+async def send_probes(producer, event_type, probe, tracker, count, rate):
+    encoder = make_encoder(probe.fields)
+    start = time.monotonic()
+    for seq in range(count):
+        delay = start + seq / rate - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        sent_at = time.time()
+        key, record, marker = probe.record(seq, sent_at)
+        tracker.record_sent(marker, sent_at)
+        batch = await producer.create_batch(partition_key=key)
+        batch.add(event_type(encoder.encode(record)))
+        await producer.send_batch(batch)
+    tracker.finish_sending()
+
+async def run_probe(args, producer=None, event_type=None, tombstone=None):
+    run_id = uuid.uuid4().hex[:8]
+    probe = PROBES[args.topic](run_id)
+    tracker = LatencyTracker()
+
+    if args.watch == "subscribe":
+        watcher = asyncio.create_task(watch_subscribe(args.dsn, probe, tracker))
+    else:
+        watcher = asyncio.create_task(watch_poll(args.dsn, probe, tracker, args.poll_interval))
+    # Give the subscription time to start before the first probe is sent
+    await asyncio.sleep(args.settle)
+    if watcher.done():
+        watcher.result()
+
+    if producer is None:
+        backend = get_backend(args.backend)
+        producer, event_type = backend.create_producer(args.topic), backend.EventData
+        tombstone = backend.tombstone
+
+    print(f"⏱️  Sending {args.count} probes to {args.topic} at {args.rate}/s (run {run_id})")
+    async with producer:
+        await send_probes(producer, event_type, probe, tracker, args.count, args.rate)
+
+        try:
+            await asyncio.wait_for(tracker.all_seen.wait(), args.timeout)
+        except asyncio.TimeoutError:
+            pass
+        watcher.cancel()
+        try:
+            await watcher
+        except asyncio.CancelledError:
+            pass
+
+        if hasattr(probe, "delete"):
+            if tombstone is None:
+                print(f"⚠️  This backend cannot send tombstones; rows {probe.prefix}* stay in {args.topic}")
+            else:
+                await probe.delete(producer, tombstone, args.count)
+                print(f"🧹 Sent tombstones for the {args.count} probe keys")
+
+    return report(args.count, tracker)
+
+def report(count, tracker):
+    latencies = sorted(tracker.latencies)
+    summary = {
+        "sent": count,
+        "seen": len(latencies),
+        "missing": len(tracker.sent),
+        "p50": percentile(latencies, 0.50),
+        "p90": percentile(latencies, 0.90),
+        "p99": percentile(latencies, 0.99),
+        "max": latencies[-1] if latencies else None,
+    }
+    print(f"\n📊 Seen {summary['seen']}/{count} probes ({summary['missing']} missing)")
+    if latencies:
+        print(f"   p50 {summary['p50'] * 1000:.0f} ms   p90 {summary['p90'] * 1000:.0f} ms   "
+              f"p99 {summary['p99'] * 1000:.0f} ms   max {summary['max'] * 1000:.0f} ms")
+    return summary
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure publish-to-view latency in Materialize")
+    parser.add_argument("topic", choices=sorted(PROBES))
+    parser.add_argument("--count", type=int, default=100, help="probes to send (default: 100)")
+    parser.add_argument("--rate", type=float, default=5.0, help="probes per second (default: 5)")
+    parser.add_argument("--dsn", default=default_dsn(),
+                        help="pgwire URL (default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+    parser.add_argument("--backend", default=None,
+                        help="producer backend: eventhubs, kafka or fake (default: LOADGEN_PRODUCER_BACKEND or eventhubs)")
+    parser.add_argument("--watch", choices=["subscribe", "poll"], default="subscribe")
+    parser.add_argument("--poll-interval", type=float, default=0.2)
+    parser.add_argument("--settle", type=float, default=2.0,
+                        help="seconds to let the watcher start before sending (default: 2)")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds to wait for outstanding probes after the last send (default: 60)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    try:
+        require_unpacked("latency")
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    summary = asyncio.run(run_probe(parse_args(argv)))
+    sys.exit(0 if summary["missing"] == 0 else 1)
+
+if __name__ == "__main__":
+    main()
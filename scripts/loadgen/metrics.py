@@ -0,0 +1,225 @@
+"""Prometheus metrics for the publishers, without extra dependencies
+
+Counters, gauges and histograms are plain attribute updates on the hot path;
+rendering to the text exposition format happens only when /metrics is scraped,
+from a daemon HTTP server thread. PublisherMetrics bundles the series every
+publisher reports, labelled by topic (and worker for the multi-process driver).
+
+Scripts start the endpoint with --metrics-port or LOADGEN_METRICS_PORT:
+
+    curl -s localhost:9464/metrics | grep loadgen_
+"""
+
+import os
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_PORT = int(os.getenv("LOADGEN_METRICS_PORT", "0")) or None
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Value:
+    """One counter or gauge series"""
+
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def set(self, value):
+        self.value = value
+
+class _HistogramValue:
+    """One histogram series; counts are per bucket and made cumulative when rendered"""
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class _Metric:
+    """A metric family: name, help text and one child per label value tuple"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+        self.lock = threading.Lock()
+        (registry or REGISTRY).register(self)
+
+    def labels(self, *values):
+        values = tuple(str(v) for v in values)
+        child = self.children.get(values)
+        if child is None:
+            with self.lock:
+                child = self.children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        return _Value()
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class Counter(_Metric):
+    kind = "counter"
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=(), registry=None):
+        self.bounds = sorted(buckets)
+        super().__init__(name, documentation, labelnames, registry)
+
+    def _new_child(self):
+        return _HistogramValue(self.bounds)
+
+    def _render_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + [float("inf")], child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, [("le", _format_value(float(bound)))])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        # From the buckets, so a scrape racing observe() stays self-consistent
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+class Registry:
+    """Metric families plus hooks run before each scrape to refresh derived values"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.collect_hooks = []
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Duplicate metric: {metric.name}")
+        self.metrics[metric.name] = metric
+
+    def render(self):
+        for hook in list(self.collect_hooks):
+            hook()
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(port, addr="0.0.0.0", registry=None):
+    """Serve /metrics from a daemon thread; returns the server"""
+    handler = type("Handler", (_Handler,), {"registry": registry or REGISTRY})
+    server = ThreadingHTTPServer((addr, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
+
+LABELS = ("topic", "worker")
+
+EVENTS_GENERATED = Counter("loadgen_events_generated_total", "Events generated and queued for sending", LABELS)
+EVENTS_SENT = Counter("loadgen_events_sent_total", "Events acknowledged by the hub", LABELS)
+BATCHES_SENT = Counter("loadgen_batches_sent_total", "Batches acknowledged by the hub", LABELS)
+BYTES_SENT = Counter("loadgen_serialized_bytes_total", "Serialized bytes acknowledged by the hub", LABELS)
+BATCH_FILL = Histogram("loadgen_batch_fill_ratio", "Batch size relative to the batch size limit", LABELS,
+                       buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 0.75, 0.9, 0.99, 1.0))
+SEND_LATENCY = Histogram("loadgen_send_latency_seconds", "Time for a batch send to complete, including retries",
+                         LABELS, buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+RETRIES = Counter("loadgen_send_retries_total", "Batch sends retried after a throttled or transient error", LABELS)
+THROTTLES = Counter("loadgen_throttles_total", "Server-busy or quota errors returned by the hub", LABELS)
+FAILURES = Counter("loadgen_send_failures_total", "Batches given up on after their retries", LABELS)
+RATE_LIMIT = Gauge("loadgen_rate_limit_events_per_second",
+                   "Current rate allowed by the rate controller (absent while unlimited)", LABELS)
+
+class PublisherMetrics:
+    """The series of one publisher, bound to its label values"""
+
+    def __init__(self, topic, worker=0):
+        labels = (topic, worker)
+        self.events_generated = EVENTS_GENERATED.labels(*labels)
+        self.events_sent = EVENTS_SENT.labels(*labels)
+        self.batches_sent = BATCHES_SENT.labels(*labels)
+        self.bytes_sent = BYTES_SENT.labels(*labels)
+        self.batch_fill = BATCH_FILL.labels(*labels)
+        self.send_latency = SEND_LATENCY.labels(*labels)
+        self.labels = labels
+
+    def record_batch(self, events, size, fill_ratio, latency=None):
+        self.events_sent.value += events
+        self.batches_sent.value += 1
+        self.bytes_sent.value += size
+        self.batch_fill.observe(fill_ratio)
+        if latency is not None:
+            self.send_latency.observe(latency)
+
+    def track_controller(self, controller, registry=None):
+        """Export a RateController's retries, throttles, failures and current rate at scrape time"""
+        retries = RETRIES.labels(*self.labels)
+        throttles = THROTTLES.labels(*self.labels)
+        failures = FAILURES.labels(*self.labels)
+
+        def collect():
+            retries.value = controller.retries
+            throttles.value = controller.throttles
+            failures.value = controller.failures
+            if controller.rate is not None:
+                RATE_LIMIT.labels(*self.labels).value = controller.rate
+
+        (registry or REGISTRY).collect_hooks.append(collect)
@@ -0,0 +1,312 @@
+"""Order record generators for the orders Event Hub"""
+
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from json.encoder import encode_basestring_ascii
+
+from loadgen.serialization import DEFAULT_FORMAT
+
+# Sample data
+CUSTOMERS = ["Alice Johnson", "Bob Smith", "Charlie Brown", "Diana Prince", "Eve Adams", "Frank Miller"]
+PRODUCTS = [
+    {"id": "prod_1", "name": "Wireless Headphones", "price": 99.99},
+    {"id": "prod_2", "name": "Smartphone Case", "price": 19.99},
+    {"id": "prod_3", "name": "USB Cable", "price": 9.99},
+    {"id": "prod_4", "name": "Bluetooth Speaker", "price": 49.99},
+    {"id": "prod_5", "name": "Power Bank", "price": 29.99},
+    {"id": "prod_6", "name": "Screen Protector", "price": 12.99}
+]
+STATUSES = ["pending", "confirmed", "shipped", "delivered"]
+REGIONS = ["US-East", "US-West", "EU-Central", "AP-Southeast"]
+
+EPOCH = datetime(1970, 1, 1)
+MILLISECOND = timedelta(milliseconds=1)
+
+# order_id prefix of generate_historical() orders, which sets them apart from live ones
+HISTORICAL_PREFIX = "backfill_"
+
+def generate_order():
+    """Generate a random order"""
+    order_id = f"order_{int(time.time() * 1000)}{random.randint(100, 999)}"
+    customer = random.choice(CUSTOMERS)
+    product = random.choice(PRODUCTS)
+    quantity = random.randint(1, 5)
+    total = round(product["price"] * quantity, 2)
+    
+    # Random timestamp within last 24 hours
+    base_time = datetime.utcnow()
+    random_offset = timedelta(minutes=random.randint(-1440, 0))  # -24 hours to now
+    created_at = (base_time + random_offset).isoformat() + "Z"
+    
+    return {
+        "order_id": order_id,
+        "customer_name": customer,
+        "product_id": product["id"],
+        "product_name": product["name"],
+        "unit_price": product["price"],
+        "quantity": quantity,
+        "total_amount": total,
+        "status": random.choice(STATUSES),
+        "created_at": created_at,
+        "region": random.choice(REGIONS)
+    }
+
+class BulkOrderGenerator:
+    """Generate orders in bulk as ready-to-send JSON or protobuf payloads
+
+    Produces the same JSON text as json.dumps(generate_order()), or with
+    payload_format="protobuf" the bytes of loadgen.protobuf's Order message.
+    Every field except order_id is drawn with one random.choices() call per
+    batch and spliced in from pre-encoded fragments; the created_at strings for
+    the last 24 hours are rebuilt once per wall-clock second.
+
+    Generators with distinct shard numbers (0 <= shard < num_shards) never
+    produce the same order_id, so each worker process can own one shard.
+
+    generate(n, customers) links each order to a given customer instead, with
+    that customer's name and a trailing customer_id (LINKED_ORDER_FIELDS).
+    """
+
+    # order_id keeps generate_order()'s shape: epoch millis + 3 digits
+    IDS_PER_MILLISECOND = 1000
+
+    def __init__(self, seed=None, shard=0, num_shards=1, payload_format=None):
+        self.random = random.Random(seed)
+        self.shard = shard
+        self.num_shards = num_shards
+        self.ids_per_shard = self.IDS_PER_MILLISECOND // num_shards
+        self.millis = 0
+        self.slot = 0
+        self.timestamp_base = None
+        self.timestamps = []
+        self.protobuf = (payload_format or DEFAULT_FORMAT) == "protobuf"
+        if self.protobuf:
+            self._init_protobuf_fragments()
+            return
+
+        # Each fragment is the JSON text for its fields, including the trailing separator
+        self.customer_fragments = [f'"customer_name": {json.dumps(c)}, ' for c in CUSTOMERS]
+        self.product_fragments = [
+            f'"product_id": {json.dumps(p["id"])}, "product_name": {json.dumps(p["name"])}, '
+            f'"unit_price": {json.dumps(p["price"])}, "quantity": {quantity}, '
+            f'"total_amount": {json.dumps(round(p["price"] * quantity, 2))}, '
+            for p in PRODUCTS for quantity in range(1, 6)
+        ]
+        self.status_fragments = [f'"status": {json.dumps(s)}, ' for s in STATUSES]
+        self.region_fragments = [f'"region": {json.dumps(r)}}}' for r in REGIONS]
+
+    def _init_protobuf_fragments(self):
+        from loadgen.protobuf import ProtobufEncoder
+        from loadgen.schema import LINKED_ORDER_FIELDS
+
+        self.encoder = ProtobufEncoder(LINKED_ORDER_FIELDS)
+        encode = self.encoder.encode
+        self.customer_fragments = [encode({"customer_name": c}) for c in CUSTOMERS]
+        self.product_fragments = [
+            encode({"product_id": p["id"], "product_name": p["name"], "unit_price": p["price"],
+                    "quantity": quantity, "total_amount": round(p["price"] * quantity, 2)})
+            for p in PRODUCTS for quantity in range(1, 6)
+        ]
+        self.status_fragments = [encode({"status": s}) for s in STATUSES]
+        self.region_fragments = [encode({"region": r}) for r in REGIONS]
+
+    def _created_at_fragments(self):
+        """created_at fragments for every minute offset in the last 24 hours"""
+        base_time = datetime.utcnow()
+        base_second = base_time.replace(microsecond=0)
+        if base_second != self.timestamp_base:
+            self.timestamp_base = base_second
+            if self.protobuf:
+                self.timestamps = [
+                    self.encoder.encode({"created_at": f"{(base_time + timedelta(minutes=offset)).isoformat()}Z"})
+                    for offset in range(-1440, 1)
+                ]
+            else:
+                self.timestamps = [
+                    f'"created_at": "{(base_time + timedelta(minutes=offset)).isoformat()}Z", '
+                    for offset in range(-1440, 1)
+                ]
+        return self.timestamps
+
+    def _linked_fragments(self, customers):
+        """Customer and region fragments for orders by (customer_id, customer_name) pairs"""
+        regions = self.random.choices(self.region_fragments, k=len(customers))
+        if self.protobuf:
+            encode = self.encoder.encode
+            return [encode({"customer_name": name, "customer_id": customer_id})
+                    for customer_id, name in customers], regions
+        # The region fragment closes the object; customer_id goes before the brace
+        return ([f'"customer_name": {encode_basestring_ascii(name)}, ' for _, name in customers],
+                [f'{region[:-1]}, "customer_id": {encode_basestring_ascii(customer_id)}}}'
+                 for region, (customer_id, _) in zip(regions, customers)])
+
+    def generate(self, n, customers=None):
+        """Return a list of n order payloads (str for JSON, bytes for protobuf)
+
+        customers, when given, holds one (customer_id, customer_name) pair per order.
+        """
+        payloads = []
+        choices = self.random.choices
+        while len(payloads) < n:
+            # Each millisecond has ids_per_shard order_id slots for this shard; once
+            # they are used up, move on to the next millisecond even if the clock hasn't
+            now = int(time.time() * 1000)
+            if now > self.millis:
+                self.millis = now
+                self.slot = 0
+            elif self.slot >= self.ids_per_shard:
+                self.millis += 1
+                self.slot = 0
+            size = min(n - len(payloads), self.ids_per_shard - self.slot)
+            millis = self.millis
+            first = self.slot
+            self.slot += size
+
+            if customers is None:
+                customer_column = choices(self.customer_fragments, k=size)
+                region_column = choices(self.region_fragments, k=size)
+            else:
+                done = len(payloads)
+                customer_column, region_column = self._linked_fragments(customers[done:done + size])
+            rows = zip(
+                range(size),
+                customer_column,
+                choices(self.product_fragments, k=size),
+                choices(self.status_fragments, k=size),
+                choices(self._created_at_fragments(), k=size),
+                region_column,
+            )
+            if self.protobuf:
+                # Every order_id in this millisecond has the same length, so the
+                # encoded field minus its last three digits is a shared prefix
+                prefix = self.encoder.encode({"order_id": f"order_{millis}000"})[:-3]
+                payloads.extend(
+                    b"".join((prefix, b"%03d" % ((first + i) * self.num_shards + self.shard),
+                              customer, product, status, created_at, region))
+                    for i, customer, product, status, created_at, region in rows
+                )
+                continue
+
+            payloads.extend(
+                f'{{"order_id": "order_{millis}{(first + i) * self.num_shards + self.shard:03d}", '
+                f'{customer}{product}{status}{created_at}{region}'
+                for i, customer, product, status, created_at, region in rows
+            )
+        return payloads
+
+    def generate_historical(self, first, created_at):
+        """Order payloads created at the given UTC datetimes, numbered first, first + 1, ...
+
+        The order_id is HISTORICAL_PREFIX, the creation millisecond and the last
+        three digits of the order's number, so backfilled orders can be told
+        from live ones and a range of them regenerated identically after
+        reseeding self.random.
+        """
+        size = len(created_at)
+        choices = self.random.choices
+        rows = zip(
+            range(first, first + size),
+            created_at,
+            choices(self.customer_fragments, k=size),
+            choices(self.product_fragments, k=size),
+            choices(self.status_fragments, k=size),
+            choices(self.region_fragments, k=size),
+        )
+        if self.protobuf:
+            encode = self.encoder.encode
+            return [
+                b"".join((encode({"order_id": f"{HISTORICAL_PREFIX}{(at - EPOCH) // MILLISECOND}{n % 1000:03d}"}),
+                          customer, product, status, encode({"created_at": f"{at.isoformat()}Z"}), region))
+                for n, at, customer, product, status, region in rows
+            ]
+        return [
+            f'{{"order_id": "{HISTORICAL_PREFIX}{(at - EPOCH) // MILLISECOND}{n % 1000:03d}", '
+            f'{customer}{product}{status}"created_at": "{at.isoformat()}Z", {region}'
+            for n, at, customer, product, status, region in rows
+        ]
+
+    def payloads(self, chunk=1000):
+        """Endless iterator over generated payloads, produced chunk at a time"""
+        while True:
+            yield from self.generate(chunk)
+
+# Fixed orders sent by the sample command (send-sample-data.py)
+SAMPLE_ORDERS = [
+    {
+        "order_id": "order_001",
+        "customer_name": "Alice Johnson",
+        "product_id": "prod_1",
+        "product_name": "Wireless Headphones",
+        "unit_price": 99.99,
+        "quantity": 2,
+        "total_amount": 199.98,
+        "status": "confirmed",
+        "created_at": "2025-08-08T15:25:00Z",
+        "region": "US-East"
+    },
+    {
+        "order_id": "order_002",
+        "customer_name": "Bob Smith",
+        "product_id": "prod_2",
+        "product_name": "Smartphone Case",
+        "unit_price": 19.99,
+        "quantity": 1,
+        "total_amount": 19.99,
+        "status": "shipped",
+        "created_at": "2025-08-08T15:26:00Z",
+        "region": "US-West"
+    },
+    {
+        "order_id": "order_003",
+        "customer_name": "Charlie Brown",
+        "product_id": "prod_3",
+        "product_name": "USB Cable",
+        "unit_price": 9.99,
+        "quantity": 3,
+        "total_amount": 29.97,
+        "status": "delivered",
+        "created_at": "2025-08-08T15:27:00Z",
+        "region": "EU-Central"
+    },
+    {
+        "order_id": "order_004",
+        "customer_name": "Diana Prince",
+        "product_id": "prod_4",
+        "product_name": "Bluetooth Speaker",
+        "unit_price": 49.99,
+        "quantity": 1,
+        "total_amount": 49.99,
+        "status": "pending",
+        "created_at": "2025-08-08T15:28:00Z",
+        "region": "AP-Southeast"
+    },
+    {
+        "order_id": "order_005",
+        "customer_name": "Eve Adams",
+        "product_id": "prod_5",
+        "product_name": "Power Bank",
+        "unit_price": 29.99,
+        "quantity": 2,
+        "total_amount": 59.98,
+        "status": "confirmed",
+        "created_at": "2025-08-08T15:29:00Z",
+        "region": "US-East"
+    }
+]
+
+# Sent by the smoke command (test-publish.py) to check connectivity
+TEST_ORDER = {
+    "order_id": "test_order_001",
+    "customer_name": "Test Customer",
+    "product_id": "prod_test",
+    "product_name": "Test Product",
+    "unit_price": 19.99,
+    "quantity": 1,
+    "total_amount": 19.99,
+    "status": "confirmed",
+    "created_at": "2025-08-08T15:30:00Z",
+    "region": "US-East"
+}
@@ -0,0 +1,244 @@
+"""Local pgwire stand-in that answers queries with canned rows
+
+Enough of the server side of the PostgreSQL wire protocol for loadgen.pgwire:
+TLS is declined, any user is accepted without a password, and each simple
+query is passed to a handler that returns a pgwire.Result (all values as
+text) or raises StubError. Handlers are usually built with canned(), from
+(regex, columns, rows) entries where rows may be a callable evaluated per
+query.
+
+introspection_handler() imitates the Materialize catalog and mz_internal
+relations that loadgen.freshness polls, for the orders/customers sources and
+views, with counters that advance in real time and a lag that drifts. Run it
+and point the tools at it:
+
+    cd scripts && python3 -m loadgen.pgstub --port 6877 &
+    cd scripts && python3 -m loadgen.freshness --dsn postgresql://materialize@localhost:6877/materialize
+
+--canned FILE serves a JSON list of {"match", "columns", "rows"} entries instead.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import re
+import struct
+import time
+
+from loadgen.pgwire import Result
+
+TEXT_OID = 25
+SSL_REQUEST = 80877103
+
+class StubError(Exception):
+    """Sent to the client as an ErrorResponse"""
+
+    def __init__(self, message, code="XX000"):
+        super().__init__(message)
+        self.code = code
+
+def _message(kind, payload=b""):
+    return kind + struct.pack("!i", len(payload) + 4) + payload
+
+def _row_description(columns):
+    return _message(b"T", struct.pack("!h", len(columns)) + b"".join(
+        name.encode() + b"\0" + struct.pack("!ihihih", 0, 0, TEXT_OID, -1, -1, 0) for name in columns))
+
+def _data_row(row):
+    parts = [struct.pack("!h", len(row))]
+    for value in row:
+        if value is None:
+            parts.append(struct.pack("!i", -1))
+        else:
+            data = str(value).encode()
+            parts.append(struct.pack("!i", len(data)) + data)
+    return _message(b"D", b"".join(parts))
+
+def _error(message, code):
+    return _message(b"E", b"SERROR\0C" + code.encode() + b"\0M" + message.encode() + b"\0\0")
+
+class PgStub:
+    """asyncio pgwire server; port 0 picks a free port, read back from .port after start()"""
+
+    def __init__(self, handler, host="127.0.0.1", port=0, latency=0.0):
+        self.handler = handler
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.queries = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    @property
+    def dsn(self):
+        return f"postgresql://materialize@{self.host}:{self.port}/materialize"
+
+    async def _serve(self, reader, writer):
+        try:
+            await self._startup(reader, writer)
+            while True:
+                header = await reader.readexactly(5)
+                (length,) = struct.unpack("!i", header[1:])
+                payload = await reader.readexactly(length - 4)
+                if header[:1] == b"X":
+                    break
+                if header[:1] == b"Q":
+                    await self._query(writer, payload.rstrip(b"\0").decode())
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _startup(self, reader, writer):
+        while True:
+            (length,) = struct.unpack("!i", await reader.readexactly(4))
+            body = await reader.readexactly(length - 4)
+            if struct.unpack("!i", body[:4])[0] != SSL_REQUEST:
+                break
+            writer.write(b"N")
+            await writer.drain()
+        writer.write(_message(b"R", struct.pack("!i", 0))
+                     + _message(b"S", b"server_version\0" + b"9.5.0 (loadgen stub)\0")
+                     + _message(b"Z", b"I"))
+        await writer.drain()
+
+    async def _query(self, writer, sql):
+        self.queries += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        out = []
+        try:
+            result = self.handler(sql) if sql.strip() else None
+            if result is None:
+                out.append(_message(b"I"))
+            else:
+                if result.columns is not None:
+                    out.append(_row_description(result.columns))
+                    out.extend(_data_row(row) for row in result.rows)
+                out.append(_message(b"C", result.tag.encode() + b"\0"))
+        except StubError as e:
+            out = [_error(str(e), e.code)]
+        out.append(_message(b"Z", b"I"))
+        writer.write(b"".join(out))
+        await writer.drain()
+
+def canned(responses):
+    """Handler answering from (pattern, columns, rows) entries; the first pattern that matches wins
+
+    rows may be a callable returning the rows. Statements without a match
+    complete with a tag made of their first word, or fail with an undefined
+    table error if they are queries.
+    """
+    compiled = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), columns, rows)
+                for pattern, columns, rows in responses]
+
+    def handler(sql):
+        for pattern, columns, rows in compiled:
+            if pattern.search(sql):
+                rows = rows() if callable(rows) else rows
+                return Result(columns, rows, f"SELECT {len(rows)}")
+        verb = sql.split(None, 1)[0].upper()
+        if verb in ("SELECT", "WITH", "SHOW", "TABLE"):
+            raise StubError(f"no canned rows for query: {' '.join(sql.split())[:80]}", "42P01")
+        return Result(None, [], verb)
+
+    return handler
+
+# name -> (id, type) of the relations the setup SQL creates
+OBJECTS = {
+    "orders_raw": ("u101", "source"),
+    "customers_raw": ("u102", "source"),
+    "orders": ("u103", "materialized-view"),
+    "customers": ("u104", "materialized-view"),
+    "eventhubs_multi_kafka": ("u100", "connection"),
+}
+
+def introspection_handler(rates=None, lag=1.0, start=None):
+    """Canned Materialize introspection for the objects in OBJECTS
+
+    Sources ingest rates[name] messages/s (default 1000 for orders_raw, 200 for
+    customers_raw) since start; every object trails the wall clock by about
+    lag seconds, drifting with a 60 s period.
+    """
+    rates = rates or {"orders_raw": 1000.0, "customers_raw": 200.0}
+    start = time.time() if start is None else start
+
+    def current_lag(object_id):
+        phase = int(object_id[1:]) % 7
+        return lag * (1 + 0.5 * math.sin((time.time() - start) * 2 * math.pi / 60 + phase))
+
+    def objects():
+        return [(object_id, name, kind) for name, (object_id, kind) in OBJECTS.items()]
+
+    def source_statistics():
+        rows = []
+        for name, rate in rates.items():
+            object_id = OBJECTS[name][0]
+            messages = int(rate * (time.time() - start))
+            committed = int(rate * max(0.0, time.time() - start - current_lag(object_id)))
+            rows.append((object_id, messages, messages * 300, committed, messages, committed))
+        return rows
+
+    def frontiers():
+        now_ms = time.time() * 1000
+        return [(object_id, int(now_ms - current_lag(object_id) * 1000 - 1000), int(now_ms - current_lag(object_id) * 1000))
+                for object_id, kind in OBJECTS.values() if kind != "connection"]
+
+    def wallclock_lag():
+        return [(object_id, f"00:00:{current_lag(object_id):09.6f}")
+                for object_id, kind in OBJECTS.values() if kind != "connection"]
+
+    return canned([
+        (r"\bmz_objects\b", ["id", "name", "type"], objects),
+        (r"\bmz_source_statistics\b",
+         ["id", "messages_received", "bytes_received", "updates_committed", "offset_known", "offset_committed"],
+         source_statistics),
+        (r"\bmz_frontiers\b", ["object_id", "read_frontier", "write_frontier"], frontiers),
+        (r"\bmz_wallclock_global_lag\b", ["object_id", "lag"], wallclock_lag),
+        (r"^\s*select\s+mz_now\(\)", ["mz_now"], lambda: [(int(time.time() * 1000),)]),
+    ])
+
+def load_canned(path):
+    """Handler for a JSON file of {"match", "columns", "rows"} entries"""
+    with open(path) as f:
+        entries = json.load(f)
+    return canned([(entry["match"], entry["columns"], entry["rows"]) for entry in entries])
+
+async def serve(args):
+    handler = load_canned(args.canned) if args.canned else introspection_handler(lag=args.lag)
+    stub = await PgStub(handler, args.host, args.port, args.latency).start()
+    print(f"🧪 pgwire stub listening on {stub.dsn}")
+    await asyncio.Event().wait()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve canned query results over the Postgres wire protocol")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6877, help="listen port (default: 6877)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every query")
+    parser.add_argument("--lag", type=float, default=1.0,
+                        help="average freshness lag of the canned introspection rows in seconds (default: 1)")
+    parser.add_argument("--canned", metavar="FILE",
+                        help='JSON list of {"match": regex, "columns": [...], "rows": [[...]]} to serve instead')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
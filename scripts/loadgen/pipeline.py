@@ -0,0 +1,274 @@
+"""Batching and send pipelines shared by the publishers"""
+
+import asyncio
+import time
+from collections import deque
+
+class PublishStats:
+    """Running totals for one publisher, mirrored to PublisherMetrics when given"""
+
+    def __init__(self, metrics=None):
+        self.start = time.monotonic()
+        self.metrics = metrics
+        self.generated = 0
+        self.events = 0
+        self.records = 0  # differs from events when events carry packed records
+        self.batches = 0
+        self.bytes = 0
+        self.fill_ratio_sum = 0.0
+
+    def record_generated(self, count):
+        self.generated += count
+        if self.metrics:
+            self.metrics.events_generated.value += count
+
+    def record_batch(self, batch, latency=None, records=None):
+        """Count a sent batch; latency is the send time in seconds, if measured
+
+        records is the number of records in the batch's events, when packed.
+        """
+        fill_ratio = batch.size_in_bytes / batch.max_size_in_bytes
+        self.events += len(batch)
+        self.records += len(batch) if records is None else records
+        self.batches += 1
+        self.bytes += batch.size_in_bytes
+        self.fill_ratio_sum += fill_ratio
+        if self.metrics:
+            self.metrics.record_batch(len(batch), batch.size_in_bytes, fill_ratio, latency)
+
+    def elapsed(self):
+        return time.monotonic() - self.start
+
+    def as_dict(self):
+        return {
+            "events": self.events,
+            "records": self.records,
+            "batches": self.batches,
+            "bytes": self.bytes,
+            "fill_ratio_sum": self.fill_ratio_sum,
+            "elapsed": self.elapsed(),
+        }
+
+    def summary(self, noun="events"):
+        elapsed = max(self.elapsed(), 1e-9)
+        fill = self.fill_ratio_sum / self.batches if self.batches else 0.0
+        if self.records != self.events:
+            noun = "records" if noun == "events" else noun
+            return (f"Sent {self.records} {noun} packed in {self.events} events, {self.batches} batches "
+                    f"({self.records / elapsed:.0f} {noun}/s, {self.bytes / max(self.records, 1):.0f} bytes each, "
+                    f"avg batch fill {fill:.0%})")
+        return (f"Sent {self.events} {noun} in {self.batches} batches "
+                f"({self.events / elapsed:.0f} events/s, {self.bytes / elapsed / 1024:.0f} KiB/s, "
+                f"avg batch fill {fill:.0%})")
+
+async def print_summaries(stats, interval, noun="events", controller=None):
+    """Print one summary line every interval seconds until cancelled"""
+    while True:
+        await asyncio.sleep(interval)
+        line = stats.summary(noun)
+        if controller:
+            line += f"; {controller.summary()}"
+        print(line)
+
+async def send_batch(producer, batch, controller=None, stats=None, records=None):
+    """Send one batch, through controller's retries and throttle feedback when given
+
+    The batch and its send latency are recorded in stats when given; records
+    counts the records in a batch of packed events.
+    """
+    started = time.perf_counter()
+    if controller is None:
+        await producer.send_batch(batch)
+    else:
+        await controller.send(producer, batch, records)
+    if stats is not None:
+        stats.record_batch(batch, time.perf_counter() - started, records)
+
+async def publish_filled_batches(producer, payloads, make_event, stats, controller=None,
+                                 duration=None, on_report=None, report_interval=5.0):
+    """Send payloads in batches filled to the size limit over one producer
+
+    payloads is an iterator of str/bytes bodies and make_event wraps one in an
+    event (EventData); a finite iterator ends the run once it is exhausted.
+    Bodies from Packer.pack() count as their number of records.
+    controller (a RateController) paces the run and retries throttled sends;
+    None sends as fast as the hub accepts batches. on_report(stats) is called every report_interval seconds.
+    """
+    event_data_batch = await producer.create_batch()
+    pending = None
+    pending_records = 0
+    exhausted = False
+    last_report = stats.start
+
+    while not exhausted and (duration is None or stats.elapsed() < duration):
+        # Number of events the schedule allows right now
+        due = await controller.available() if controller else None
+
+        # Fill the batch until it is full or the schedule is caught up
+        added = 0
+        while due is None or added < due:
+            if pending is None:
+                payload = next(payloads, None)
+                if payload is None:
+                    exhausted = True
+                    break
+                pending = make_event(payload)
+                pending_records = getattr(payload, "records", 1)
+            try:
+                event_data_batch.add(pending)
+            except ValueError:
+                # Batch is full; the pending event goes into the next one
+                break
+            pending = None
+            added += pending_records
+
+        if len(event_data_batch) == 0:
+            if exhausted:
+                break
+            # A single event larger than the batch limit can never be sent
+            raise ValueError("Payload exceeds the maximum batch size")
+        stats.record_generated(added)
+
+        if controller:
+            controller.take(added)
+        await send_batch(producer, event_data_batch, controller, stats, added)
+        event_data_batch = await producer.create_batch()
+
+        now = time.monotonic()
+        if on_report and now - last_report >= report_interval:
+            on_report(stats)
+            last_report = now
+
+class KeyedSendPipeline:
+    """Batch pending events per partition key and keep several sends in flight
+
+    At most one send per key is in flight at any time and each key's events are
+    drained in submission order, so the UPSERT source sees updates for a
+    customer_id in the order they were generated. Sends go through controller
+    (a RateController) when given, so retries keep that order too.
+
+    With a packer (loadgen.serialization.Packer), submit() takes payloads
+    rather than events: keys are mapped to the packer's groups and each
+    group's pending payloads are packed into events made by make_event.
+    """
+
+    def __init__(self, producer, max_in_flight=8, max_pending=10000, stats=None, controller=None,
+                 packer=None, make_event=None):
+        self.producer = producer
+        self.controller = controller
+        self.packer = packer
+        self.make_event = make_event
+        self.stats = stats or PublishStats()
+        self.max_pending = max_pending
+        self.semaphore = asyncio.Semaphore(max_in_flight)
+        self.pending = {}  # partition key -> deque of EventData not yet sent
+        self.tasks = set()
+        self.queued = 0
+        self.drained = asyncio.Event()
+        self.error = None
+
+    async def submit(self, key, event_data):
+        """Queue an event (a payload, when packing) for its key, waiting while too many are pending"""
+        while self.queued >= self.max_pending and self.error is None:
+            self.drained.clear()
+            await self.drained.wait()
+        if self.error is not None:
+            raise self.error
+
+        if self.packer:
+            key = self.packer.group(key)
+        queue = self.pending.get(key)
+        if queue is None:
+            queue = self.pending[key] = deque()
+            task = asyncio.create_task(self._drain(key, queue))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        queue.append(event_data)
+        self.queued += 1
+        self.stats.record_generated(1)
+
+    def _producer_for(self, key):
+        """Producer whose create_batch/send_batch carry key's batches"""
+        return self.producer
+
+    def _next_event(self, queue):
+        """(event, records in it) from the front of a key's queue"""
+        if self.packer:
+            payload = self.packer.take(queue)
+            return self.make_event(payload), payload.records
+        return queue.popleft(), 1
+
+    async def _drain(self, key, queue):
+        """Send every event queued for key, one batch at a time"""
+        carry = None  # next event, when it did not fit into the last batch
+        producer = self._producer_for(key)
+        try:
+            async with self.semaphore:
+                # Events submitted while waiting for a slot join the same batches
+                while queue or carry:
+                    batch = await producer.create_batch(partition_key=key)
+                    records = 0
+                    while queue or carry:
+                        if carry is None:
+                            carry = self._next_event(queue)
+                        try:
+                            batch.add(carry[0])
+                        except ValueError:
+                            break
+                        records += carry[1]
+                        carry = None
+                    if len(batch) == 0:
+                        raise ValueError(f"Event for {key} exceeds the maximum batch size")
+
+                    await send_batch(producer, batch, self.controller, self.stats, records)
+                    self.queued -= records
+                    self.drained.set()
+        except Exception as e:
+            if self.error is None:
+                self.error = e
+            self.queued -= len(queue) + (carry[1] if carry else 0)
+            self.drained.set()
+        finally:
+            del self.pending[key]
+
+    async def flush(self):
+        """Wait until every submitted event has been sent"""
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks))
+        if self.error is not None:
+            raise self.error
+
+async def publish_keyed(pipeline, updates, make_event, duration=None,
+                        on_report=None, report_interval=5.0):
+    """Feed (partition key, payload) pairs from updates into a KeyedSendPipeline
+
+    Paced by the pipeline's controller and ends when a finite updates iterator
+    runs out, like publish_filled_batches; waits for every submitted event to
+    be sent before returning. A packing pipeline is given the payloads themselves.
+    """
+    stats = pipeline.stats
+    controller = pipeline.controller
+    exhausted = False
+    last_report = stats.start
+
+    try:
+        while not exhausted and (duration is None or stats.elapsed() < duration):
+            due = (await controller.available() if controller else None) or 1000
+            for _ in range(due):
+                update = next(updates, None)
+                if update is None:
+                    exhausted = True
+                    break
+                key, payload = update
+                await pipeline.submit(key, payload if pipeline.packer else make_event(payload))
+                if controller:
+                    controller.take(1)
+            # Let the drain tasks run even when submit() never had to wait
+            await asyncio.sleep(0)
+
+            now = time.monotonic()
+            if on_report and now - last_report >= report_interval:
+                on_report(stats)
+                last_report = now
+    finally:
+        await pipeline.flush()
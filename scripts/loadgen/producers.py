@@ -0,0 +1,492 @@
+"""Pluggable producer backends for the publishers
+
+"eventhubs" wraps azure-eventhub's async EventHubProducerClient. "fake" is an
+in-process stand-in with the same create_batch/send_batch surface: it enforces
+the batch size limit, simulates per-send latency and bandwidth, rejects sends
+beyond an optional events/s capacity with a server-busy error, and keeps
+per-partition counts, so publishers can be run and benchmarked offline.
+"kafka" publishes over the Kafka protocol with aiokafka, to the Event Hubs
+Kafka endpoint Materialize reads from or to any Kafka-compatible broker.
+The fake and kafka backends also build tombstones, events with a null value
+that delete their key from an UPSERT source, and can key single events sent
+to an explicit partition (set_partition_key); eventhubs has None for both.
+
+Scripts pick the backend with LOADGEN_PRODUCER_BACKEND (default: eventhubs).
+"""
+
+import asyncio
+import itertools
+import os
+import sys
+import time
+import zlib
+
+DEFAULT_BACKEND = os.getenv("LOADGEN_PRODUCER_BACKEND", "eventhubs")
+
+# Standard tier limit; Premium/Dedicated namespaces allow larger batches
+MAX_BATCH_BYTES = 1024 * 1024
+
+def partition_index(partition_key, partitions):
+    """Partition a key lands on in the fake hub (Event Hubs uses its own hash)"""
+    return zlib.crc32(partition_key.encode()) % partitions
+
+def get_backend(name=None, **options):
+    """Instantiate a backend by name"""
+    name = name or DEFAULT_BACKEND
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown producer backend: {name}")
+    return BACKENDS[name](**options)
+
+def publisher_connection_str(connection_str=None):
+    """The namespace connection string, from EVENTHUBS_PUBLISHER_CONNECTION_STRING unless given"""
+    connection_str = connection_str or os.getenv('EVENTHUBS_PUBLISHER_CONNECTION_STRING')
+    if not connection_str:
+        print("❌ Error: EVENTHUBS_PUBLISHER_CONNECTION_STRING environment variable not set")
+        print("Please source your .env file: source .env")
+        sys.exit(1)
+    return connection_str
+
+def namespace_host(connection_str):
+    """Host name of the namespace from Endpoint=sb://<host>/;..."""
+    return connection_str.split(';')[0].split('=', 1)[1].split('://', 1)[-1].strip('/')
+
+class ProducerPool:
+    """One long-lived producer per hub, shared by every stream publishing to it
+
+    A producer client is bound to a single hub, so streams for several hubs
+    share the namespace credential and one open client (and its connection)
+    per hub for the whole run. Closing the pool closes them all.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.producers = {}
+
+    def get(self, topic):
+        if topic not in self.producers:
+            self.producers[topic] = self.backend.create_producer(topic)
+        return self.producers[topic]
+
+    async def close(self):
+        producers = list(self.producers.values())
+        self.producers.clear()
+        await asyncio.gather(*(producer.close() for producer in producers))
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+class EventHubsBackend:
+    """Azure Event Hubs over AMQP, one EventHubProducerClient per hub
+
+    The SDK is imported on first use rather than here: it takes longer to
+    import than the rest of loadgen put together, and --help or an argument
+    error should not pay for it.
+    """
+
+    name = "eventhubs"
+
+    def __init__(self, connection_str=None):
+        self.connection_str = connection_str
+        self._sdk = None
+
+    def _load_sdk(self):
+        if self._sdk is None:
+            try:
+                from azure.eventhub import EventData
+                from azure.eventhub.aio import EventHubProducerClient
+            except ImportError:
+                print("Please install the azure-eventhub package:")
+                print("pip install azure-eventhub")
+                sys.exit(1)
+            self._sdk = (EventData, EventHubProducerClient)
+        return self._sdk
+
+    @property
+    def EventData(self):
+        return self._load_sdk()[0]
+
+    def _connection_str(self):
+        return publisher_connection_str(self.connection_str)
+
+    def create_producer(self, topic):
+        # The namespace connection string is shared by every hub; the SDK adds the entity
+        connection_str = self._connection_str()
+        return self._load_sdk()[1].from_connection_string(conn_str=connection_str, eventhub_name=topic)
+
+    # An AMQP message has no null body that the Kafka endpoint is known to hand
+    # Kafka readers as a null value, so events cannot delete UPSERT keys
+    tombstone = None
+    # The SDK refuses a partition key on a batch sent by partition_id, and there
+    # is no supported way to key its events one by one, so routed events would
+    # reach the customers UPSERT source without a key
+    set_partition_key = None
+
+    def describe(self, topic):
+        endpoint = self._connection_str().split(';')[0].split('=', 1)[1]
+        return f"{endpoint}{topic}"
+
+def _set_event_partition_key(event_data, partition_key):
+    event_data.partition_key = partition_key
+
+class FakeEventData:
+    """Event body plus the properties the publishers set"""
+
+    # Approximate AMQP framing added to each message in a batch
+    OVERHEAD_BYTES = 24
+
+    def __init__(self, body=None):
+        self.body = body.encode() if isinstance(body, str) else (body or b"")
+        self.properties = {}
+        self.partition_key = None  # set by set_partition_key for batches sent by partition_id
+        self.is_tombstone = False
+
+    @classmethod
+    def tombstone(cls):
+        """Event with a null value, which deletes its key from an UPSERT source"""
+        event = cls()
+        event.is_tombstone = True
+        return event
+
+    @property
+    def size_in_bytes(self):
+        return len(self.body) + self.OVERHEAD_BYTES
+
+class FakeEventDataBatch:
+    """Mirrors EventDataBatch: add() raises ValueError once the size limit is reached"""
+
+    OVERHEAD_BYTES = 16
+
+    def __init__(self, max_size_in_bytes=MAX_BATCH_BYTES, partition_key=None, partition_id=None):
+        self.max_size_in_bytes = max_size_in_bytes
+        self.partition_key = partition_key
+        self.partition_id = partition_id
+        self.size_in_bytes = self.OVERHEAD_BYTES
+        self.events = []
+
+    def add(self, event_data):
+        size = event_data.size_in_bytes
+        if self.size_in_bytes + size > self.max_size_in_bytes:
+            raise ValueError("EventDataBatch has reached its size limit: "
+                             f"{self.max_size_in_bytes}")
+        self.size_in_bytes += size
+        self.events.append(event_data)
+
+    def __len__(self):
+        return len(self.events)
+
+class FakeServerBusyError(Exception):
+    """Raised by the fake hub when a send exceeds its capacity, like Event Hubs throttling"""
+
+class FakeEventHub:
+    """Shared state of one fake hub: partitions, counters and optional retained events"""
+
+    def __init__(self, name, partitions=4, keep_events=False, capacity=None):
+        self.name = name
+        self.capacity = capacity  # accepted events/s, None for unlimited
+        self.allowance = float(capacity or 0)
+        self.allowance_at = time.monotonic()
+        self.throttled = 0
+        self.partition_ids = [str(p) for p in range(partitions)]
+        self.keep_events = keep_events
+        self.events = []  # (partition_id, partition_key, body) when keep_events
+        self.partition_events = dict.fromkeys(self.partition_ids, 0)
+        self.partition_bytes = dict.fromkeys(self.partition_ids, 0)
+        self.sends = 0
+        self.listeners = []  # callables (partition_id, partition_key, events)
+        self.round_robin = itertools.cycle(self.partition_ids)
+
+    def partition_for(self, partition_key):
+        if partition_key is None:
+            return next(self.round_robin)
+        return self.partition_ids[partition_index(partition_key, len(self.partition_ids))]
+
+    def admit(self, count):
+        """Take count events out of the capacity budget; False if the hub is busy"""
+        if self.capacity is None:
+            return True
+        now = time.monotonic()
+        # Up to one second of capacity can be banked, as with throughput units; a
+        # full budget admits even an oversized batch and goes into debt
+        self.allowance = min(self.capacity, self.allowance + (now - self.allowance_at) * self.capacity)
+        self.allowance_at = now
+        if count > self.allowance and self.allowance < self.capacity:
+            self.throttled += 1
+            return False
+        self.allowance -= count
+        return True
+
+    def append(self, partition_id, partition_key, events):
+        self.sends += 1
+        self.partition_events[partition_id] += len(events)
+        self.partition_bytes[partition_id] += sum(len(e.body) for e in events)
+        if self.keep_events:
+            self.events.extend((partition_id, e.partition_key or partition_key, e.body) for e in events)
+        for listener in self.listeners:
+            listener(partition_id, partition_key, events)
+
+class FakeProducerClient:
+    """In-process stand-in for azure.eventhub.aio.EventHubProducerClient"""
+
+    def __init__(self, hub, send_latency=0.005, bandwidth=None, max_batch_bytes=MAX_BATCH_BYTES):
+        self.hub = hub
+        self.send_latency = send_latency
+        self.bandwidth = bandwidth  # bytes/s, None for unlimited
+        self.max_batch_bytes = max_batch_bytes
+        self.closed = False
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        self.closed = True
+
+    async def get_partition_ids(self):
+        return list(self.hub.partition_ids)
+
+    async def get_eventhub_properties(self):
+        return {"eventhub_name": self.hub.name, "partition_ids": list(self.hub.partition_ids)}
+
+    async def create_batch(self, partition_key=None, partition_id=None, max_size_in_bytes=None):
+        if partition_key is not None and partition_id is not None:
+            raise ValueError("partition_key and partition_id cannot both be set")
+        return FakeEventDataBatch(min(max_size_in_bytes or self.max_batch_bytes, self.max_batch_bytes),
+                                  partition_key, partition_id)
+
+    async def send_batch(self, event_data_batch, partition_key=None, partition_id=None):
+        if self.closed:
+            raise RuntimeError("Producer is closed")
+        if isinstance(event_data_batch, FakeEventDataBatch):
+            batch = event_data_batch
+        else:
+            # A list of events is sent as one batch, like the real client
+            batch = await self.create_batch(partition_key=partition_key, partition_id=partition_id)
+            for event_data in event_data_batch:
+                batch.add(event_data)
+        if len(batch) == 0:
+            return
+
+        delay = self.send_latency
+        if self.bandwidth:
+            delay += batch.size_in_bytes / self.bandwidth
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        partition = batch.partition_id
+        if partition is None:
+            partition = self.hub.partition_for(batch.partition_key)
+        elif partition not in self.hub.partition_ids:
+            raise ValueError(f"Invalid partition_id: {partition}")
+        if not self.hub.admit(len(batch)):
+            raise FakeServerBusyError(
+                f"com.microsoft:server-busy: {self.hub.name} is over its capacity of {self.hub.capacity} events/s")
+        self.hub.append(partition, batch.partition_key, batch.events)
+
+class FakeBackend:
+    """In-process Event Hubs stand-in; hubs are created on first use"""
+
+    name = "fake"
+    EventData = FakeEventData
+    tombstone = staticmethod(FakeEventData.tombstone)
+    set_partition_key = staticmethod(_set_event_partition_key)
+
+    def __init__(self, partitions=4, send_latency=0.005, bandwidth=None,
+                 max_batch_bytes=MAX_BATCH_BYTES, keep_events=False, capacity=None):
+        self.partitions = partitions
+        self.send_latency = send_latency
+        self.bandwidth = bandwidth
+        self.max_batch_bytes = max_batch_bytes
+        self.keep_events = keep_events
+        self.capacity = capacity
+        self.hubs = {}
+
+    def hub(self, topic):
+        if topic not in self.hubs:
+            self.hubs[topic] = FakeEventHub(topic, self.partitions, self.keep_events, self.capacity)
+        return self.hubs[topic]
+
+    def create_producer(self, topic):
+        return FakeProducerClient(self.hub(topic), self.send_latency, self.bandwidth, self.max_batch_bytes)
+
+    def describe(self, topic):
+        capacity = f", {self.capacity:.0f} events/s capacity" if self.capacity else ""
+        return f"fake://{topic} ({self.partitions} partitions, {self.send_latency * 1000:.0f} ms/send{capacity})"
+
+def _env_flag(name, default=False):
+    value = os.getenv(name)
+    return default if value is None else value.lower() not in ("", "0", "false", "no", "off")
+
+class KafkaProducerClient:
+    """Producer surface of the other backends over one topic of the backend's shared AIOKafkaProducer
+
+    A send hands every event of the batch to the Kafka client and waits for
+    all of them to be acknowledged; the client regroups them into its own
+    per-partition record batches. A partition key becomes the message key.
+    """
+
+    def __init__(self, backend, topic, max_batch_bytes=MAX_BATCH_BYTES):
+        self.backend = backend
+        self.topic = topic
+        self.max_batch_bytes = max_batch_bytes
+        self.producer = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _producer(self):
+        if self.producer is None:
+            self.producer = await self.backend.acquire()
+        return self.producer
+
+    async def close(self):
+        if self.producer is not None:
+            self.producer = None
+            await self.backend.release()
+
+    async def get_partition_ids(self):
+        producer = await self._producer()
+        return [str(p) for p in sorted(await producer.partitions_for(self.topic))]
+
+    async def get_eventhub_properties(self):
+        return {"eventhub_name": self.topic, "partition_ids": await self.get_partition_ids()}
+
+    async def create_batch(self, partition_key=None, partition_id=None, max_size_in_bytes=None):
+        if partition_key is not None and partition_id is not None:
+            raise ValueError("partition_key and partition_id cannot both be set")
+        # Size accounting only; the Kafka client builds the wire batches
+        return FakeEventDataBatch(min(max_size_in_bytes or self.max_batch_bytes, self.max_batch_bytes),
+                                  partition_key, partition_id)
+
+    async def send_batch(self, event_data_batch, partition_key=None, partition_id=None):
+        if isinstance(event_data_batch, FakeEventDataBatch):
+            events = event_data_batch.events
+            partition_key = event_data_batch.partition_key
+            partition_id = event_data_batch.partition_id
+        else:
+            events = event_data_batch
+        if not events:
+            return
+        producer = await self._producer()
+        key = partition_key.encode() if partition_key is not None else None
+        partition = int(partition_id) if partition_id is not None else None
+        send = producer.send
+        deliveries = []
+        for event in events:
+            headers = [(name, str(value).encode()) for name, value in event.properties.items()] or None
+            event_key = event.partition_key.encode() if event.partition_key is not None else key
+            value = None if event.is_tombstone else event.body
+            deliveries.append(await send(self.topic, value, key=event_key, partition=partition, headers=headers))
+        await asyncio.gather(*deliveries)
+
+class KafkaBackend:
+    """Kafka protocol via aiokafka, one producer (and connection pool) shared by every topic
+
+    Without a bootstrap server the Event Hubs Kafka endpoint is used, with the
+    broker and SASL PLAIN credentials derived from
+    EVENTHUBS_PUBLISHER_CONNECTION_STRING as the Materialize connection in
+    setup-multi-topic-connection.sql does. A broker given explicitly, e.g. a
+    local Kafka or Redpanda container, is reached in plaintext.
+
+    Options default to LOADGEN_KAFKA_* variables: BOOTSTRAP_SERVERS, LINGER_MS
+    (5), BATCH_BYTES (131072 per partition batch), COMPRESSION (none, gzip,
+    snappy, lz4 or zstd; Event Hubs accepts gzip) and IDEMPOTENCE (off; on
+    implies acks=all and gives exactly-once writes per partition across the
+    client's own retries). Events and batches are the fake backend's classes.
+    """
+
+    name = "kafka"
+    EventData = FakeEventData
+    tombstone = staticmethod(FakeEventData.tombstone)
+    set_partition_key = staticmethod(_set_event_partition_key)
+
+    def __init__(self, bootstrap_servers=None, linger_ms=None, batch_bytes=None, compression=None,
+                 idempotence=None, connection_str=None):
+        self.bootstrap_servers = bootstrap_servers or os.getenv("LOADGEN_KAFKA_BOOTSTRAP_SERVERS")
+        self.linger_ms = int(os.getenv("LOADGEN_KAFKA_LINGER_MS", "5")) if linger_ms is None else linger_ms
+        self.batch_bytes = int(os.getenv("LOADGEN_KAFKA_BATCH_BYTES", "131072")) if batch_bytes is None else batch_bytes
+        compression = compression or os.getenv("LOADGEN_KAFKA_COMPRESSION", "none")
+        self.compression = None if compression == "none" else compression
+        self.idempotence = _env_flag("LOADGEN_KAFKA_IDEMPOTENCE") if idempotence is None else idempotence
+        self.connection_str = connection_str
+        self.producer = None
+        self.users = 0
+        self.lock = asyncio.Lock()
+
+    def _broker(self):
+        if self.bootstrap_servers:
+            return self.bootstrap_servers
+        return f"{namespace_host(publisher_connection_str(self.connection_str))}:9093"
+
+    def _event_hubs_options(self):
+        from aiokafka.helpers import create_ssl_context
+
+        connection_str = publisher_connection_str(self.connection_str)
+        return {
+            "bootstrap_servers": self._broker(),
+            "security_protocol": "SASL_SSL",
+            "ssl_context": create_ssl_context(),
+            "sasl_mechanism": "PLAIN",
+            "sasl_plain_username": "$ConnectionString",
+            "sasl_plain_password": connection_str,
+        }
+
+    def _producer_options(self):
+        options = {"bootstrap_servers": self.bootstrap_servers} if self.bootstrap_servers else self._event_hubs_options()
+        options.update(
+            client_id="loadgen",
+            linger_ms=self.linger_ms,
+            max_batch_size=self.batch_bytes,
+            compression_type=self.compression,
+            enable_idempotence=self.idempotence,
+        )
+        if self.idempotence:
+            options["acks"] = "all"
+        return options
+
+    async def acquire(self):
+        """Start the shared producer on first use and count its users"""
+        async with self.lock:
+            if self.producer is None:
+                try:
+                    from aiokafka import AIOKafkaProducer
+                except ImportError:
+                    print("Please install the aiokafka package:")
+                    print("pip install aiokafka")
+                    sys.exit(1)
+                producer = AIOKafkaProducer(**self._producer_options())
+                try:
+                    await producer.start()
+                except Exception:
+                    await producer.stop()
+                    raise
+                self.producer = producer
+            self.users += 1
+            return self.producer
+
+    async def release(self):
+        """Stop the shared producer once its last user is done"""
+        async with self.lock:
+            self.users -= 1
+            if self.users == 0 and self.producer is not None:
+                producer, self.producer = self.producer, None
+                await producer.stop()
+
+    def create_producer(self, topic):
+        return KafkaProducerClient(self, topic)
+
+    def describe(self, topic):
+        settings = [f"linger {self.linger_ms} ms", f"{self.batch_bytes // 1024} KiB batches",
+                    f"{self.compression or 'no'} compression"]
+        if self.idempotence:
+            settings.append("idempotent")
+        return f"kafka://{self._broker()}/{topic} ({', '.join(settings)})"
+
+BACKENDS = {"eventhubs": EventHubsBackend, "fake": FakeBackend, "kafka": KafkaBackend}
@@ -0,0 +1,159 @@
+"""Protobuf payloads for the orders and customers topics, without protoc
+
+The messages are derived from loadgen.schema: field N of LINKED_ORDER_FIELDS or
+CUSTOMER_FIELDS is protobuf field N + 1, text maps to string, double to double
+and int to int32. ProtobufEncoder writes the proto3 wire format directly from a
+record dict; None values are left out, so they decode as the field default ("").
+
+Materialize reads the messages with FORMAT PROTOBUF MESSAGE ... USING SCHEMA,
+which takes a serialized FileDescriptorSet rather than .proto text. This module
+builds that too (loadgen.ddl embeds it in setup-multi-topic-connection-protobuf.sql)
+and prints both it and records.proto:
+
+    cd scripts && python3 -m loadgen.protobuf descriptor
+    cd scripts && python3 -m loadgen.protobuf proto > loadgen/records.proto
+"""
+
+import argparse
+import struct
+
+from loadgen.schema import CUSTOMER_FIELDS, LINKED_ORDER_FIELDS
+
+PACKAGE = "loadgen"
+FILE_NAME = "records.proto"
+
+# Message name and schema per topic
+MESSAGES = {
+    # A superset of ORDER_FIELDS: orders without a customer_id leave field 11 out
+    "orders": ("Order", LINKED_ORDER_FIELDS),
+    "customers": ("Customer", CUSTOMER_FIELDS),
+}
+
+# sql type -> (proto type name, FieldDescriptorProto.Type, wire type)
+PROTO_TYPES = {
+    "text": ("string", 9, 2),
+    "double": ("double", 1, 1),
+    "int": ("int32", 5, 0),
+}
+
+def encode_varint(value):
+    """Base-128 varint; negative values take ten bytes, as for int32/int64"""
+    if value < 0:
+        value += 1 << 64
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+# Varints below 128 are a single byte; string lengths here almost always are
+_SHORT_VARINTS = [bytes([n]) for n in range(128)]
+
+_pack_double = struct.Struct("<d").pack
+
+class ProtobufEncoder:
+    """Encode records of a loadgen.schema schema as protobuf messages
+
+    Same interface as serialization.RecordEncoder. Keys that are not in the
+    schema (such as the latency probe's probe_seq) are not encoded, and a
+    partial record encodes just its fields: protobuf fields concatenate in any
+    order, so pre-encoded fragments can be spliced like the JSON ones.
+    """
+
+    def __init__(self, fields):
+        self.fields = [
+            (name, sql_type, encode_varint(number << 3 | PROTO_TYPES[sql_type][2]))
+            for number, (name, sql_type) in enumerate(fields, 1)
+        ]
+
+    def encode(self, record):
+        parts = []
+        append = parts.append
+        short = _SHORT_VARINTS
+        # Field encoders are inlined; this runs once per event
+        for name, sql_type, tag in self.fields:
+            value = record.get(name)
+            if value is None:
+                continue
+            append(tag)
+            if sql_type == "text":
+                data = value.encode()
+                length = len(data)
+                append(short[length] if length < 128 else encode_varint(length))
+                append(data)
+            elif sql_type == "double":
+                append(_pack_double(value))
+            else:
+                append(short[value] if 0 <= value < 128 else encode_varint(value))
+        return b"".join(parts)
+
+def _length_delimited(number, payload):
+    return encode_varint(number << 3 | 2) + encode_varint(len(payload)) + payload
+
+def _json_name(name):
+    first, *rest = name.split("_")
+    return first + "".join(part.capitalize() for part in rest)
+
+def _field_descriptor(name, number, sql_type):
+    """FieldDescriptorProto: name = 1, number = 3, label = 4 (optional), type = 5, json_name = 10
+
+    Byte-for-byte what protoc --descriptor_set_out emits for records.proto.
+    """
+    return (_length_delimited(1, name.encode())
+            + encode_varint(3 << 3) + encode_varint(number)
+            + encode_varint(4 << 3) + encode_varint(1)
+            + encode_varint(5 << 3) + encode_varint(PROTO_TYPES[sql_type][1])
+            + _length_delimited(10, _json_name(name).encode()))
+
+def _message_descriptor(message, fields):
+    """DescriptorProto: name = 1, field = 2"""
+    return _length_delimited(1, message.encode()) + b"".join(
+        _length_delimited(2, _field_descriptor(name, number, sql_type))
+        for number, (name, sql_type) in enumerate(fields, 1))
+
+def file_descriptor_set():
+    """Serialized FileDescriptorSet holding records.proto"""
+    # FileDescriptorProto: name = 1, package = 2, message_type = 4, syntax = 12
+    file_proto = (_length_delimited(1, FILE_NAME.encode())
+                  + _length_delimited(2, PACKAGE.encode())
+                  + b"".join(_length_delimited(4, _message_descriptor(message, fields))
+                             for message, fields in MESSAGES.values())
+                  + _length_delimited(12, b"proto3"))
+    # FileDescriptorSet: file = 1
+    return _length_delimited(1, file_proto)
+
+def schema_literal():
+    """FileDescriptorSet as the bytea literal USING SCHEMA expects"""
+    return "'\\x" + file_descriptor_set().hex() + "'"
+
+def proto_source():
+    """records.proto text for the same messages"""
+    lines = [
+        "// Generated by: cd scripts && python3 -m loadgen.protobuf proto > loadgen/records.proto",
+        'syntax = "proto3";',
+        "",
+        f"package {PACKAGE};",
+    ]
+    for message, fields in MESSAGES.values():
+        lines.append("")
+        lines.append(f"message {message} {{")
+        for number, (name, sql_type) in enumerate(fields, 1):
+            lines.append(f"  {PROTO_TYPES[sql_type][0]} {name} = {number};")
+        lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print the protobuf schema of the loadgen records")
+    parser.add_argument("output", choices=["descriptor", "proto"],
+                        help="descriptor: USING SCHEMA literal; proto: records.proto source")
+    args = parser.parse_args(argv)
+    if args.output == "descriptor":
+        for topic, (message, _) in MESSAGES.items():
+            print(f"-- {topic}: MESSAGE '{PACKAGE}.{message}'")
+        print(schema_literal())
+    else:
+        print(proto_source(), end="")
+
+if __name__ == "__main__":
+    main()
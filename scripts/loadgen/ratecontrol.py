@@ -0,0 +1,162 @@
+"""Adaptive rate control and retries for long-running publishers
+
+RateController is a token bucket whose refill rate follows throttling: a
+server-busy or quota error halves the rate (at most once per cooldown), and
+every interval without one ramps it back towards the target. Sends go through
+RateController.send, which retries throttled and transient failures a bounded
+number of times with full-jitter exponential backoff, so a busy namespace slows
+the run down instead of ending it.
+
+Rates are in events/s. A target of None means unlimited until the first
+throttle, after which the controller paces from the rate it had achieved.
+"""
+
+import asyncio
+import random
+import time
+
+# Substrings of error names/messages that mean the namespace is shedding load
+THROTTLE_MARKERS = ("server-busy", "serverbusy", "quota", "resource-limit-exceeded", "throttl")
+
+# azure.eventhub.exceptions and aiokafka.errors raised for failures worth another attempt
+TRANSIENT_ERRORS = ("ConnectError", "ConnectionLostError", "OperationTimeoutError", "EventDataSendError",
+                    "KafkaTimeoutError", "KafkaConnectionError", "RequestTimedOutError", "NotEnoughReplicasError")
+
+def classify_error(exc):
+    """"throttle", "transient" or None for errors that should not be retried"""
+    text = f"{type(exc).__name__} {exc}".lower()
+    if any(marker in text for marker in THROTTLE_MARKERS):
+        return "throttle"
+    if isinstance(exc, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return "transient"
+    if type(exc).__name__ in TRANSIENT_ERRORS:
+        return "transient"
+    return None
+
+class RateController:
+    """Token bucket with multiplicative decrease on throttling and gradual recovery"""
+
+    def __init__(self, target_rate=None, min_rate=1.0, burst=1.0, quantum=0.05, decrease=0.5,
+                 recovery=0.1, interval=1.0, max_retries=5, base_delay=0.1, max_delay=5.0):
+        self.target_rate = target_rate
+        self.rate = target_rate  # current refill rate, None while unlimited
+        self.min_rate = min(min_rate, target_rate) if target_rate else min_rate
+        self.burst = burst  # bucket depth, in seconds of the current rate
+        self.quantum = quantum  # seconds of tokens to gather before releasing, so paced batches stay full
+        self.decrease = decrease
+        self.recovery = recovery  # fraction of the target (or current rate) regained per interval
+        self.interval = interval
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+        self.start = time.monotonic()
+        self.tokens = 1.0  # start nearly empty so short runs don't overshoot the target
+        self.refilled = self.start
+        self.last_decrease = float("-inf")
+        self.last_increase = self.start
+
+        self.events = 0  # acknowledged by the hub
+        self.throttles = 0
+        self.retries = 0
+        self.failures = 0  # batches given up on after max_retries
+
+    def _depth(self):
+        return max(1.0, (self.rate or 0.0) * self.burst)
+
+    def _refill(self, now):
+        if self.rate is not None:
+            self.tokens = min(self._depth(), self.tokens + (now - self.refilled) * self.rate)
+        self.refilled = now
+
+    async def available(self):
+        """Wait for at least one token; returns how many events may go now (None if unlimited)"""
+        while self.rate is not None:
+            now = time.monotonic()
+            self._refill(now)
+            wanted = max(1.0, self.rate * self.quantum)
+            if self.tokens >= wanted:
+                return int(self.tokens)
+            await asyncio.sleep(min((wanted - self.tokens) / self.rate, 0.1))
+        return None
+
+    def take(self, count):
+        """Spend count tokens; the bucket may go into debt, delaying later sends"""
+        if self.rate is not None:
+            self._refill(time.monotonic())
+            self.tokens -= count
+
+    async def acquire(self, count):
+        """Wait until the bucket is out of debt, then spend count tokens"""
+        await self.available()
+        self.take(count)
+
+    def throttled(self):
+        """Back off after a throttle signal"""
+        self.throttles += 1
+        now = time.monotonic()
+        # Sends already in flight fail together; count them as one signal
+        if now - self.last_decrease < self.interval:
+            return
+        current = self.rate if self.rate is not None else max(self.achieved_rate(), self.min_rate)
+        self._refill(now)
+        self.rate = max(self.min_rate, current * self.decrease)
+        self.tokens = min(self.tokens, 0.0)
+        self.last_decrease = self.last_increase = now
+
+    def succeeded(self, count):
+        """Record acknowledged events and ramp the rate back up once per interval"""
+        self.events += count
+        now = time.monotonic()
+        if self.rate is None or self.rate == self.target_rate or now - self.last_increase < self.interval:
+            return
+        self._refill(now)
+        step = self.recovery * (self.target_rate or self.rate)
+        self.rate = self.rate + step if self.target_rate is None else min(self.target_rate, self.rate + step)
+        self.last_increase = now
+
+    def backoff(self, attempt):
+        """Full-jitter exponential backoff before retry number attempt + 1"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+    async def send(self, producer, batch, records=None):
+        """producer.send_batch(batch) with bounded retries on throttled and transient errors
+
+        records counts the records of a batch of packed events (default: one per event).
+        """
+        attempt = 0
+        while True:
+            try:
+                await producer.send_batch(batch)
+            except Exception as e:
+                kind = classify_error(e)
+                if kind is None or attempt >= self.max_retries:
+                    self.failures += 1
+                    raise
+                if kind == "throttle":
+                    self.throttled()
+                self.retries += 1
+                await asyncio.sleep(self.backoff(attempt))
+                attempt += 1
+            else:
+                self.succeeded(len(batch) if records is None else records)
+                return
+
+    def achieved_rate(self):
+        return self.events / max(time.monotonic() - self.start, 1e-9)
+
+    def as_dict(self):
+        return {
+            "target_rate": self.target_rate,
+            "rate": self.rate,
+            "achieved_rate": self.achieved_rate(),
+            "throttles": self.throttles,
+            "retries": self.retries,
+            "failures": self.failures,
+        }
+
+    def summary(self):
+        rate = f"{self.rate:.0f}/s" if self.rate is not None else "unlimited"
+        target = f"{self.target_rate:.0f}/s" if self.target_rate is not None else "unlimited"
+        return (f"rate {rate} (target {target}), achieved {self.achieved_rate():.0f} events/s, "
+                f"{self.throttles} throttles, {self.retries} retries, {self.failures} failed batches")
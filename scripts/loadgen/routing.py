@@ -0,0 +1,142 @@
+"""Explicit partition routing for the publishers
+
+Batches created with a partition key leave the choice of partition to the
+service, which hashes every batch's key again. With --route the publishers
+choose instead: the partition count is queried once at start-up, every key
+of the generator's key space is mapped to a partition up front, and batches
+are created with partition_id, one send in flight per partition.
+
+Customer updates stay in order per key: a key always maps to the same
+partition and each partition's events go out one batch at a time in
+submission order. Every event still carries its customer_id as its Kafka key
+(see set_partition_key of the backends), so the UPSERT source keys on it as
+before. The eventhubs backend cannot key events sent by partition_id, so
+customers are only routed with the kafka or fake backend. Orders have no
+key; each partition's sender takes the next batch of orders whenever its
+last send completes, so faster partitions take more of the load.
+
+Keys are mapped with partition_index, the hash the fake hub and the load
+estimate use, so the estimate printed before a run is the routing itself.
+It is not the hash the service or the Kafka client applies to keyed sends:
+a routed run puts a customer_id on another partition than an unrouted one,
+and Materialize has no order between the two partitions' updates of that
+key, so an older value can win. Don't mix routed and unrouted customers
+runs against one hub; recreate the hub (or the source) in between.
+
+    cd scripts && LOADGEN_PRODUCER_BACKEND=kafka python3 -m loadgen customers --customers 1000000 --continuous --no-delay --route
+"""
+
+import asyncio
+import time
+from array import array
+
+from loadgen.pipeline import KeyedSendPipeline, PublishStats, publish_filled_batches
+from loadgen.producers import partition_index
+
+class PartitionRouter:
+    """Partition of every key of a key space, computed once
+
+    With index_of (e.g. ColumnarCustomerGenerator.index_of) the table is an
+    array of partition indexes by key index, two bytes per key; otherwise a
+    dict by key. Keys outside the table are hashed when routed.
+    """
+
+    def __init__(self, partition_ids, key_of=None, num_keys=0, index_of=None):
+        self.partition_ids = list(partition_ids)
+        partitions = len(self.partition_ids)
+        self.index_of = index_of
+        started = time.perf_counter()
+        indexes = (partition_index(key_of(index), partitions) for index in range(num_keys))
+        self.table = array("H", indexes) if index_of else dict(zip(map(key_of, range(num_keys)), indexes))
+        self.build_seconds = time.perf_counter() - started
+
+    @classmethod
+    async def create(cls, producer, key_of=None, num_keys=0, index_of=None):
+        """Router over the partitions of producer's hub, asked for once"""
+        return cls(await producer.get_partition_ids(), key_of, num_keys, index_of)
+
+    def _lookup(self, key):
+        if self.index_of:
+            return self.table[self.index_of(key)]
+        return self.table[key]
+
+    def partition_of(self, key):
+        """Partition id key is routed to"""
+        try:
+            index = self._lookup(key)
+        except (KeyError, IndexError):
+            index = partition_index(key, len(self.partition_ids))
+        return self.partition_ids[index]
+
+    def describe(self):
+        return (f"🔀 Routing {len(self.table):,} keys over {len(self.partition_ids)} partitions "
+                f"(table built in {self.build_seconds * 1000:.0f} ms)")
+
+class PartitionProducer:
+    """One partition of a producer: batches are created for partition_id and counted in stats"""
+
+    def __init__(self, producer, partition_id, stats=None):
+        self.producer = producer
+        self.partition_id = partition_id
+        self.stats = stats or PublishStats()
+
+    async def create_batch(self, partition_key=None, partition_id=None, max_size_in_bytes=None):
+        return await self.producer.create_batch(partition_id=self.partition_id, max_size_in_bytes=max_size_in_bytes)
+
+    async def send_batch(self, event_data_batch):
+        started = time.perf_counter()
+        await self.producer.send_batch(event_data_batch)
+        self.stats.record_batch(event_data_batch, time.perf_counter() - started)
+
+class PartitionedSendPipeline(KeyedSendPipeline):
+    """KeyedSendPipeline that queues events per routed partition instead of per key
+
+    set_key (the backend's set_partition_key) tags each event with its key
+    before it is queued. Not combined with packing: a pack would mix keys.
+    """
+
+    def __init__(self, producer, router, set_key, max_pending=10000, stats=None, controller=None):
+        super().__init__(producer, len(router.partition_ids), max_pending, stats, controller)
+        self.router = router
+        self.set_key = set_key
+        self.partitions = {partition_id: PartitionProducer(producer, partition_id)
+                           for partition_id in router.partition_ids}
+
+    async def submit(self, key, event_data):
+        self.set_key(event_data, key)
+        await super().submit(self.router.partition_of(key), event_data)
+
+    def _producer_for(self, key):
+        return self.partitions[key]
+
+    def report(self, noun="events"):
+        return partition_report(self.partitions, noun)
+
+async def publish_partitioned(producer, payloads, make_event, stats, controller=None, duration=None,
+                              on_report=None, report_interval=5.0):
+    """publish_filled_batches with one sender per partition, all drawing on payloads
+
+    Returns the PartitionProducers, whose stats hold each partition's share.
+    """
+    partitions = {partition_id: PartitionProducer(producer, partition_id)
+                  for partition_id in await producer.get_partition_ids()}
+    # Only one sender reports, so the summary lines come once per interval
+    senders = [publish_filled_batches(partition, payloads, make_event, stats, controller, duration,
+                                      None if index else on_report, report_interval)
+               for index, partition in enumerate(partitions.values())]
+    await asyncio.gather(*senders)
+    return partitions
+
+def partition_report(partitions, noun="events"):
+    """Lines with each partition's events, throughput and share, and the imbalance"""
+    total = sum(partition.stats.events for partition in partitions.values()) or 1
+    lines = [f"🔀 {noun.capitalize()} per partition:"]
+    for partition_id, partition in partitions.items():
+        stats = partition.stats
+        lines.append(f"   p{partition_id}: {stats.events:,} in {stats.batches:,} batches "
+                     f"({stats.events / max(stats.elapsed(), 1e-9):,.0f}/s, {stats.events / total:.1%})")
+    busiest = max(partitions, key=lambda partition_id: partitions[partition_id].stats.events)
+    imbalance = partitions[busiest].stats.events / total * len(partitions)
+    lines.append(f"{'⚠️ ' if imbalance >= 1.25 else '✅'} Busiest partition p{busiest} took "
+                 f"{imbalance:.2f}x its fair share")
+    return lines
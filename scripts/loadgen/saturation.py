@@ -0,0 +1,397 @@
+"""Step-load saturation finder: raise the publish rate until ingestion lag diverges
+
+Drives the fan-out generators (orders linked to customers, customer upserts)
+at a total rate that grows by --step-factor every step, from --start-rate up
+to --max-rate. Each step holds its rate for --hold seconds while
+loadgen.freshness polls Materialize over pgwire. A poll's lag is the largest
+freshness lag of the sources and views; its backlog is the sources' offset
+lag. Polls in the first --settle seconds of a step are left out of the
+step's trend.
+
+A step diverges when the lag grows faster than --max-lag-growth seconds per
+second, or when it ends above --max-lag. The run stops at the first step
+that diverges, or that the publishers cannot drive to 90% of its rate (the
+hub or the generator is then the limit, not Materialize). The steps form a
+throughput-vs-lag curve. The sustainable maximum is the highest rate of a
+step that held.
+
+--simulate runs without a namespace or a cluster: the fake hub (with
+--hub-capacity as its events/s limit) feeds SimulatedMaterialize, which
+works through the events at --db-capacity events/s and serves its
+introspection relations through loadgen.pgstub. Against a real environment,
+use it to size the Materialize cluster and the mzpool node pool.
+
+    cd scripts && python3 -m loadgen.saturation --simulate --db-capacity 20000 --hold 10
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import sys
+import time
+from collections import deque
+from functools import partial
+
+from loadgen.customers import ColumnarCustomerGenerator
+from loadgen.fanout import CUSTOMERS_TOPIC, ORDERS_TOPIC, LiveCustomers, linked_orders, upsert_records
+from loadgen.freshness import DEFAULT_OBJECTS, FreshnessMonitor
+from loadgen.orders import BulkOrderGenerator
+from loadgen.pgwire import PgError, Pool, default_dsn
+from loadgen.pipeline import KeyedSendPipeline, PublishStats, publish_filled_batches, publish_keyed
+from loadgen.producers import ProducerPool, get_backend
+from loadgen.ratecontrol import RateController
+from loadgen.schema import CUSTOMER_FIELDS
+from loadgen.serialization import make_encoder, require_unpacked
+
+# Lags below this many seconds never count as diverging, whatever their trend
+LAG_FLOOR = 2.0
+
+# Share of a step's rate the publishers must achieve for the step to count
+MIN_ACHIEVED = 0.9
+
+FIELDS = ["rate", "achieved", "throttles", "lag_mean", "lag_max", "lag_end", "lag_growth", "backlog_end",
+          "ingested", "status"]
+
+def _interval(seconds):
+    hours, rest = divmod(max(seconds, 0.0), 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{int(hours):02d}:{int(minutes):02d}:{seconds:09.6f}"
+
+class SimulatedMaterialize:
+    """Ingestion model of a Materialize cluster over the fake hubs, served through loadgen.pgstub
+
+    Every source queues the events its hub accepts; the cluster works through
+    both queues, oldest first, at capacity events/s. A source lags by delay
+    plus the age of its oldest unprocessed event, so the lag stays near delay
+    while the cluster keeps up and grows once it does not. Views trail their
+    source by view_delay.
+    """
+
+    SOURCES = {"orders_raw": ORDERS_TOPIC, "customers_raw": CUSTOMERS_TOPIC}
+    VIEWS = {"orders": "orders_raw", "customers": "customers_raw"}
+
+    def __init__(self, backend, capacity, delay=1.0, view_delay=0.2):
+        self.capacity = capacity
+        self.delay = delay
+        self.view_delay = view_delay
+        self.queues = {name: deque() for name in self.SOURCES}  # [arrival time, events left]
+        self.received = dict.fromkeys(self.SOURCES, 0)
+        self.bytes = dict.fromkeys(self.SOURCES, 0)
+        self.committed = dict.fromkeys(self.SOURCES, 0)
+        self.budget = 0.0
+        self.advanced_at = time.time()
+        for name, topic in self.SOURCES.items():
+            backend.hub(topic).listeners.append(partial(self.on_events, name))
+
+    def on_events(self, name, partition_id, partition_key, events):
+        self.queues[name].append([time.time(), len(events)])
+        self.received[name] += len(events)
+        self.bytes[name] += sum(len(event.body) for event in events)
+
+    def advance(self):
+        """Process the events capacity allowed since the last call; returns the current time"""
+        now = time.time()
+        self.budget += (now - self.advanced_at) * self.capacity
+        self.advanced_at = now
+        while self.budget >= 1:
+            heads = [(queue[0][0], name) for name, queue in self.queues.items() if queue]
+            if not heads:
+                # An idle cluster does not bank capacity
+                self.budget = 0.0
+                break
+            name = min(heads)[1]
+            head = self.queues[name][0]
+            count = min(head[1], int(self.budget))
+            head[1] -= count
+            self.budget -= count
+            self.committed[name] += count
+            if not head[1]:
+                self.queues[name].popleft()
+        return now
+
+    def lag(self, name, now):
+        if name in self.VIEWS:
+            return self.lag(self.VIEWS[name], now) + self.view_delay
+        queue = self.queues[name]
+        return self.delay + (now - queue[0][0] if queue else 0.0)
+
+    def handler(self):
+        """pgstub handler answering the loadgen.freshness queries"""
+        from loadgen.pgstub import OBJECTS, canned
+
+        names = {object_id: name for name, (object_id, kind) in OBJECTS.items() if kind != "connection"}
+
+        def objects():
+            return [(object_id, name, kind) for name, (object_id, kind) in OBJECTS.items()]
+
+        def source_statistics():
+            self.advance()
+            return [(OBJECTS[name][0], self.received[name], self.bytes[name], self.committed[name],
+                     self.received[name], self.committed[name]) for name in self.SOURCES]
+
+        def frontiers():
+            now = self.advance()
+            return [(object_id, int((now - self.lag(name, now) - 1) * 1000), int((now - self.lag(name, now)) * 1000))
+                    for object_id, name in names.items()]
+
+        def wallclock_lag():
+            now = self.advance()
+            return [(object_id, _interval(self.lag(name, now))) for object_id, name in names.items()]
+
+        return canned([
+            (r"\bmz_objects\b", ["id", "name", "type"], objects),
+            (r"\bmz_source_statistics\b",
+             ["id", "messages_received", "bytes_received", "updates_committed", "offset_known", "offset_committed"],
+             source_statistics),
+            (r"\bmz_frontiers\b", ["object_id", "read_frontier", "write_frontier"], frontiers),
+            (r"\bmz_wallclock_global_lag\b", ["object_id", "lag"], wallclock_lag),
+        ])
+
+def trend(points):
+    """Least-squares slope of (x, y) points, 0.0 for fewer than two"""
+    if len(points) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    spread = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / spread if spread else 0.0
+
+class Publishers:
+    """The fan-out order and customer streams, with generators that carry over from step to step"""
+
+    def __init__(self, backend, pool, customers, customer_share, max_in_flight, seed=None):
+        self.backend = backend
+        self.pool = pool
+        self.customer_share = customer_share
+        self.max_in_flight = max_in_flight
+        generator = ColumnarCustomerGenerator(customers, seed=seed)
+        # The customers are assumed to exist already; no snapshot is sent
+        live = LiveCustomers(customers)
+        self.orders = linked_orders(BulkOrderGenerator(seed=seed), generator, live, random.Random(seed))
+        self.updates = upsert_records(generator, make_encoder(CUSTOMER_FIELDS))
+
+    async def _orders(self, hold, stats, controller):
+        await publish_filled_batches(self.pool.get(ORDERS_TOPIC), self.orders, self.backend.EventData,
+                                     stats, controller, hold)
+        return stats.events / max(stats.elapsed(), 1e-9)
+
+    async def _customers(self, hold, stats, controller):
+        pipeline = KeyedSendPipeline(self.pool.get(CUSTOMERS_TOPIC), self.max_in_flight, stats=stats,
+                                     controller=controller)
+        await publish_keyed(pipeline, self.updates, self.backend.EventData, hold)
+        return stats.events / max(stats.elapsed(), 1e-9)
+
+    async def run(self, rate, hold):
+        """Publish at rate events/s for hold seconds; returns (events/s achieved, throttles)"""
+        streams, controllers = [], []
+        for stream, stream_rate in ((self._orders, rate * (1 - self.customer_share)),
+                                    (self._customers, rate * self.customer_share)):
+            if stream_rate > 0:
+                controllers.append(RateController(stream_rate))
+                # Each stream's rate is taken when it finishes, not when the slower one does
+                streams.append(stream(hold, PublishStats(), controllers[-1]))
+        achieved = await asyncio.gather(*streams)
+        return sum(achieved), sum(controller.throttles for controller in controllers)
+
+async def sample_lag(monitor, hold, settle, interval):
+    """Poll every interval seconds for hold seconds; (seconds into the step, lag, backlog, ingest rate) per poll"""
+    samples = []
+    started = time.monotonic()
+    while time.monotonic() - started < hold:
+        polled_at = time.monotonic()
+        try:
+            polled = await monitor.poll()
+        except (OSError, ConnectionError, asyncio.IncompleteReadError) as e:
+            print(f"⚠️  Poll failed: {e}")
+            polled = []
+        lags = [sample["freshness_lag"] if sample["freshness_lag"] is not None else sample["wallclock_lag"]
+                for sample in polled]
+        lags = [lag for lag in lags if lag is not None]
+        if lags and polled_at - started >= settle:
+            sources = [sample for sample in polled if sample["type"] == "source"]
+            samples.append((polled_at - started, max(lags),
+                            sum(sample["offset_lag"] or 0 for sample in sources),
+                            sum(sample["messages_per_sec"] or 0 for sample in sources)))
+        await asyncio.sleep(max(0.0, interval - (time.monotonic() - polled_at)))
+    return samples
+
+def evaluate(rate, achieved, throttles, samples, max_growth, max_lag):
+    """One point of the curve"""
+    step = dict.fromkeys(FIELDS)
+    step.update(rate=round(rate, 1), achieved=round(achieved, 1), throttles=throttles)
+    if not samples:
+        step["status"] = "no samples"
+        return step
+    lags = [lag for _, lag, _, _ in samples]
+    step.update(lag_mean=round(sum(lags) / len(lags), 3), lag_max=round(max(lags), 3), lag_end=round(lags[-1], 3),
+                lag_growth=round(trend([(seconds, lag) for seconds, lag, _, _ in samples]), 4),
+                backlog_end=samples[-1][2],
+                ingested=round(sum(ingested for _, _, _, ingested in samples) / len(samples), 1))
+    if step["lag_end"] > max_lag or (step["lag_growth"] > max_growth and step["lag_end"] > LAG_FLOOR):
+        step["status"] = "diverged"
+    elif achieved < rate * MIN_ACHIEVED:
+        step["status"] = "publisher-bound"
+    else:
+        step["status"] = "held"
+    return step
+
+def _seconds(value):
+    return "-" if value is None else f"{value:.2f}s"
+
+def format_step(step):
+    growth = "-" if step["lag_growth"] is None else f"{step['lag_growth']:+.3f}"
+    backlog = "-" if step["backlog_end"] is None else f"{step['backlog_end']:,}"
+    return (f"{step['rate']:>10,.0f} {step['achieved']:>10,.0f} {step['throttles']:>9} "
+            f"{_seconds(step['lag_mean']):>9} {_seconds(step['lag_end']):>9} {growth:>8} {backlog:>10}  "
+            f"{step['status']}")
+
+def write_curve(path, result):
+    """The curve as JSON, or its steps as CSV for a .csv path"""
+    with open(path, "w", newline="") as f:
+        if path.endswith(".csv"):
+            writer = csv.DictWriter(f, FIELDS)
+            writer.writeheader()
+            writer.writerows(result["steps"])
+        else:
+            json.dump(result, f, indent=2)
+
+def rate_steps(start, factor, maximum):
+    rate = start
+    while rate <= maximum:
+        yield rate
+        rate *= factor
+
+async def run(args):
+    stub = None
+    if args.simulate:
+        from loadgen.pgstub import PgStub
+
+        # The simulated hub answers quickly so that high rates stay reachable
+        backend = get_backend("fake", send_latency=0.001, capacity=args.hub_capacity)
+        database = SimulatedMaterialize(backend, args.db_capacity, args.db_delay)
+        stub = await PgStub(database.handler()).start()
+        dsn = stub.dsn
+    else:
+        require_unpacked("saturation")
+        backend = get_backend(args.backend)
+        dsn = args.dsn
+
+    print("📈 Saturation finder")
+    print("=" * 40)
+    for topic in (ORDERS_TOPIC, CUSTOMERS_TOPIC):
+        print(f"Target: {backend.describe(topic)}")
+    print(f"Lag from: {'simulated Materialize, ' if args.simulate else ''}{dsn.split('@')[-1]}")
+    if args.simulate:
+        print(f"Simulated cluster: {args.db_capacity:,.0f} events/s, {args.db_delay:.1f}s base lag")
+    print(f"Steps: {args.start_rate:,.0f} events/s x{args.step_factor:g} up to {args.max_rate:,.0f}, "
+          f"{args.hold:.0f}s each, {args.customer_share:.0%} customer upserts")
+    print()
+    print(f"{'rate/s':>10} {'achieved':>10} {'throttles':>9} {'lag mean':>9} {'lag end':>9} {'growth':>8} "
+          f"{'backlog':>10}  status")
+
+    pool = Pool(dsn, size=1)
+    monitor = FreshnessMonitor(pool, args.objects)
+    steps = []
+    try:
+        async with ProducerPool(backend) as producers:
+            publishers = Publishers(backend, producers, args.customers, args.customer_share, args.max_in_flight,
+                                    args.seed)
+            for rate in rate_steps(args.start_rate, args.step_factor, args.max_rate):
+                sampling = asyncio.create_task(sample_lag(monitor, args.hold, args.settle, args.interval))
+                try:
+                    achieved, throttles = await publishers.run(rate, args.hold)
+                finally:
+                    samples = await sampling
+                step = evaluate(rate, achieved, throttles, samples, args.max_lag_growth, args.max_lag)
+                steps.append(step)
+                print(format_step(step))
+                if step["status"] != "held":
+                    break
+    finally:
+        await pool.close()
+        if stub:
+            await stub.close()
+
+    held = [step for step in steps if step["status"] == "held"]
+    sustainable = max((step["achieved"] for step in held), default=None)
+    result = {"sustainable_rate": sustainable, "max_lag_growth": args.max_lag_growth, "max_lag": args.max_lag,
+              "simulated": args.simulate, "steps": steps}
+    print()
+    last = steps[-1] if steps else None
+    if sustainable is None:
+        print(f"❌ No step held; lower --start-rate (first step: {last['status'] if last else 'none run'})")
+    else:
+        print(f"✅ Sustainable maximum: {sustainable:,.0f} events/s "
+              f"(lag mean {held[-1]['lag_mean']:.2f}s at {held[-1]['rate']:,.0f}/s)")
+        if last["status"] == "diverged":
+            print(f"📊 Lag diverged at {last['rate']:,.0f} events/s "
+                  f"({last['lag_growth']:+.3f} s/s, {last['lag_end']:.2f}s at the end of the step)")
+        elif last["status"] == "publisher-bound":
+            print(f"⚠️  Publishers reached only {last['achieved']:,.0f} of {last['rate']:,.0f} events/s "
+                  f"({last['throttles']} throttles); the hub or this process is the limit, not Materialize")
+        else:
+            print(f"⚠️  Lag never diverged up to {last['rate']:,.0f} events/s; raise --max-rate")
+    if args.output:
+        write_curve(args.output, result)
+        print(f"📄 Curve written to {args.output}")
+    return result
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Ramp the publish rate in steps until Materialize's lag diverges")
+    parser.add_argument("--start-rate", type=float, default=1000.0, help="events/s of the first step (default: 1000)")
+    parser.add_argument("--step-factor", type=float, default=1.5,
+                        help="rate multiplier from one step to the next (default: 1.5)")
+    parser.add_argument("--max-rate", type=float, default=1_000_000.0,
+                        help="stop after the step at or below this rate (default: 1000000)")
+    parser.add_argument("--hold", type=float, default=30.0, help="seconds each rate is held (default: 30)")
+    parser.add_argument("--settle", type=float, default=5.0,
+                        help="seconds at the start of a step left out of its lag trend (default: 5)")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between lag polls (default: 1)")
+    parser.add_argument("--max-lag-growth", type=float, default=0.05,
+                        help="lag growth in seconds per second that counts as diverging (default: 0.05)")
+    parser.add_argument("--max-lag", type=float, default=60.0,
+                        help="lag in seconds that counts as diverging whatever its trend (default: 60)")
+    parser.add_argument("--customer-share", type=float, default=0.2,
+                        help="fraction of each step's rate sent as customer upserts (default: 0.2)")
+    parser.add_argument("--customers", type=int, default=100_000, help="customer keys (default: 100000)")
+    parser.add_argument("--max-in-flight", type=int, default=8,
+                        help="concurrent customer sends across keys (default: 8)")
+    parser.add_argument("--objects", nargs="+", default=DEFAULT_OBJECTS,
+                        help=f"sources and views whose lag is sampled (default: {' '.join(DEFAULT_OBJECTS)})")
+    parser.add_argument("--seed", type=int, default=None, help="seed the generators for a repeatable run")
+    parser.add_argument("--backend", default=None,
+                        help="producer backend: eventhubs, kafka or fake (default: LOADGEN_PRODUCER_BACKEND)")
+    parser.add_argument("--dsn", default=default_dsn(),
+                        help="connection URL (default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="publish into the fake hub and sample lag from an in-process simulated cluster")
+    parser.add_argument("--hub-capacity", type=float, default=None,
+                        help="events/s each simulated hub accepts before throttling (default: unlimited)")
+    parser.add_argument("--db-capacity", type=float, default=20_000.0,
+                        help="events/s the simulated cluster ingests (default: 20000)")
+    parser.add_argument("--db-delay", type=float, default=1.0,
+                        help="lag in seconds of the simulated cluster while it keeps up (default: 1)")
+    parser.add_argument("--output", metavar="PATH", help="write the curve to PATH (JSON, or CSV for .csv)")
+    args = parser.parse_args(argv)
+    if args.step_factor <= 1:
+        parser.error("--step-factor must be greater than 1")
+    if not 0 <= args.customer_share <= 1:
+        parser.error("--customer-share must be between 0 and 1")
+    if args.settle >= args.hold:
+        parser.error("--settle must be shorter than --hold")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        asyncio.run(run(args))
+    except KeyboardInterrupt:
+        pass
+    except (OSError, PgError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Record schemas published to the orders and customers Event Hubs
+
+Field order matches the records built by the generators, and the types are
+the casts applied by the views, whose DDL (setup-multi-topic-connection.sql
+and its protobuf variant) is generated from these tuples by loadgen.ddl.
+"""
+
+ORDER_FIELDS = (
+    ("order_id", "text"),
+    ("customer_name", "text"),
+    ("product_id", "text"),
+    ("product_name", "text"),
+    ("unit_price", "double"),
+    ("quantity", "int"),
+    ("total_amount", "double"),
+    ("status", "text"),
+    ("created_at", "text"),
+    ("region", "text"),
+)
+
+# Orders from the fan-out publisher (loadgen.fanout) also reference a live
+# customer, so the orders and customers views can be joined
+LINKED_ORDER_FIELDS = ORDER_FIELDS + (("customer_id", "text"),)
+
+CUSTOMER_FIELDS = (
+    ("customer_id", "text"),
+    ("first_name", "text"),
+    ("last_name", "text"),
+    ("email", "text"),
+    ("phone", "text"),
+    ("address", "text"),
+    ("city", "text"),
+    ("state", "text"),
+    ("zip_code", "text"),
+    ("tier", "text"),
+    ("status", "text"),
+    ("total_orders", "int"),
+    ("lifetime_value", "double"),
+    ("last_order_date", "text"),
+    ("created_at", "text"),
+    ("updated_at", "text"),
+)
+
@@ -0,0 +1,199 @@
+"""Fast JSON encoding for fixed-schema records
+
+The "template" backend splices pre-encoded key fragments with per-value
+encoders and produces exactly the bytes of json.dumps(record).encode(), at
+roughly half the CPU cost. The "orjson" backend is several times faster again
+but emits compact separators; Materialize parses both identically. Pick the
+backend per encoder or with LOADGEN_JSON_BACKEND.
+
+make_encoder() also offers the binary protobuf format (loadgen.protobuf),
+selected with LOADGEN_PAYLOAD_FORMAT=protobuf; its topics need the sources from
+setup-multi-topic-connection-protobuf.sql.
+
+make_packer() packs many JSON records into one event, as a JSON array or as
+NDJSON (LOADGEN_PACKING=array or ndjson), up to LOADGEN_PACK_BYTES per event.
+Per-message framing and per-event billing are then paid once per pack; the
+views of setup-multi-topic-connection-array.sql and -ndjson.sql unnest the
+packs into the usual orders and customers rows.
+"""
+
+import json
+import os
+import zlib
+from json.encoder import encode_basestring_ascii
+
+DEFAULT_BACKEND = os.getenv("LOADGEN_JSON_BACKEND", "template")
+DEFAULT_FORMAT = os.getenv("LOADGEN_PAYLOAD_FORMAT", "json")
+
+PAYLOAD_FORMATS = ("json", "protobuf")
+
+DEFAULT_PACKING = os.getenv("LOADGEN_PACKING", "none")
+# Event Hubs bills ingress per 64 KB unit, so larger packs only save framing
+DEFAULT_PACK_BYTES = int(os.getenv("LOADGEN_PACK_BYTES", 64 * 1024))
+
+PACKINGS = ("none", "array", "ndjson")
+
+def make_encoder(fields, payload_format=None, backend=None):
+    """Encoder for fields in payload_format (json or protobuf); backend picks the JSON encoder"""
+    payload_format = payload_format or DEFAULT_FORMAT
+    if payload_format == "json":
+        return RecordEncoder(fields, backend)
+    if payload_format == "protobuf":
+        from loadgen.protobuf import ProtobufEncoder
+        return ProtobufEncoder(fields)
+    raise ValueError(f"Unknown payload format: {payload_format}")
+
+def _encode_null(value):
+    return "null"
+
+def _encode_bool(value):
+    return "true" if value else "false"
+
+_INFINITY = float("inf")
+
+def _encode_float(value, _repr=float.__repr__):
+    # json.dumps spells the non-finite values NaN, Infinity and -Infinity; repr gives nan and inf
+    if value != value:
+        return "NaN"
+    if value == _INFINITY:
+        return "Infinity"
+    if value == -_INFINITY:
+        return "-Infinity"
+    return _repr(value)
+
+# Same value encodings json.dumps uses with its default arguments
+VALUE_ENCODERS = {
+    str: encode_basestring_ascii,
+    int: int.__repr__,
+    float: _encode_float,
+    bool: _encode_bool,
+    type(None): _encode_null,
+}
+
+class RecordEncoder:
+    """Encode records with a fixed key set to JSON bytes
+
+    fields is a schema tuple from loadgen.schema. Records with a different
+    number of keys fall back to json.dumps so extra fields are never dropped.
+    """
+
+    def __init__(self, fields, backend=None):
+        self.backend = backend or DEFAULT_BACKEND
+        self.names = [name for name, _ in fields]
+        self.fragments = [
+            ("{" if i == 0 else ", ") + json.dumps(name) + ": "
+            for i, name in enumerate(self.names)
+        ]
+        self.pairs = list(zip(self.names, self.fragments))
+
+        if self.backend == "template":
+            self.encode = self._encode_template
+        elif self.backend == "orjson":
+            import orjson
+            self.encode = orjson.dumps
+        elif self.backend == "json":
+            self.encode = self._encode_json
+        else:
+            raise ValueError(f"Unknown JSON backend: {self.backend}")
+
+    @staticmethod
+    def _encode_json(record):
+        return json.dumps(record).encode()
+
+    def _encode_template(self, record):
+        if len(record) != len(self.names):
+            return json.dumps(record).encode()
+        parts = []
+        append = parts.append
+        encoders = VALUE_ENCODERS
+        for name, fragment in self.pairs:
+            value = record[name]
+            append(fragment)
+            encoder = encoders.get(type(value))
+            append(encoder(value) if encoder else json.dumps(value))
+        append("}")
+        return "".join(parts).encode()
+
+class PackedPayload(bytes):
+    """Event body holding several records; records is how many"""
+
+    records = 1
+
+class Packer:
+    """Pack JSON record payloads into event bodies of at most max_bytes
+
+    mode "array" writes a JSON array, "ndjson" one record per line. A record
+    larger than max_bytes is packed on its own. Keyed records are packed per
+    group: group(key) maps every key to one of groups partition keys, so a
+    key's records keep their order in one partition.
+    """
+
+    def __init__(self, mode, max_bytes=None, groups=32):
+        if mode not in ("array", "ndjson"):
+            raise ValueError(f"Unknown packing: {mode}")
+        self.mode = mode
+        self.max_bytes = max_bytes or DEFAULT_PACK_BYTES
+        self.groups = groups
+        self.separator = b"," if mode == "array" else b"\n"
+        # Bytes added around the records: the brackets of an array
+        self.framing = 2 if mode == "array" else 0
+
+    def group(self, key):
+        return f"pack-{zlib.crc32(key.encode()) % self.groups}"
+
+    def _body(self, records):
+        body = self.separator.join(records)
+        packed = PackedPayload(b"[" + body + b"]" if self.mode == "array" else body)
+        packed.records = len(records)
+        return packed
+
+    def take(self, queue):
+        """Pack payloads popped from the front of a deque"""
+        records = []
+        size = self.framing
+        while queue:
+            record = queue[0]
+            if isinstance(record, str):
+                record = record.encode()
+            if records and size + len(record) + 1 > self.max_bytes:
+                break
+            queue.popleft()
+            records.append(record)
+            size += len(record) + 1
+        return self._body(records)
+
+    def pack(self, payloads):
+        """Iterator of packed bodies over an iterator of payloads"""
+        records = []
+        size = self.framing
+        for record in payloads:
+            if isinstance(record, str):
+                record = record.encode()
+            if records and size + len(record) + 1 > self.max_bytes:
+                yield self._body(records)
+                records = []
+                size = self.framing
+            records.append(record)
+            size += len(record) + 1
+        if records:
+            yield self._body(records)
+
+def make_packer(packing=None, payload_format=None, max_bytes=None):
+    """Packer for packing (array or ndjson), None for one record per event"""
+    packing = packing or DEFAULT_PACKING
+    if packing == "none":
+        return None
+    if (payload_format or DEFAULT_FORMAT) != "json":
+        raise ValueError("Packed payloads need the json payload format")
+    return Packer(packing, max_bytes)
+
+def require_unpacked(tool, packing=None):
+    """Raise ValueError if packing (default: LOADGEN_PACKING) is on, for a tool that sends one record per event
+
+    The array views cannot unnest a bare record, and the packed customers view
+    orders a key's updates by offset, which only holds if all of them are packed.
+    """
+    packing = packing or DEFAULT_PACKING
+    if packing != "none":
+        raise ValueError(f"{tool} sends one record per event, which the packed ({packing}) views cannot "
+                         f"read; unset LOADGEN_PACKING")
@@ -0,0 +1,351 @@
+"""Run the setup and verification SQL files over pooled pgwire connections
+
+Replaces the psql invocations: each file is split into statements (quotes,
+dollar quotes and comments respected), ${VAR} references are filled in from
+the environment, and the statements run in file order with one relaxation:
+consecutive read-only statements (SELECT, SHOW, EXPLAIN, ...) run
+concurrently over the pool. Anything else, DDL included, waits for the queries
+before it and runs alone. SET and RESET are applied to every pooled session.
+A BEGIN (or START TRANSACTION) and everything up to its COMMIT or ROLLBACK run
+in order on one connection, SET included. psql meta-commands such as \\d are
+skipped.
+
+Every statement is timed from the moment it has a connection. The report
+lists status, latency and row count per statement (labelled with the comment
+above it), prints the first rows of each result, and can be written as JSON.
+The exit status is 1 if any statement failed. Instead of sleeping after
+kubectl port-forward, the runner retries the connection for up to --wait
+seconds.
+
+    cd scripts && python3 -m loadgen.sqlrun verify-upserts.sql verify-multi-topic-data.sql --json report.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+from collections import namedtuple
+from contextlib import AsyncExitStack
+
+from loadgen.pgwire import Connection, PgError, Pool, default_dsn
+
+Statement = namedtuple("Statement", ["path", "line", "label", "sql", "kind"])
+
+READ_ONLY = {"select", "with", "show", "explain", "values", "table"}
+SESSION = {"set", "reset"}
+TRANSACTION = {"begin", "start", "commit", "rollback", "end", "abort"}
+
+_DOLLAR_TAG = re.compile(r"\$([A-Za-z_][A-Za-z0-9_]*)?\$")
+_VARIABLE = re.compile(r"\$\{([A-Za-z_][A-Za-z0-9_]*)\}")
+
+def statement_kind(sql):
+    """query (read-only), session, transaction, meta or command"""
+    if sql.startswith("\\"):
+        return "meta"
+    first = re.match(r"[A-Za-z]*", sql).group().lower()
+    if first in READ_ONLY:
+        return "query"
+    if first in SESSION:
+        return "session"
+    if first in TRANSACTION:
+        return "transaction"
+    return "command"
+
+def ends_transaction(statement):
+    """True for COMMIT, ROLLBACK (but not ROLLBACK TO a savepoint), END and ABORT"""
+    words = statement.sql.lower().split()
+    if statement.kind != "transaction" or words[0] in ("begin", "start"):
+        return False
+    return not (words[0] == "rollback" and "to" in words[1:3])
+
+def transaction_blocks(statements):
+    """Statements in order, with each BEGIN ... COMMIT run gathered into a list"""
+    block = None
+    for statement in statements:
+        if block is not None:
+            block.append(statement)
+            if ends_transaction(statement):
+                yield block
+                block = None
+        elif statement.kind == "transaction" and not ends_transaction(statement):
+            block = [statement]
+        else:
+            yield statement
+    if block is not None:
+        yield block
+
+def split_statements(text, path="<sql>"):
+    """Split SQL text into Statements at top-level semicolons
+
+    The label of a statement is the last -- comment line before it, or its
+    own first line.
+    """
+    statements = []
+    i = 0
+    n = len(text)
+    line = 1
+    start = None  # offset where the current statement's text begins
+    start_line = 1
+    comment = None
+
+    def finish(end):
+        sql = text[start:end].strip()
+        if sql:
+            label = comment or sql.splitlines()[0].strip()
+            statements.append(Statement(path, start_line, label, sql, statement_kind(sql)))
+
+    while i < n:
+        ch = text[i]
+        if ch == "\n":
+            line += 1
+            i += 1
+        elif ch.isspace():
+            i += 1
+        elif text.startswith("--", i):
+            end = text.find("\n", i)
+            end = n if end < 0 else end
+            if start is None:
+                comment = text[i + 2:end].strip() or comment
+            i = end
+        elif text.startswith("/*", i):
+            end = text.find("*/", i + 2)
+            end = n if end < 0 else end + 2
+            line += text.count("\n", i, end)
+            i = end
+        elif start is None and ch == "\\":
+            # psql meta-command: runs to the end of the line
+            end = text.find("\n", i)
+            end = n if end < 0 else end
+            start, start_line = i, line
+            finish(end)
+            start, comment = None, None
+            i = end
+        else:
+            if start is None:
+                start, start_line = i, line
+            if ch == ";":
+                finish(i)
+                start, comment = None, None
+                i += 1
+            elif ch in "'\"":
+                # Quoted literal or identifier; a doubled quote is an escaped one
+                end = i + 1
+                while True:
+                    end = text.find(ch, end)
+                    if end < 0:
+                        end = n
+                        break
+                    if text.startswith(ch, end + 1):
+                        end += 2
+                        continue
+                    end += 1
+                    break
+                line += text.count("\n", i, end)
+                i = end
+            elif ch == "$" and _DOLLAR_TAG.match(text, i):
+                tag = _DOLLAR_TAG.match(text, i).group()
+                end = text.find(tag, i + len(tag))
+                end = n if end < 0 else end + len(tag)
+                line += text.count("\n", i, end)
+                i = end
+            else:
+                i += 1
+    if start is not None:
+        finish(n)
+    return statements
+
+def substitute(sql, environ=None):
+    """Replace ${VAR} with its value from environ; bare $words such as '$ConnectionString' are kept"""
+    environ = os.environ if environ is None else environ
+
+    def replace(match):
+        name = match.group(1)
+        if name not in environ:
+            raise KeyError(f"environment variable {name} is not set")
+        return environ[name]
+
+    return _VARIABLE.sub(replace, sql)
+
+async def wait_for_server(dsn, timeout):
+    """Retry connecting until the server (or the port-forward) accepts connections"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            conn = await Connection.connect(dsn)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+            if time.monotonic() >= deadline:
+                raise
+            await asyncio.sleep(0.25)
+        else:
+            await conn.close()
+            return
+
+async def run_statement(pool, statement, max_rows, environ=None, conn=None):
+    """Execute one statement, on conn if given, and return its outcome as a dict"""
+    outcome = {"file": statement.path, "line": statement.line, "label": statement.label, "kind": statement.kind,
+               "status": "ok", "seconds": 0.0, "queued_seconds": 0.0, "rows": None, "tag": None}
+    if statement.kind == "meta":
+        outcome["status"] = "skipped"
+        outcome["error"] = "psql meta-command"
+        return outcome
+    queued = time.perf_counter()
+    start = None
+    try:
+        sql = substitute(statement.sql, environ)
+        if conn is not None:
+            start = time.perf_counter()
+            results = await conn.query(sql)
+        elif statement.kind == "session":
+            start = time.perf_counter()
+            results = await broadcast(pool, sql)
+        else:
+            async with pool.acquire() as pooled:
+                # Latency excludes the wait for a free connection
+                start = time.perf_counter()
+                results = await pooled.query(sql)
+    except (PgError, KeyError) as e:
+        outcome["status"] = "error"
+        outcome["error"] = e.args[0] if isinstance(e, KeyError) else str(e)
+        return outcome
+    finally:
+        end = time.perf_counter()
+        outcome["queued_seconds"] = (start or end) - queued
+        outcome["seconds"] = end - (start or end)
+    if results:
+        result = results[-1]
+        outcome["tag"] = result.tag
+        if result.columns is not None:
+            outcome["rows"] = len(result.rows)
+            outcome["columns"] = result.columns
+            outcome["sample"] = [list(row) for row in result.rows[:max_rows]]
+    return outcome
+
+async def broadcast(pool, sql):
+    """Run a session statement on every connection of the pool"""
+    async with AsyncExitStack() as stack:
+        connections = [await stack.enter_async_context(pool.acquire()) for _ in range(pool.size)]
+        results = [await conn.query(sql) for conn in connections]
+    return results[0]
+
+async def run_statements(pool, statements, max_rows=20, environ=None):
+    """Run statements in order, overlapping consecutive read-only queries
+
+    Transaction blocks run alone, each on one connection.
+    """
+    outcomes = []
+    group = []
+
+    async def drain():
+        outcomes.extend(await asyncio.gather(*(run_statement(pool, s, max_rows, environ) for s in group)))
+        group.clear()
+
+    for item in transaction_blocks(statements):
+        if isinstance(item, list):
+            await drain()
+            async with pool.acquire() as conn:
+                for statement in item:
+                    outcomes.append(await run_statement(pool, statement, max_rows, environ, conn))
+            continue
+        if item.kind == "query":
+            group.append(item)
+            continue
+        await drain()
+        outcomes.append(await run_statement(pool, item, max_rows, environ))
+    await drain()
+    return outcomes
+
+def format_table(columns, rows, indent="     "):
+    """Aligned text rendering of a result sample"""
+    cells = [columns] + [["NULL" if value is None else value for value in row] for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(columns))]
+    lines = [" | ".join(value.ljust(width) for value, width in zip(row, widths)).rstrip() for row in cells]
+    lines.insert(1, "-+-".join("-" * width for width in widths))
+    return [indent + line for line in lines]
+
+def print_report(outcomes, elapsed, show_rows=True):
+    icons = {"ok": "✅", "error": "❌", "skipped": "⏭️ "}
+    path = None
+    for outcome in outcomes:
+        if outcome["file"] != path:
+            path = outcome["file"]
+            print(f"\n📄 {path}")
+        detail = outcome.get("error") or outcome["tag"] or ""
+        if outcome["rows"] is not None:
+            detail = f"{outcome['rows']} row{'' if outcome['rows'] == 1 else 's'}"
+        print(f"  {icons[outcome['status']]} L{outcome['line']:<4} {outcome['seconds'] * 1000:8.1f} ms  "
+              f"{outcome['label'][:60]:<60}  {detail}")
+        if show_rows and outcome.get("sample"):
+            for line in format_table(outcome["columns"], outcome["sample"]):
+                print(line)
+            if outcome["rows"] > len(outcome["sample"]):
+                print(f"     ... {outcome['rows'] - len(outcome['sample'])} more")
+
+    summary = report_summary(outcomes, elapsed)
+    print(f"\n⏱️  {summary['statements']} statements in {elapsed:.2f} s "
+          f"(query time {summary['query_seconds']:.2f} s, {summary['overlap']:.1f}x overlap); "
+          f"{summary['failed']} failed, {summary['skipped']} skipped")
+
+def report_summary(outcomes, elapsed):
+    query_seconds = sum(outcome["seconds"] for outcome in outcomes)
+    return {
+        "statements": len(outcomes),
+        "failed": sum(outcome["status"] == "error" for outcome in outcomes),
+        "skipped": sum(outcome["status"] == "skipped" for outcome in outcomes),
+        "elapsed": elapsed,
+        "query_seconds": query_seconds,
+        "overlap": query_seconds / elapsed if elapsed else 0.0,
+    }
+
+async def run(args):
+    statements = []
+    for path in args.files:
+        with open(path) as f:
+            statements.extend(split_statements(f.read(), path))
+    if args.serial:
+        statements = [s._replace(kind="command") if s.kind == "query" else s for s in statements]
+
+    await wait_for_server(args.dsn, args.wait)
+    pool = Pool(args.dsn, size=args.concurrency)
+    try:
+        start = time.perf_counter()
+        outcomes = await run_statements(pool, statements, args.max_rows)
+        elapsed = time.perf_counter() - start
+    finally:
+        await pool.close()
+    return outcomes, elapsed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Run SQL files against Materialize with concurrent read-only queries")
+    parser.add_argument("files", nargs="+", help="SQL files, run in the order given")
+    parser.add_argument("--dsn", default=default_dsn(),
+                        help="connection URL (default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+    parser.add_argument("--concurrency", type=int, default=4, help="pooled connections (default: 4)")
+    parser.add_argument("--serial", action="store_true", help="run every statement alone, like psql")
+    parser.add_argument("--max-rows", type=int, default=20,
+                        help="rows printed and reported per result (default: 20)")
+    parser.add_argument("--quiet", action="store_true", help="print timings only, no result rows")
+    parser.add_argument("--wait", type=float, default=30.0,
+                        help="seconds to keep retrying the first connection (default: 30)")
+    parser.add_argument("--json", metavar="PATH", help="also write the report to PATH as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        outcomes, elapsed = asyncio.run(run(args))
+    except (OSError, ConnectionError, asyncio.TimeoutError, PgError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    print_report(outcomes, elapsed, show_rows=not args.quiet)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"summary": report_summary(outcomes, elapsed), "statements": outcomes}, f, indent=2)
+    if any(outcome["status"] == "error" for outcome in outcomes):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Start-up time benchmark of python3 -m loadgen
+
+Each case is a fresh interpreter, run --runs times, timed from spawn to exit:
+bare interpreter start, --help of the entry point and of every command (how
+fast a misconfigured Job fails), and the smoke command sending its order to
+the fake backend. One extra run under -X importtime counts the modules each
+case imports, lists the slowest top-level imports and flags cases that load
+azure-eventhub, which should happen only once a producer is created.
+
+    cd scripts && python3 -m loadgen.startup --runs 20
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from loadgen.cli import COMMANDS
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def cases():
+    """(label, interpreter arguments, extra environment) of every case"""
+    fake = {"LOADGEN_PRODUCER_BACKEND": "fake"}
+    yield "interpreter", ["-c", "pass"], {}
+    yield "loadgen --help", ["-m", "loadgen", "--help"], {}
+    for name in COMMANDS:
+        yield f"{name} --help", ["-m", "loadgen", name, "--help"], {}
+    yield "smoke (fake backend)", ["-m", "loadgen", "smoke"], fake
+    yield "test-publish.py (fake backend)", ["test-publish.py"], fake
+
+def _run(arguments, env):
+    return subprocess.run([sys.executable, *arguments], cwd=SCRIPTS_DIR, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+
+def parse_importtime(text):
+    """(module, cumulative seconds, depth) for each line of -X importtime output"""
+    imports = []
+    for line in text.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), int(cumulative) / 1e6, depth))
+    return imports
+
+def measure(label, arguments, extra_env, runs):
+    env = dict(os.environ, **extra_env)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        completed = _run(arguments, env)
+        times.append(time.perf_counter() - start)
+        if completed.returncode:
+            raise RuntimeError(f"{label} exited with {completed.returncode}: {completed.stderr.strip()[-200:]}")
+    imports = parse_importtime(_run(["-X", "importtime", *arguments], env).stderr)
+    top_level = sorted((i for i in imports if i[2] == 0), key=lambda i: -i[1])
+    return {
+        "case": label,
+        "runs": runs,
+        "min_ms": min(times) * 1000,
+        "median_ms": statistics.median(times) * 1000,
+        "max_ms": max(times) * 1000,
+        "modules": len(imports),
+        "loadgen_modules": sorted(name for name, _, _ in imports if name.startswith("loadgen.")),
+        "imports_sdk": any(name.startswith("azure") for name, _, _ in imports),
+        "slowest_imports": [(name, seconds * 1000) for name, seconds, _ in top_level[:3]],
+    }
+
+def sdk_import_ms():
+    """Import time of azure-eventhub's async client, None if it is not installed"""
+    completed = _run(["-X", "importtime", "-c", "import azure.eventhub.aio"], dict(os.environ))
+    if completed.returncode:
+        return None
+    imports = parse_importtime(completed.stderr)
+    return sum(seconds for name, seconds, depth in imports if depth == 0) * 1000
+
+def print_result(result, show_imports):
+    sdk = "  ⚠️  imports azure-eventhub" if result["imports_sdk"] else ""
+    print(f"  {result['case']:<32} {result['min_ms']:7.1f} ms min {result['median_ms']:7.1f} ms median "
+          f"{result['modules']:5d} modules{sdk}")
+    if show_imports:
+        print("      " + ", ".join(f"{name} {ms:.1f} ms" for name, ms in result["slowest_imports"]))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the start-up time of the loadgen commands")
+    parser.add_argument("--runs", type=int, default=10, help="interpreter starts per case (default: 10)")
+    parser.add_argument("--imports", action="store_true", help="list the slowest top-level imports of each case")
+    parser.add_argument("--json", metavar="PATH", help="also write the results to PATH as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    print(f"⏱️  Start-up time over {args.runs} runs ({sys.executable})")
+    results = []
+    try:
+        for label, arguments, extra_env in cases():
+            results.append(measure(label, arguments, extra_env, args.runs))
+            print_result(results[-1], args.imports)
+    except RuntimeError as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+    sdk_ms = sdk_import_ms()
+    if sdk_ms is None:
+        print("\nazure-eventhub is not installed; with it, only runs that create a producer pay for its import")
+    else:
+        print(f"\n📦 Importing azure-eventhub takes {sdk_ms:.1f} ms; only runs that create a producer pay for it")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"sdk_import_ms": sdk_ms, "cases": results}, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,353 @@
+"""Capture and replay of event streams
+
+A trace is an append-only file of the events sent to one topic:
+
+    header  b"LGTRACE1", topic length (u16), topic
+    record  timestamp (u64 microseconds since the start of the capture),
+            payload length (u32), key length (u16, 0xFFFF for no key),
+            key bytes, payload bytes
+
+all little-endian. A record torn by a crash mid-write is ignored on read and
+cut off before the next append. TraceReader maps the file and yields each
+payload as a memoryview slice of the mapping, so scanning and batching never
+copy; the bytes are copied once, into the EventData.
+
+Traces come from the generators (record), from a topic exported with kcat
+(import, one "key<TAB>timestamp ms<TAB>payload" line per event) and are
+published at their original pace, N times faster or as fast as possible:
+
+    cd scripts && python3 -m loadgen.trace record orders orders.trace --events 1000000 --rate 5000
+    kcat -C -b ... -t customers -e -f '%k\\t%T\\t%s\\n' | python3 -m loadgen.trace import customers customers.trace
+    cd scripts && python3 -m loadgen.trace replay orders.trace --speed 10
+"""
+
+import argparse
+import asyncio
+import mmap
+import os
+import struct
+import sys
+import time
+
+MAGIC = b"LGTRACE1"
+# Events due within this many seconds of each other are sent in one batch
+COALESCE = 0.005
+TOPIC_LENGTH = struct.Struct("<H")
+RECORD = struct.Struct("<QIH")
+NO_KEY = 0xFFFF
+
+class TraceFormatError(Exception):
+    """The file is not a trace"""
+
+def _read_header(data, path):
+    if len(data) < len(MAGIC) + TOPIC_LENGTH.size or data[:len(MAGIC)] != MAGIC:
+        raise TraceFormatError(f"{path} is not a trace file")
+    (length,) = TOPIC_LENGTH.unpack_from(data, len(MAGIC))
+    start = len(MAGIC) + TOPIC_LENGTH.size
+    return bytes(data[start:start + length]).decode(), start + length
+
+class TraceReader:
+    """Memory-mapped, read-only view of a trace
+
+    Iterating yields (timestamp_us, key, payload) with payload a memoryview
+    into the mapping; slices stay valid until close().
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise TraceFormatError(f"{path} is empty")
+        self.view = memoryview(self.map)
+        self.topic, self.data_start = _read_header(self.map, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self.view.release()
+        self.map.close()
+        self.file.close()
+
+    def __iter__(self):
+        data = self.map
+        view = self.view
+        size = len(data)
+        offset = self.data_start
+        unpack = RECORD.unpack_from
+        header = RECORD.size
+        while offset + header <= size:
+            timestamp, payload_length, key_length = unpack(data, offset)
+            key_start = offset + header
+            payload_start = key_start + (0 if key_length == NO_KEY else key_length)
+            end = payload_start + payload_length
+            if end > size:
+                break  # torn tail
+            key = None if key_length == NO_KEY else str(data[key_start:payload_start], "utf-8")
+            yield timestamp, key, view[payload_start:end]
+            offset = end
+
+    def tail(self):
+        """(offset just past the last complete record, its timestamp), reading headers only"""
+        data = self.map
+        size = len(data)
+        offset = self.data_start
+        last = 0
+        while offset + RECORD.size <= size:
+            timestamp, payload_length, key_length = RECORD.unpack_from(data, offset)
+            end = offset + RECORD.size + (0 if key_length == NO_KEY else key_length) + payload_length
+            if end > size:
+                break
+            offset, last = end, timestamp
+        return offset, last
+
+    def summary(self):
+        """Event count, payload bytes, keyed events and duration in seconds"""
+        events = payload_bytes = keyed = 0
+        last = 0
+        keys = set()
+        for timestamp, key, payload in self:
+            events += 1
+            payload_bytes += len(payload)
+            last = timestamp
+            if key is not None:
+                keyed += 1
+                keys.add(key)
+        return {"topic": self.topic, "events": events, "payload_bytes": payload_bytes,
+                "keyed": keyed, "distinct_keys": len(keys), "duration": last / 1e6}
+
+class TraceWriter:
+    """Append events to a trace, creating it with topic if it does not exist
+
+    Timestamps default to the time since the writer was opened, carried on
+    from the last record when appending to an existing trace.
+    """
+
+    def __init__(self, path, topic):
+        self.path = path
+        self.base_us = 0
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            with TraceReader(path) as reader:
+                if reader.topic != topic:
+                    raise TraceFormatError(f"{path} holds topic {reader.topic}, not {topic}")
+                end, self.base_us = reader.tail()
+            # Drop a record torn by an interrupted writer before appending
+            os.truncate(path, end)
+            self.file = open(path, "ab", buffering=1024 * 1024)
+        else:
+            self.file = open(path, "wb", buffering=1024 * 1024)
+            encoded = topic.encode()
+            self.file.write(MAGIC + TOPIC_LENGTH.pack(len(encoded)) + encoded)
+        self.topic = topic
+        self.start = time.monotonic()
+        self.events = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, payload, key=None, timestamp_us=None):
+        """Append one event; timestamp_us is relative to the start of this writer"""
+        if isinstance(payload, str):
+            payload = payload.encode()
+        if timestamp_us is None:
+            timestamp_us = int((time.monotonic() - self.start) * 1e6)
+        encoded_key = b"" if key is None else key.encode()
+        if len(encoded_key) >= NO_KEY:
+            raise ValueError("Partition key too long for a trace record")
+        self.file.write(RECORD.pack(self.base_us + timestamp_us, len(payload),
+                                    NO_KEY if key is None else len(encoded_key)))
+        self.file.write(encoded_key)
+        self.file.write(payload)
+        self.events += 1
+
+    def close(self):
+        self.file.close()
+
+def record_generated(path, topic, events, rate, customers=None, seed=None, payload_format=None):
+    """Write events generated for topic, spaced evenly at rate events/s"""
+    interval_us = 1e6 / rate
+    with TraceWriter(path, topic) as writer:
+        if topic == "orders":
+            from loadgen.orders import BulkOrderGenerator
+
+            generator = BulkOrderGenerator(seed=seed, payload_format=payload_format)
+            written = 0
+            while written < events:
+                for payload in generator.generate(min(10_000, events - written)):
+                    writer.append(payload, None, int(written * interval_us))
+                    written += 1
+        else:
+            from loadgen.customers import ColumnarCustomerGenerator
+            from loadgen.schema import CUSTOMER_FIELDS
+            from loadgen.serialization import make_encoder
+
+            generator = ColumnarCustomerGenerator(customers or 10_000, seed=seed)
+            encoder = make_encoder(CUSTOMER_FIELDS, payload_format)
+            for i in range(events):
+                customer_id, customer = generator.generate_customer_update()
+                writer.append(encoder.encode(customer), customer_id, int(i * interval_us))
+        return writer.events
+
+def import_export(lines, path, topic):
+    """Write kcat -f '%k\\t%T\\t%s\\n' lines to a trace; timestamps become relative to the first"""
+    first = None
+    with TraceWriter(path, topic) as writer:
+        for line in lines:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            key, timestamp, payload = line.split("\t", 2)
+            timestamp_ms = int(timestamp)
+            if first is None:
+                first = timestamp_ms
+            writer.append(payload, key or None, max(0, timestamp_ms - first) * 1000)
+        return writer.events
+
+async def replay(reader, producer, make_event, stats, speed=1.0, max_in_flight=8,
+                 on_report=None, report_interval=5.0):
+    """Publish a trace's events, speed times faster than captured (None: as fast as possible)
+
+    Keyed events go through a KeyedSendPipeline so each key keeps its order;
+    events without a key are sent in batches filled until the next event is
+    not yet due.
+    """
+    from loadgen.pipeline import KeyedSendPipeline, send_batch
+
+    pipeline = KeyedSendPipeline(producer, max_in_flight, stats=stats)
+    batch = await producer.create_batch()
+    start = time.monotonic()
+    last_report = start
+    try:
+        for count, (timestamp, key, payload) in enumerate(reader):
+            if speed:
+                delay = start + timestamp / 1e6 / speed - time.monotonic()
+                if delay > COALESCE:
+                    # Nothing else is due before the sleep ends; send what is ready
+                    if len(batch):
+                        await send_batch(producer, batch, stats=stats)
+                        batch = await producer.create_batch()
+                    await asyncio.sleep(delay)
+            # The view is only copied here, into the event body
+            event = make_event(bytes(payload))
+            if key is not None:
+                await pipeline.submit(key, event)
+            else:
+                try:
+                    batch.add(event)
+                except ValueError:
+                    await send_batch(producer, batch, stats=stats)
+                    batch = await producer.create_batch()
+                    batch.add(event)
+                stats.record_generated(1)
+
+            if count % 1000 == 999:
+                # Let keyed sends progress even when nothing had to wait
+                await asyncio.sleep(0)
+                now = time.monotonic()
+                if on_report and now - last_report >= report_interval:
+                    on_report(stats)
+                    last_report = now
+        if len(batch):
+            await send_batch(producer, batch, stats=stats)
+    finally:
+        await pipeline.flush()
+
+def parse_speed(value):
+    """1, 10, 0.5 or max"""
+    if value == "max":
+        return None
+    speed = float(value)
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay event traces")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="write generated events to a trace")
+    record.add_argument("topic", choices=["orders", "customers"])
+    record.add_argument("trace")
+    record.add_argument("--events", type=int, default=100_000)
+    record.add_argument("--rate", type=float, default=1000.0,
+                        help="events/s the timestamps are spaced at (default: 1000)")
+    record.add_argument("--customers", type=int, default=10_000,
+                        help="customer key space for customers traces (default: 10000)")
+    record.add_argument("--seed", type=int, default=None)
+    record.add_argument("--format", default=None, help="payload format: json or protobuf")
+
+    imported = commands.add_parser("import", help="write a kcat export read from stdin to a trace")
+    imported.add_argument("topic")
+    imported.add_argument("trace")
+
+    info = commands.add_parser("info", help="summarize a trace")
+    info.add_argument("trace")
+
+    play = commands.add_parser("replay", help="publish a trace")
+    play.add_argument("trace")
+    play.add_argument("--topic", default=None, help="topic to publish to (default: the trace's)")
+    play.add_argument("--speed", type=parse_speed, default=1.0,
+                      help="multiple of the captured pace, or max (default: 1)")
+    play.add_argument("--loop", type=int, default=1, help="replay the trace this many times (default: 1)")
+    play.add_argument("--max-in-flight", type=int, default=8)
+    play.add_argument("--backend", default=None,
+                      help="producer backend: eventhubs, kafka or fake (default: LOADGEN_PRODUCER_BACKEND or eventhubs)")
+    play.add_argument("--report-interval", type=float, default=5.0)
+    return parser.parse_args(argv)
+
+async def run_replay(args):
+    from loadgen.pipeline import PublishStats
+    from loadgen.producers import get_backend
+
+    with TraceReader(args.trace) as reader:
+        topic = args.topic or reader.topic
+        backend = get_backend(args.backend)
+        speed = f"{args.speed:g}x" if args.speed else "max speed"
+        print(f"▶️  Replaying {args.trace} to {backend.describe(topic)} at {speed}")
+        stats = PublishStats()
+        try:
+            async with backend.create_producer(topic) as producer:
+                for _ in range(args.loop):
+                    await replay(reader, producer, backend.EventData, stats, args.speed, args.max_in_flight,
+                                 on_report=lambda stats: print(stats.summary()),
+                                 report_interval=args.report_interval)
+        except (KeyboardInterrupt, asyncio.CancelledError):
+            pass
+        print(f"✅ {stats.summary()}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        run_command(args)
+    except (TraceFormatError, FileNotFoundError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+
+def run_command(args):
+    if args.command == "record":
+        count = record_generated(args.trace, args.topic, args.events, args.rate,
+                                 args.customers, args.seed, args.format)
+        print(f"📼 Recorded {count} {args.topic} events to {args.trace}")
+    elif args.command == "import":
+        count = import_export(sys.stdin, args.trace, args.topic)
+        print(f"📼 Imported {count} {args.topic} events to {args.trace}")
+    elif args.command == "info":
+        with TraceReader(args.trace) as reader:
+            summary = reader.summary()
+        print(f"📼 {args.trace}: {summary['events']} {summary['topic']} events, "
+              f"{summary['payload_bytes'] / 2**20:.1f} MiB of payload over {summary['duration']:.1f} s, "
+              f"{summary['keyed']} keyed ({summary['distinct_keys']} distinct keys)")
+    else:
+        asyncio.run(run_replay(args))
+
+if __name__ == "__main__":
+    main()
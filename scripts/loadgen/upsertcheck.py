@@ -0,0 +1,377 @@
+"""Upsert correctness under load: does the customers view converge to the last write per key?
+
+The expected state is the generator's: for every customer_id, a 64-bit digest
+of the last record written, taken from the same values the customers view
+projects (text, int and double columns of loadgen.schema compared by value,
+so 12.5 and 12.50 agree). ColumnarCustomerGenerator key spaces are held in an
+array slot per key, 8 bytes each; other key sets in a dict.
+
+The view is read in keyset-paginated chunks (ORDER BY customer_id LIMIT
+--chunk), so neither side is ever materialized in full. Keys whose row differs
+or is missing are then re-read until they match or --timeout passes; the time
+from the end of publishing until the last key matched is the time to
+convergence. Divergent keys are listed with their differing fields, rendered
+from the generator's customer_data.
+
+The checker publishes its own load and then verifies it:
+
+    cd scripts && python3 -m loadgen.upsertcheck --customers 100000 --updates 500000 --initial
+
+--simulate runs it offline: the fake producer backend feeds an in-process
+upsert view (served over loadgen.pgstub) that applies events after
+--apply-delay seconds and can drop a fraction of them with --loss.
+publish-customer-upserts.py --verify runs the same check after its updates.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import sys
+import time
+from array import array
+
+from loadgen.pgwire import PgError, Pool, Result, default_dsn, quote_literal
+from loadgen.schema import CUSTOMER_FIELDS
+
+KEY = "customer_id"
+
+_PARSERS = {"text": lambda value: value or None, "int": int, "double": float}
+
+def normalize(values, fields=CUSTOMER_FIELDS):
+    """Typed tuple of a record dict or a text row from the view, in field order
+
+    Empty text counts as NULL: protobuf payloads cannot tell them apart.
+    """
+    if isinstance(values, dict):
+        values = [values.get(name) for name, _ in fields]
+    return tuple(None if value is None else _PARSERS[sql_type](value)
+                 for value, (_, sql_type) in zip(values, fields))
+
+def record_digest(values, fields=CUSTOMER_FIELDS):
+    """Nonzero 64-bit digest of a record dict or view row"""
+    digest = hashlib.blake2b(repr(normalize(values, fields)).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") or 1
+
+class ExpectedState:
+    """customer_id -> digest of the last record written, 0 meaning never written
+
+    With index_of/key_of/size (a ColumnarCustomerGenerator key space) digests
+    live in an array('Q'); otherwise in a dict.
+    """
+
+    def __init__(self, fields=CUSTOMER_FIELDS, index_of=None, key_of=None, size=0):
+        self.fields = fields
+        self.index_of = index_of
+        self.key_of = key_of
+        self.digests = array("Q", bytes(8 * size)) if index_of else {}
+        self.written = 0
+
+    @classmethod
+    def for_generator(cls, generator, fields=CUSTOMER_FIELDS):
+        if hasattr(generator, "index_of"):
+            return cls(fields, generator.index_of, generator.customer_id, generator.num_customers)
+        return cls(fields)
+
+    @classmethod
+    def from_customers(cls, generator, fields=CUSTOMER_FIELDS):
+        """Expected state holding every record of generator.customer_data"""
+        state = cls.for_generator(generator, fields)
+        for customer_id in generator.customer_data:
+            state.record(customer_id, generator.customer_data[customer_id])
+        return state
+
+    def record(self, customer_id, record):
+        digest = record_digest(record, self.fields)
+        if self.index_of:
+            index = self.index_of(customer_id)
+            if not self.digests[index]:
+                self.written += 1
+            self.digests[index] = digest
+        else:
+            if customer_id not in self.digests:
+                self.written += 1
+            self.digests[customer_id] = digest
+
+    def get(self, customer_id):
+        if self.index_of:
+            try:
+                return self.digests[self.index_of(customer_id)]
+            except KeyError:
+                return 0
+        return self.digests.get(customer_id, 0)
+
+    def keys(self):
+        """Written keys in ascending order"""
+        if self.index_of:
+            return (self.key_of(index) for index, digest in enumerate(self.digests) if digest)
+        return iter(sorted(self.digests))
+
+    def key_range(self):
+        if self.index_of:
+            return self.key_of(0), self.key_of(len(self.digests) - 1)
+        return (min(self.digests), max(self.digests)) if self.digests else (None, None)
+
+    def __len__(self):
+        return self.written
+
+class ViewReader:
+    """Reads customer rows from the view in key order"""
+
+    def __init__(self, pool, view="customers", fields=CUSTOMER_FIELDS):
+        self.pool = pool
+        self.view = view
+        self.columns = ", ".join(name for name, _ in fields)
+        self.queries = 0
+
+    async def page(self, after, low, high, limit):
+        """Up to limit rows with low <= customer_id <= high and customer_id > after"""
+        bound = f"{KEY} > {quote_literal(after)}" if after is not None else f"{KEY} >= {quote_literal(low)}"
+        self.queries += 1
+        return await self.pool.fetch(
+            f"SELECT {self.columns} FROM {self.view} WHERE {bound} AND {KEY} <= {quote_literal(high)} "
+            f"ORDER BY {KEY} LIMIT {limit}")
+
+    async def lookup(self, keys):
+        self.queries += 1
+        return await self.pool.fetch(
+            f"SELECT {self.columns} FROM {self.view} WHERE {KEY} IN ({', '.join(map(quote_literal, keys))})")
+
+async def compare_view(reader, expected, chunk=10_000):
+    """One keyset-paginated pass over the expected key range
+
+    Returns (matched, divergent keys, unexpected rows); written keys the
+    view lacks are divergent.
+    """
+    low, high = expected.key_range()
+    matched = unexpected = 0
+    seen = set() if not expected.index_of else bytearray(len(expected.digests))
+    divergent = set()
+    after = None
+    while low is not None:
+        rows = await reader.page(after, low, high, chunk)
+        for row in rows:
+            customer_id = row[0]
+            digest = expected.get(customer_id)
+            if not digest:
+                unexpected += 1
+                continue
+            if expected.index_of:
+                seen[expected.index_of(customer_id)] = 1
+            else:
+                seen.add(customer_id)
+            if record_digest(row, expected.fields) == digest:
+                matched += 1
+            else:
+                divergent.add(customer_id)
+        if len(rows) < chunk:
+            break
+        after = rows[-1][0]
+
+    if expected.index_of:
+        divergent.update(expected.key_of(index) for index, digest in enumerate(expected.digests)
+                         if digest and not seen[index])
+    else:
+        divergent.update(key for key in expected.digests if key not in seen)
+    return matched, divergent, unexpected
+
+async def recheck(reader, expected, keys, chunk=1000):
+    """The subset of keys that still do not match"""
+    keys = sorted(keys)
+    remaining = set(keys)
+    for start in range(0, len(keys), chunk):
+        for row in await reader.lookup(keys[start:start + chunk]):
+            if record_digest(row, expected.fields) == expected.get(row[0]):
+                remaining.discard(row[0])
+    return remaining
+
+async def check_convergence(reader, expected, published_at, timeout=60.0, interval=1.0, chunk=10_000):
+    """Compare the view to expected until it matches or timeout seconds after published_at"""
+    matched, divergent, unexpected = await compare_view(reader, expected, chunk)
+    first_pass = {"matched": matched, "divergent": len(divergent), "unexpected": unexpected,
+                  "seconds": time.monotonic() - published_at}
+    while divergent and time.monotonic() - published_at < timeout:
+        await asyncio.sleep(interval)
+        divergent = await recheck(reader, expected, divergent)
+    converged = time.monotonic() - published_at if not divergent else None
+    return {"keys": len(expected), "first_pass": first_pass, "converged_after": converged,
+            "divergent": sorted(divergent), "queries": reader.queries}
+
+async def describe_divergence(reader, expected, generator, keys):
+    """Lines naming the fields in which the view differs from the generator's record"""
+    rows = {row[0]: row for row in await reader.lookup(keys)} if keys else {}
+    names = [name for name, _ in expected.fields]
+    lines = []
+    for customer_id in keys:
+        if customer_id not in rows:
+            lines.append(f"  {customer_id}: missing from the view")
+            continue
+        want = normalize(generator.customer_data[customer_id], expected.fields)
+        have = normalize(rows[customer_id], expected.fields)
+        diffs = [f"{name} {have_value!r} != {want_value!r}"
+                 for name, have_value, want_value in zip(names, have, want) if have_value != want_value]
+        lines.append(f"  {customer_id}: {'; '.join(diffs) or 'digest mismatch'}")
+    return lines
+
+async def verify(dsn, expected, generator, published_at, timeout=60.0, chunk=10_000, view="customers"):
+    """Run the convergence check and print its report; returns the report dict"""
+    pool = Pool(dsn, size=1)
+    try:
+        reader = ViewReader(pool, view, expected.fields)
+        print(f"\n🔎 Verifying {len(expected):,} keys against the {view} view...")
+        report = await check_convergence(reader, expected, published_at, timeout, chunk=chunk)
+        first = report["first_pass"]
+        print(f"📋 First pass after {first['seconds']:.2f}s: {first['matched']:,} match, "
+              f"{first['divergent']:,} divergent, {first['unexpected']:,} rows not written by this run")
+        if report["converged_after"] is not None:
+            print(f"✅ Converged {report['converged_after']:.2f}s after publishing ended "
+                  f"({report['queries']} queries)")
+        else:
+            print(f"❌ {len(report['divergent']):,} keys still divergent after {timeout:.0f}s")
+            for line in await describe_divergence(reader, expected, generator, report["divergent"][:20]):
+                print(line)
+    finally:
+        await pool.close()
+    return report
+
+class SimulatedView:
+    """In-process upsert view over the fake customers hub, served through loadgen.pgstub
+
+    Events are decoded as JSON and applied apply_delay seconds after they
+    reach the hub; a fraction loss of them is dropped.
+    """
+
+    def __init__(self, hub, fields=CUSTOMER_FIELDS, apply_delay=0.5, loss=0.0, seed=None):
+        self.fields = fields
+        self.apply_delay = apply_delay
+        self.loss = loss
+        self.random = random.Random(seed)
+        self.rows = {}
+        self.loop = asyncio.get_running_loop()
+        hub.listeners.append(self.on_events)
+
+    def on_events(self, partition_id, partition_key, events):
+        for event in events:
+            if self.loss and self.random.random() < self.loss:
+                continue
+            self.loop.call_later(self.apply_delay, self.apply, event.body)
+
+    def apply(self, body):
+        data = json.loads(body)
+        self.rows[data[KEY]] = tuple(
+            None if data.get(name) is None else str(data[name]) for name, _ in self.fields)
+
+    def handler(self, sql):
+        """Answer the ViewReader queries"""
+        keys = re.search(r"\bIN \((.*)\)", sql)
+        if keys:
+            wanted = re.findall(r"'((?:[^']|'')*)'", keys.group(1))
+            rows = [self.rows[key] for key in wanted if key in self.rows]
+        else:
+            bounds = re.search(rf"{KEY} (>=?) '((?:[^']|'')*)' AND {KEY} <= '((?:[^']|'')*)'.*LIMIT (\d+)", sql)
+            op, low, high, limit = bounds.groups()
+            keys = sorted(key for key in self.rows if (key > low if op == ">" else key >= low) and key <= high)
+            rows = [self.rows[key] for key in keys[:int(limit)]]
+        return Result([name for name, _ in self.fields], rows, f"SELECT {len(rows)}")
+
+async def run(args):
+    from loadgen.customers import ColumnarCustomerGenerator
+    from loadgen.pipeline import KeyedSendPipeline, PublishStats, publish_keyed
+    from loadgen.producers import get_backend
+    from loadgen.ratecontrol import RateController
+    from loadgen.serialization import make_encoder, require_unpacked
+
+    if not args.simulate:
+        require_unpacked("upsertcheck")
+
+    # The simulated hub answers quickly so that large runs stay short
+    backend = get_backend("fake", send_latency=0.001) if args.simulate else get_backend(args.backend)
+    generator = ColumnarCustomerGenerator(args.customers, seed=args.seed,
+                                          key_distribution_spec=args.key_distribution)
+    expected = ExpectedState.for_generator(generator)
+    encoder = make_encoder(CUSTOMER_FIELDS, "json" if args.simulate else None)
+
+    dsn = args.dsn
+    stub = None
+    if args.simulate:
+        from loadgen.pgstub import PgStub
+
+        view = SimulatedView(backend.hub("customers"), apply_delay=args.apply_delay, loss=args.loss, seed=args.seed)
+        stub = await PgStub(view.handler).start()
+        dsn = stub.dsn
+
+    def updates():
+        if args.initial:
+            for customer_id in generator.customer_data:
+                customer = generator.customer_data[customer_id]
+                expected.record(customer_id, customer)
+                yield customer_id, encoder.encode(customer)
+        for _ in range(args.updates):
+            customer_id, customer = generator.generate_customer_update()
+            # Recorded as generated; the pipeline keeps per-key order, so after
+            # the final flush this is the last write of every key
+            expected.record(customer_id, customer)
+            yield customer_id, encoder.encode(customer)
+
+    stats = PublishStats()
+    print(f"🚀 Publishing to {backend.describe('customers')}...")
+    async with backend.create_producer("customers") as producer:
+        pipeline = KeyedSendPipeline(producer, args.max_in_flight, stats=stats,
+                                     controller=RateController(args.rate))
+        await publish_keyed(pipeline, updates(), backend.EventData)
+    published_at = time.monotonic()
+    print(f"📦 {stats.summary()}")
+    print(f"🧮 Expected state: {len(expected):,} keys written")
+
+    try:
+        report = await verify(dsn, expected, generator, published_at, args.timeout, args.chunk, args.view)
+    finally:
+        if stub:
+            await stub.close()
+    return report
+
+def parse_args(argv=None):
+    from loadgen.keys import distribution_spec
+
+    parser = argparse.ArgumentParser(description="Publish customer upserts and verify the view converges to them")
+    parser.add_argument("--customers", type=int, default=100_000, help="customer key space (default: 100000)")
+    parser.add_argument("--updates", type=int, default=100_000, help="updates to publish (default: 100000)")
+    parser.add_argument("--initial", action="store_true", help="send every customer's record before the updates")
+    parser.add_argument("--key-distribution", type=distribution_spec, default="uniform",
+                        help="customers picked for updates: uniform, zipf:S or hot:F:P (default: uniform)")
+    parser.add_argument("--rate", type=float, default=None, help="target updates/s (default: unlimited)")
+    parser.add_argument("--max-in-flight", type=int, default=8)
+    parser.add_argument("--backend", default=None,
+                        help="producer backend: eventhubs, kafka or fake (default: LOADGEN_PRODUCER_BACKEND or eventhubs)")
+    parser.add_argument("--dsn", default=default_dsn(),
+                        help="connection URL (default: MATERIALIZE_URL or the localhost:6875 port-forward)")
+    parser.add_argument("--view", default="customers")
+    parser.add_argument("--chunk", type=int, default=10_000, help="rows per keyset page (default: 10000)")
+    parser.add_argument("--timeout", type=float, default=60.0,
+                        help="seconds after publishing to wait for convergence (default: 60)")
+    parser.add_argument("--simulate", action="store_true",
+                        help="publish to the fake backend and verify an in-process upsert view")
+    parser.add_argument("--apply-delay", type=float, default=0.5,
+                        help="seconds before the simulated view applies an event (default: 0.5)")
+    parser.add_argument("--loss", type=float, default=0.0, help="fraction of events the simulated view drops")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", metavar="PATH", help="also write the report to PATH as JSON")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        report = asyncio.run(run(args))
+    except (OSError, PgError, ValueError) as e:
+        print(f"❌ Error: {e}")
+        sys.exit(1)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(dict(report, divergent=report["divergent"][:1000]), f, indent=2)
+    if report["divergent"]:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+-- Generated by: cd scripts && python3 -m loadgen.ddl --packing array
+-- Setup single connection for multiple Event Hub topics, packed array payload variant
+-- For publishers run with LOADGEN_PACKING=array: every event holds many records as a JSON array.
+-- The views unnest the packs into the same rows as the one-record-per-event setup;
+-- customers keeps the last update per customer_id by Kafka offset and position in the pack.
+
+-- First, clean up existing connections and sources
+DROP SOURCE IF EXISTS customers_raw CASCADE;
+DROP SOURCE IF EXISTS orders_raw CASCADE;
+DROP CONNECTION IF EXISTS eventhubs_multi_kafka CASCADE;
+DROP CONNECTION IF EXISTS customers_eventhub_kafka CASCADE;
+DROP CONNECTION IF EXISTS eventhub_kafka CASCADE;
+DROP SECRET IF EXISTS eventhubs_namespace_connection;
+DROP SECRET IF EXISTS customers_eventhub_connection_string;
+DROP SECRET IF EXISTS eventhub_connection_string;
+
+-- Create a single secret for the namespace-level connection (no EntityPath)
+CREATE SECRET eventhubs_namespace_connection AS '${EVENTHUBS_CONNECTION_STRING}';
+
+-- Create a single Kafka connection that can access all topics
+CREATE CONNECTION eventhubs_multi_kafka TO KAFKA (
+    BROKER '${EVENTHUBS_NAMESPACE}.servicebus.windows.net:9093',
+    SASL MECHANISMS = 'PLAIN',
+    SASL USERNAME = '$ConnectionString',
+    SASL PASSWORD = SECRET eventhubs_namespace_connection,
+    SECURITY PROTOCOL = 'SASL_SSL'
+);
+
+-- Create orders source using the shared connection
+CREATE SOURCE orders_raw
+FROM KAFKA CONNECTION eventhubs_multi_kafka (TOPIC 'orders')
+FORMAT JSON;
+
+-- Create customers packed source using the same shared connection
+CREATE SOURCE customers_raw
+FROM KAFKA CONNECTION eventhubs_multi_kafka (TOPIC 'customers')
+FORMAT JSON
+INCLUDE OFFSET;
+
+-- Recreate the orders materialized view
+CREATE MATERIALIZED VIEW orders AS
+SELECT
+    (record->>'order_id')::text as order_id,
+    (record->>'customer_name')::text as customer_name,
+    (record->>'product_id')::text as product_id,
+    (record->>'product_name')::text as product_name,
+    (record->>'unit_price')::double as unit_price,
+    (record->>'quantity')::int as quantity,
+    (record->>'total_amount')::double as total_amount,
+    (record->>'status')::text as status,
+    (record->>'created_at')::text as created_at,
+    (record->>'region')::text as region,
+    (record->>'customer_id')::text as customer_id
+FROM orders_raw, jsonb_array_elements(data) AS records(record);
+
+-- The offset ordering only holds when every customers event is packed: a one-record
+-- event has another partition key, so it can land on another partition, where its
+-- offset says nothing about the pack's. Unpacked publishers refuse to run with
+-- LOADGEN_PACKING set.
+-- Recreate the customers materialized view
+CREATE MATERIALIZED VIEW customers AS
+SELECT DISTINCT ON (customer_id)
+    customer_id, first_name, last_name, email, phone, address, city, state,
+    zip_code, tier, status, total_orders, lifetime_value, last_order_date, created_at, updated_at
+FROM (
+    SELECT
+        (record->>'customer_id')::text as customer_id,
+        (record->>'first_name')::text as first_name,
+        (record->>'last_name')::text as last_name,
+        (record->>'email')::text as email,
+        (record->>'phone')::text as phone,
+        (record->>'address')::text as address,
+        (record->>'city')::text as city,
+        (record->>'state')::text as state,
+        (record->>'zip_code')::text as zip_code,
+        (record->>'tier')::text as tier,
+        (record->>'status')::text as status,
+        (record->>'total_orders')::int as total_orders,
+        (record->>'lifetime_value')::double as lifetime_value,
+        (record->>'last_order_date')::text as last_order_date,
+        (record->>'created_at')::text as created_at,
+        (record->>'updated_at')::text as updated_at,
+        "offset", position
+    FROM customers_raw, jsonb_array_elements(data) WITH ORDINALITY AS records(record, position)
+) AS updates
+ORDER BY customer_id, "offset" DESC, position DESC;
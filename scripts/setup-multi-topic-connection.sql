@@ -1,12 +1,13 @@
+-- Generated by: cd scripts && python3 -m loadgen.ddl
 -- Setup single connection for multiple Event Hub topics
 
 -- First, clean up existing connections and sources
-DROP MATERIALIZED VIEW IF EXISTS customers;
-DROP MATERIALIZED VIEW IF EXISTS orders;
-DROP SOURCE IF EXISTS customers_raw;
-DROP SOURCE IF EXISTS orders_raw;
-DROP CONNECTION IF EXISTS customers_eventhub_kafka;
-DROP CONNECTION IF EXISTS eventhub_kafka;
+DROP SOURCE IF EXISTS customers_raw CASCADE;
+DROP SOURCE IF EXISTS orders_raw CASCADE;
+DROP CONNECTION IF EXISTS eventhubs_multi_kafka CASCADE;
+DROP CONNECTION IF EXISTS customers_eventhub_kafka CASCADE;
+DROP CONNECTION IF EXISTS eventhub_kafka CASCADE;
+DROP SECRET IF EXISTS eventhubs_namespace_connection;
 DROP SECRET IF EXISTS customers_eventhub_connection_string;
 DROP SECRET IF EXISTS eventhub_connection_string;
 
@@ -46,7 +47,8 @@ SELECT
     (data->>'total_amount')::double as total_amount,
     (data->>'status')::text as status,
     (data->>'created_at')::text as created_at,
-    (data->>'region')::text as region
+    (data->>'region')::text as region,
+    (data->>'customer_id')::text as customer_id
 FROM orders_raw;
 
 -- Recreate the customers materialized view
@@ -69,4 +71,4 @@ SELECT
     (data->>'created_at')::text as created_at,
     (data->>'updated_at')::text as updated_at
 FROM customers_raw
-WHERE data IS NOT NULL;
\ No newline at end of file
+WHERE data IS NOT NULL;
@@ -0,0 +1,9 @@
+"""Make the loadgen package importable when pytest is run from the repository root
+
+    cd scripts && python3 -m pytest -q tests
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
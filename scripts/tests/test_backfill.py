@@ -0,0 +1,146 @@
+"""Backfill plan, checkpoint and resume, against the fake producer backend"""
+
+import argparse
+import asyncio
+import json
+import os
+
+import pytest
+
+from loadgen import backfill
+from loadgen.backfill import BackfillPlan, Checkpoint, resolve_plan
+from loadgen.orders import BulkOrderGenerator
+from loadgen.producers import FakeBackend
+
+def make_plan(chunk=50):
+    # 1000 orders over one day, 20 chunks of 50
+    return BackfillPlan("2025-01-01", "2025-01-02", 1000, chunk, 7)
+
+def plan_args(checkpoint, **options):
+    values = dict.fromkeys(backfill.PLAN_OPTIONS)
+    values.update(options)
+    return argparse.Namespace(checkpoint=str(checkpoint), **values)
+
+def test_plan_cuts_the_range_into_evenly_spaced_chunks():
+    plan = make_plan(chunk=300)
+    assert (plan.total, plan.chunks) == (1000, 4)
+    first, created_at = plan.orders(3)
+    assert first == 900 and len(created_at) == 100
+    assert created_at[0] == plan.start + plan.spacing * 900
+    assert created_at[-1] < plan.end
+
+def test_chunks_regenerate_identically():
+    plan = make_plan()
+    assert plan.payloads(BulkOrderGenerator(), 5) == plan.payloads(BulkOrderGenerator(), 5)
+    assert plan.payloads(BulkOrderGenerator(), 5) != plan.payloads(BulkOrderGenerator(), 6)
+
+def test_checkpoint_advances_past_contiguous_chunks_only(tmp_path):
+    checkpoint = Checkpoint(str(tmp_path / "cp.json"), make_plan().options)
+    for index in (2, 0, 3):
+        checkpoint.complete(index)
+    assert (checkpoint.next, checkpoint.done) == (1, {2, 3})
+    checkpoint.complete(1)
+    assert (checkpoint.next, checkpoint.done) == (4, set())
+    assert checkpoint.acknowledged(make_plan()) == 200
+
+def test_checkpoint_round_trips_through_its_file(tmp_path):
+    path = tmp_path / "cp.json"
+    plan = make_plan()
+    checkpoint = Checkpoint(str(path), plan.options)
+    for index in (0, 5, 7):
+        checkpoint.complete(index)
+    saved = Checkpoint.read(str(path))
+    assert saved == {"plan": plan.options, "next": 1, "done": [5, 7]}
+    resumed = Checkpoint.load(str(path), plan.options, saved)
+    assert (resumed.next, resumed.done) == (1, {5, 7})
+    assert os.listdir(tmp_path) == ["cp.json"]
+
+def test_interrupted_save_keeps_the_previous_checkpoint(tmp_path, monkeypatch):
+    path = tmp_path / "cp.json"
+    checkpoint = Checkpoint(str(path), make_plan().options)
+    checkpoint.complete(0)
+
+    def crash(*args, **kwargs):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(backfill.json, "dump", crash)
+    with pytest.raises(OSError):
+        checkpoint.complete(1)
+    monkeypatch.undo()
+    assert Checkpoint.read(str(path))["next"] == 1
+
+def test_missing_checkpoint_reads_as_none(tmp_path):
+    assert Checkpoint.read(str(tmp_path / "absent.json")) is None
+
+def test_resume_takes_the_plan_from_the_checkpoint(tmp_path):
+    saved = {"plan": make_plan().options, "next": 3, "done": []}
+    plan = resolve_plan(plan_args(tmp_path / "cp.json"), saved)
+    assert plan.options == make_plan().options
+    assert resolve_plan(plan_args(tmp_path / "cp.json", seed=7), saved).options == plan.options
+
+def test_resume_rejects_changed_options(tmp_path):
+    saved = {"plan": make_plan().options, "next": 3, "done": []}
+    with pytest.raises(ValueError, match="--orders-per-day, --seed"):
+        resolve_plan(plan_args(tmp_path / "cp.json", orders_per_day=5, seed=1), saved)
+
+def test_new_plan_needs_a_start(tmp_path):
+    with pytest.raises(ValueError, match="--start is required"):
+        resolve_plan(plan_args(tmp_path / "cp.json"), None)
+
+class FailingProducer:
+    """Fake producer that fails every send after the first fail_after"""
+
+    def __init__(self, producer, fail_after):
+        self.producer = producer
+        self.fail_after = fail_after
+        self.sends = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.producer.close()
+
+    async def create_batch(self, **kwargs):
+        return await self.producer.create_batch(**kwargs)
+
+    async def send_batch(self, batch):
+        self.sends += 1
+        if self.sends > self.fail_after:
+            raise RuntimeError("connection reset by test")
+        await self.producer.send_batch(batch)
+
+def sent_order_ids(hub):
+    return [json.loads(body)["order_id"] for _, _, body in hub.events]
+
+def test_interrupted_run_resumes_with_the_unacknowledged_chunks(tmp_path, monkeypatch):
+    # Batches of at most 20 orders, so every chunk takes several sends
+    backend = FakeBackend(send_latency=0.001, keep_events=True, max_batch_bytes=20 * 400)
+    fail_after = [25]
+    monkeypatch.setattr(backfill, "get_backend", lambda: backend)
+    monkeypatch.setattr(backend, "create_producer",
+                        lambda topic, create=backend.create_producer: FailingProducer(create(topic), fail_after[0]))
+    plan = make_plan()
+    path = str(tmp_path / "cp.json")
+
+    checkpoint = Checkpoint(path, plan.options)
+    with pytest.raises(RuntimeError):
+        asyncio.run(backfill.publish(plan, checkpoint, max_in_flight=4, report_interval=60))
+    saved = Checkpoint.read(path)
+    acknowledged = saved["next"] + len(saved["done"])
+    assert 0 < acknowledged < plan.chunks
+
+    fail_after[0] = float("inf")
+    resumed = Checkpoint.load(path, plan.options, saved)
+    remaining = plan.total - resumed.acknowledged(plan)
+    stats, _ = asyncio.run(backfill.publish(plan, resumed, max_in_flight=4, report_interval=60))
+    assert stats.events == remaining
+    assert (resumed.next, resumed.done) == (plan.chunks, set())
+
+    generator = BulkOrderGenerator()
+    expected = [json.loads(payload)["order_id"]
+                for index in range(plan.chunks) for payload in plan.payloads(generator, index)]
+    sent = sent_order_ids(backend.hub("orders"))
+    # Every order arrived; only chunks that failed part way were sent more than once
+    assert set(sent) == set(expected)
+    assert len(sent) - len(expected) <= 4 * plan.chunk
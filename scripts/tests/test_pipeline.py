@@ -0,0 +1,135 @@
+"""KeyedSendPipeline against the fake producer backend"""
+
+import asyncio
+import json
+import random
+
+import pytest
+
+from loadgen.pipeline import KeyedSendPipeline, PublishStats, publish_keyed
+from loadgen.producers import FakeBackend, FakeServerBusyError
+from loadgen.ratecontrol import RateController
+from loadgen.serialization import Packer
+
+KEYS = [f"CUST{n:04d}" for n in range(20)]
+
+def updates(count, seed=0):
+    """(key, payload) pairs whose payloads number each key's updates from 0"""
+    rng = random.Random(seed)
+    seq = dict.fromkeys(KEYS, 0)
+    for _ in range(count):
+        key = rng.choice(KEYS)
+        yield key, json.dumps({"key": key, "seq": seq[key]})
+        seq[key] += 1
+
+def records_by_key(hub):
+    """Every key's decoded records in the order the hub stored them, and the partitions each went to"""
+    seen, partitions = {}, {}
+    for partition_id, _, body in hub.events:
+        lines = json.loads(body) if body.startswith(b"[") else [json.loads(body)]
+        for record in lines:
+            seen.setdefault(record["key"], []).append(record["seq"])
+            partitions.setdefault(record["key"], set()).add(partition_id)
+    return seen, partitions
+
+class CountingProducer:
+    """Fake producer that records the most sends in flight at once and fails some of them"""
+
+    def __init__(self, producer, failure_rate=0.0, seed=0):
+        self.producer = producer
+        self.failure_rate = failure_rate
+        self.random = random.Random(seed)
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.failures = 0
+
+    async def create_batch(self, **kwargs):
+        return await self.producer.create_batch(**kwargs)
+
+    async def send_batch(self, batch):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.random.uniform(0, 0.002))
+            if self.random.random() < self.failure_rate:
+                self.failures += 1
+                raise FakeServerBusyError("com.microsoft:server-busy: injected")
+            await self.producer.send_batch(batch)
+        finally:
+            self.in_flight -= 1
+
+def run_pipeline(count, max_in_flight=4, max_pending=50, failure_rate=0.0, controller=None, packer=None):
+    backend = FakeBackend(send_latency=0, keep_events=True)
+    producer = CountingProducer(backend.create_producer("customers"), failure_rate)
+    pipeline = KeyedSendPipeline(producer, max_in_flight, max_pending, PublishStats(), controller,
+                                 packer, backend.EventData)
+    asyncio.run(publish_keyed(pipeline, updates(count), backend.EventData))
+    return backend.hub("customers"), producer, pipeline
+
+def test_each_key_arrives_in_submission_order_on_one_partition():
+    hub, producer, pipeline = run_pipeline(2000)
+    seen, partitions = records_by_key(hub)
+    assert sum(map(len, seen.values())) == 2000
+    for key, seqs in seen.items():
+        assert seqs == list(range(len(seqs))), key
+        assert len(partitions[key]) == 1, key
+    assert pipeline.stats.events == 2000
+    assert pipeline.queued == 0
+
+def test_sends_in_flight_stay_within_the_semaphore():
+    _, producer, _ = run_pipeline(2000, max_in_flight=3)
+    assert 1 < producer.max_in_flight <= 3
+
+def test_retried_throttled_sends_keep_each_keys_order():
+    controller = RateController(None, max_retries=50, base_delay=0.001, max_delay=0.005)
+    hub, producer, _ = run_pipeline(1500, failure_rate=0.2, controller=controller)
+    seen, _ = records_by_key(hub)
+    assert producer.failures > 0
+    assert controller.throttles == producer.failures
+    assert sum(map(len, seen.values())) == 1500
+    for key, seqs in seen.items():
+        assert seqs == list(range(len(seqs))), key
+
+def test_submit_waits_while_max_pending_events_are_queued():
+    async def scenario():
+        backend = FakeBackend(send_latency=0.01)
+        pipeline = KeyedSendPipeline(backend.create_producer("customers"), max_in_flight=1, max_pending=5)
+        high_water = 0
+        for n in range(40):
+            await pipeline.submit(KEYS[n % len(KEYS)], backend.EventData(b"{}"))
+            high_water = max(high_water, pipeline.queued)
+        await pipeline.flush()
+        return high_water, pipeline.stats.events
+
+    high_water, sent = asyncio.run(scenario())
+    assert high_water <= 5
+    assert sent == 40
+
+def test_unrecoverable_send_error_is_raised_by_flush():
+    controller = RateController(None, max_retries=0)
+    with pytest.raises(FakeServerBusyError):
+        run_pipeline(200, failure_rate=1.0, controller=controller)
+
+def test_event_larger_than_a_batch_is_an_error():
+    async def scenario():
+        backend = FakeBackend(send_latency=0, max_batch_bytes=100)
+        pipeline = KeyedSendPipeline(backend.create_producer("customers"))
+        await pipeline.submit("CUST0000", backend.EventData(b"x" * 200))
+        await pipeline.flush()
+
+    with pytest.raises(ValueError, match="exceeds the maximum batch size"):
+        asyncio.run(scenario())
+
+@pytest.mark.parametrize("mode", ["array", "ndjson"])
+def test_packed_records_keep_each_keys_order(mode):
+    hub, _, pipeline = run_pipeline(2000, packer=Packer(mode, max_bytes=512, groups=4))
+    if mode == "ndjson":
+        # The ndjson bodies are one record per line
+        hub.events = [(p, k, line) for p, k, body in hub.events for line in body.split(b"\n")]
+    seen, partitions = records_by_key(hub)
+    assert sum(map(len, seen.values())) == 2000
+    for key, seqs in seen.items():
+        assert seqs == list(range(len(seqs))), key
+        assert len(partitions[key]) == 1, key
+    assert pipeline.stats.records == 2000
+    assert pipeline.stats.events < 2000
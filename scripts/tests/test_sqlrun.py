@@ -0,0 +1,122 @@
+"""Statement splitting and pooled execution of loadgen.sqlrun, against loadgen.pgstub"""
+
+import asyncio
+
+import pytest
+
+from loadgen import sqlrun
+from loadgen.pgstub import PgStub, StubError
+from loadgen.pgwire import Pool, Result
+
+def split(text):
+    return sqlrun.split_statements(text, "test.sql")
+
+def test_splits_at_top_level_semicolons_only():
+    statements = split("SELECT 'a;b', \"c;d\"; SELECT 'it''s;'; SELECT 1")
+    assert [s.sql for s in statements] == ["SELECT 'a;b', \"c;d\"", "SELECT 'it''s;'", "SELECT 1"]
+
+def test_dollar_quoted_bodies_keep_their_semicolons():
+    text = "CREATE FUNCTION f() AS $body$ SELECT 1; SELECT 2; $body$;\nSELECT $$;$$;"
+    statements = split(text)
+    assert [s.sql for s in statements] == ["CREATE FUNCTION f() AS $body$ SELECT 1; SELECT 2; $body$",
+                                          "SELECT $$;$$"]
+
+def test_comments_are_skipped_and_label_the_next_statement():
+    text = ("-- Orders per customer\n"
+            "SELECT 1; -- trailing; not a statement\n"
+            "/* block; comment */ SELECT 2;\n"
+            "--\n"
+            "SELECT 3 -- inline; comment\n"
+            ";")
+    statements = split(text)
+    assert [s.label for s in statements] == ["Orders per customer", "trailing; not a statement",
+                                             "SELECT 3 -- inline; comment"]
+    assert [s.sql for s in statements] == ["SELECT 1", "SELECT 2", "SELECT 3 -- inline; comment"]
+
+def test_statements_carry_their_starting_line():
+    text = "SELECT 1;\n\n-- two\nSELECT\n  'multi\nline';\n\\d orders\nSELECT 3;"
+    assert [(s.line, s.kind) for s in split(text)] == [(1, "query"), (4, "query"), (7, "meta"), (8, "query")]
+
+@pytest.mark.parametrize("sql, kind", [
+    ("SELECT 1", "query"),
+    ("with x as (select 1) select * from x", "query"),
+    ("SHOW SOURCES", "query"),
+    ("EXPLAIN SELECT 1", "query"),
+    ("SET cluster = quickstart", "session"),
+    ("RESET cluster", "session"),
+    ("BEGIN", "transaction"),
+    ("start transaction", "transaction"),
+    ("COMMIT", "transaction"),
+    ("CREATE VIEW v AS SELECT 1", "command"),
+    ("INSERT INTO t VALUES (1)", "command"),
+    ("\\dt", "meta"),
+])
+def test_statement_kind(sql, kind):
+    assert sqlrun.statement_kind(sql) == kind
+
+def test_transaction_blocks_group_begin_to_commit():
+    statements = split("SELECT 1; BEGIN; INSERT INTO t VALUES (1); ROLLBACK TO s; COMMIT; SELECT 2; BEGIN; SELECT 3")
+    items = list(sqlrun.transaction_blocks(statements))
+    shape = [[s.sql for s in item] if isinstance(item, list) else item.sql for item in items]
+    assert shape == ["SELECT 1", ["BEGIN", "INSERT INTO t VALUES (1)", "ROLLBACK TO s", "COMMIT"], "SELECT 2",
+                     ["BEGIN", "SELECT 3"]]
+
+def test_substitute_fills_braced_variables_only():
+    assert sqlrun.substitute("SELECT '${A}', '$ConnectionString'", {"A": "x"}) == "SELECT 'x', '$ConnectionString'"
+    with pytest.raises(KeyError):
+        sqlrun.substitute("SELECT ${MISSING}", {})
+
+class Recorder:
+    """pgstub handler that logs (connection task, sql) and fails statements mentioning 'boom'"""
+
+    def __init__(self, delay=0.0):
+        self.log = []
+        self.delay = delay
+        self.running = 0
+        self.max_running = 0
+
+    def __call__(self, sql):
+        self.log.append((id(asyncio.current_task()), sql))
+        if "boom" in sql:
+            raise StubError("boom")
+        if sql.lower().startswith("select"):
+            return Result(["n"], [[sql.split()[1]]], "SELECT 1")
+        return Result(None, [], sql.split()[0].upper())
+
+def run(text, handler, size=4, environ=None):
+    async def scenario():
+        stub = await PgStub(handler).start()
+        pool = Pool(stub.dsn, size=size)
+        try:
+            return await sqlrun.run_statements(pool, split(text), environ=environ)
+        finally:
+            await pool.close()
+            await stub.close()
+
+    return asyncio.run(scenario())
+
+def test_outcomes_follow_file_order_with_rows_and_errors():
+    outcomes = run("SELECT 1; SELECT boom; CREATE VIEW v AS SELECT 1; SELECT ${N};", Recorder(), environ={"N": "7"})
+    assert [o["status"] for o in outcomes] == ["ok", "error", "ok", "ok"]
+    assert outcomes[0]["sample"] == [["1"]]
+    assert outcomes[1]["error"].endswith("boom")
+    assert outcomes[2]["tag"] == "CREATE"
+    assert outcomes[3]["sample"] == [["7"]]
+
+def test_consecutive_queries_spread_over_the_pool():
+    recorder = Recorder()
+    run("SELECT 1; SELECT 2; SELECT 3; SELECT 4;", recorder)
+    assert len({task for task, _ in recorder.log}) > 1
+
+def test_session_statements_reach_every_pooled_connection():
+    recorder = Recorder()
+    run("SELECT 1; SELECT 2; SELECT 3; SET cluster = c; SELECT 4;", recorder, size=3)
+    sets = [task for task, sql in recorder.log if sql.startswith("SET")]
+    assert len(sets) == 3 and len(set(sets)) == 3
+
+def test_transaction_block_runs_on_one_connection():
+    recorder = Recorder()
+    run("SELECT 1; SELECT 2; BEGIN; INSERT INTO t VALUES (1); SET x = 1; SELECT 5; COMMIT; SELECT 6;", recorder)
+    block = [task for task, sql in recorder.log
+             if sql.split()[0] in ("BEGIN", "INSERT", "SET", "COMMIT") or sql == "SELECT 5"]
+    assert len(block) == 5 and len(set(block)) == 1
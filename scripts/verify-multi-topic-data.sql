@@ -22,6 +22,17 @@ FROM customers
 WHERE customer_id IN ('CUST001', 'CUST004', 'CUST007')
 ORDER BY customer_id;
 
+-- Orders joined to their customers (orders published by python3 -m loadgen fanout)
+SELECT
+    c.tier,
+    COUNT(*) as orders,
+    COUNT(DISTINCT o.customer_id) as customers,
+    ROUND(SUM(o.total_amount)::numeric, 2) as revenue
+FROM orders o
+JOIN customers c ON c.customer_id = o.customer_id
+GROUP BY c.tier
+ORDER BY c.tier;
+
 -- Summary: Show data flowing through single connection to multiple topics
 SELECT 
     'SUMMARY' as info,